@@ -0,0 +1,167 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional
+
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.controller import ControllerAPI
+
+
+@dataclass
+class BatchOperation:
+    """A single operation of a batch."""
+
+    kind: str
+    """Kind of the operation, one of the Batch constants."""
+
+    target_id: int
+    """Id of the output or counter the operation applies to."""
+
+    value: Any = None
+    """Value which is set, None for counter resets."""
+
+
+@dataclass
+class OperationResult:
+    """Outcome of a single operation of a batch."""
+
+    operation: BatchOperation
+    """The executed operation."""
+
+    error: Optional[Exception] = None
+    """The error raised by the operation, None if it succeeded."""
+
+    latency: float = 0.0
+    """Seconds the operation took."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of all operations of a batch, in the order they were added."""
+
+    results: List[OperationResult] = field(default_factory=list)
+    """Results per operation."""
+
+    duration: float = 0.0
+    """Seconds the whole batch took."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether all operations succeeded."""
+        return all(result.ok for result in self.results)
+
+    @property
+    def errors(self) -> List[OperationResult]:
+        """Results of the failed operations."""
+        return [result for result in self.results if not result.ok]
+
+    def raise_for_errors(self):
+        """Raises the error of the first failed operation, if any."""
+        for result in self.results:
+            if result.error is not None:
+                raise result.error
+
+
+class Batch:
+    """A set of output and counter operations for one controller, executed concurrently.
+
+    Operations are added with the builder methods and run with `execute`, at most
+    `max_in_flight` requests are in flight at once::
+
+        result = await (api.batch(0)
+                        .set_motor(1, Motor(values=[512]))
+                        .set_servomotor(1, Servomotor(value=256))
+                        .reset_counter(0)
+                        .execute())
+    """
+
+    MOTOR = "motor"
+    SERVOMOTOR = "servomotor"
+    COUNTER_RESET = "counter_reset"
+
+    def __init__(self, api: "ControllerAPI", controller_id: int, max_in_flight: Optional[int] = None):
+        """Creates a new empty batch.
+
+        Parameters
+        ----------
+        api : ControllerAPI
+            The api client used to execute the operations.
+
+        controller_id : int
+            Id of the controller the operations apply to.
+
+        max_in_flight : Optional[int], optional
+            Maximum number of concurrent requests, by default the `limit_per_host` of the api config,
+            so a typical batch is sent in a single round
+        """
+        if max_in_flight is None:
+            max_in_flight = api.config.limit_per_host
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.api = api
+        """The api client used to execute the operations."""
+        self.controller_id = controller_id
+        """Id of the controller the operations apply to."""
+        self.max_in_flight = max_in_flight
+        """Maximum number of concurrent requests."""
+        self.operations: List[BatchOperation] = []
+        """The operations in the order they were added."""
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def set_motor(self, motor_id: int, motor: Motor) -> "Batch":
+        """Adds setting the configuration of a motor."""
+        self.operations.append(BatchOperation(self.MOTOR, motor_id, motor))
+        return self
+
+    def set_servomotor(self, servomotor_id: int, servomotor: Servomotor) -> "Batch":
+        """Adds setting the configuration of a servomotor."""
+        self.operations.append(BatchOperation(self.SERVOMOTOR, servomotor_id, servomotor))
+        return self
+
+    def reset_counter(self, counter_id: int) -> "Batch":
+        """Adds resetting a counter."""
+        self.operations.append(BatchOperation(self.COUNTER_RESET, counter_id))
+        return self
+
+    def _call(self, operation: BatchOperation) -> Callable[[], Awaitable[None]]:
+        if operation.kind == self.MOTOR:
+            return lambda: self.api.update_controller_motor_by_id(self.controller_id, operation.target_id, operation.value)
+        elif operation.kind == self.SERVOMOTOR:
+            return lambda: self.api.update_controller_servomotor_by_id(
+                self.controller_id, operation.target_id, operation.value)
+        elif operation.kind == self.COUNTER_RESET:
+            return lambda: self.api.update_controller_counter_by_id(self.controller_id, operation.target_id)
+        raise ValueError(f"Unknown operation kind: {operation.kind}")
+
+    async def execute(self) -> BatchResult:
+        """Executes all operations concurrently. Failing operations do not affect the others.
+
+        Returns
+        -------
+        BatchResult
+            The results in the order the operations were added.
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+
+        async def run(operation: BatchOperation) -> OperationResult:
+            call = self._call(operation)
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    await call()
+                except Exception as e:
+                    return OperationResult(operation, error=e, latency=time.perf_counter() - start)
+                return OperationResult(operation, latency=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run(operation) for operation in self.operations))
+        return BatchResult(results=list(results), duration=time.perf_counter() - start)
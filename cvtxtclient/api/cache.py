@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_TTLS = {
+    "discovery": 60.0,
+    "controller": 60.0,
+    "counters": 1.0,
+    "inputs": 1.0,
+}
+"""Seconds responses of the cached endpoints stay valid by default. Endpoints not listed are not cached."""
+
+
+class ResponseCache:
+    """Caches responses of slow changing endpoints for a time to live per endpoint.
+
+    Entries are keyed by url and evicted least recently used first once `maxsize` is reached.
+    Writes through the client invalidate the entries below the written url. Cached values are
+    shared between callers and must not be modified::
+
+        api = ControllerAPI(config, cache=ResponseCache({"discovery": 300.0, "inputs": 5.0}))
+    """
+
+    def __init__(self,
+                 ttls: Optional[Dict[str, float]] = None,
+                 maxsize: int = 256,
+                 clock: Callable[[], float] = time.monotonic):
+        """Creates a new cache.
+
+        Parameters
+        ----------
+        ttls : Optional[Dict[str, float]], optional
+            Seconds the responses of an endpoint stay valid, by endpoint name. Endpoints not listed
+            are not cached, by default DEFAULT_TTLS
+
+        maxsize : int, optional
+            Maximum number of cached responses, by default 256
+
+        clock : Callable[[], float], optional
+            Returns the current time in seconds, by default time.monotonic
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        """Seconds the responses of an endpoint stay valid, by endpoint name."""
+        self.maxsize = maxsize
+        """Maximum number of cached responses."""
+        self.hits: Dict[str, int] = {}
+        """Number of responses answered from the cache, by endpoint name."""
+        self.misses: Dict[str, int] = {}
+        """Number of responses not found in the cache, by endpoint name."""
+        self.evictions = 0
+        """Number of entries evicted because the cache was full."""
+        self.invalidations = 0
+        """Number of entries removed by invalidation."""
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def caches(self, name: str) -> bool:
+        """Whether responses of an endpoint are cached."""
+        return self.ttls.get(name) is not None
+
+    @property
+    def generation(self) -> int:
+        """Changes with every invalidation, see `put`."""
+        return self._generation
+
+    def get(self, name: str, url: str) -> Optional[Any]:
+        """Returns the cached response of a url, None if there is no valid one.
+
+        Parameters
+        ----------
+        name : str
+            Name of the endpoint, used for the hit and miss counts.
+
+        url : str
+            Url of the request.
+        """
+        entry = self._entries.get(url)
+        if entry is not None:
+            expires, value = entry
+            if expires > self._clock():
+                self._entries.move_to_end(url)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                return value
+            del self._entries[url]
+        self.misses[name] = self.misses.get(name, 0) + 1
+        return None
+
+    def put(self, name: str, url: str, value: Any, generation: Optional[int] = None):
+        """Caches the response of a url for the time to live of its endpoint.
+
+        Parameters
+        ----------
+        name : str
+            Name of the endpoint.
+
+        url : str
+            Url of the request.
+
+        value : Any
+            The response.
+
+        generation : Optional[int], optional
+            The `generation` read before the request was sent. If the cache was invalidated since,
+            the response may predate a write and is not cached, by default None
+        """
+        ttl = self.ttls.get(name)
+        if ttl is None or (generation is not None and generation != self._generation):
+            return
+        self._entries[url] = (self._clock() + ttl, value)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, url: Optional[str] = None):
+        """Removes the cached responses of a url and of all urls below it, or all responses if url is None."""
+        self._generation += 1
+        if url is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            return
+        prefix = url.rstrip("/") + "/"
+        stale = [key for key in self._entries if key == url or key.startswith(prefix)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the hit and miss counts as plain dict."""
+        return {
+            "size": len(self._entries),
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
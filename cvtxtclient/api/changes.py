@@ -0,0 +1,260 @@
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+
+from cvtxtclient.models import Counter as CounterModel, Input as InputModel
+from cvtxtclient.models.input import InputDevice
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.controller import ControllerAPI
+
+M = TypeVar('M')
+
+DEFAULT_DEADBANDS: Dict[InputDevice, float] = {
+    InputDevice.MINI_SWITCH: 0.0,
+    InputDevice.PHOTO_RESISTOR: 10.0,
+    InputDevice.ULTRASONIC_DISTANCE_METER: 2.0,
+    InputDevice.PHOTO_TRANSISTOR: 0.0,
+    InputDevice.COLOR_SENSOR: 10.0,
+    InputDevice.NTC_RESISTOR: 4.0,
+    InputDevice.TRAIL_FOLLOWER: 0.0,
+}
+"""Changes in raw units an input must exceed to be reported, by device. Digital devices report every change."""
+
+
+class ChangeFilter:
+    """Decides which samples of a value are reported as changes.
+
+    A sample is reported if it differs from the last reported one by more than the deadband, or,
+    with hysteresis, if it switches the on/off state: the state turns on at or above the high
+    threshold and off at or below the low one, so noise between them does not toggle it.
+    Changes are reported at most once per `min_interval`. A change within the interval is not
+    lost, it is reported with the first sample after the interval if it still holds.
+    The first sample is always reported.
+    """
+
+    def __init__(self,
+                 deadband: float = 0.0,
+                 hysteresis: Optional[Tuple[float, float]] = None,
+                 min_interval: float = 0.0):
+        """Creates a new filter.
+
+        Parameters
+        ----------
+        deadband : float, optional
+            Change a sample must exceed to be reported, by default 0.0 to report every change
+
+        hysteresis : Optional[Tuple[float, float]], optional
+            Low and high threshold of switch-like sensors. If given, only changes of the on/off state
+            are reported and the deadband is ignored, by default None
+
+        min_interval : float, optional
+            Minimum seconds between two reported changes, by default 0.0
+        """
+        if deadband < 0:
+            raise ValueError("deadband must not be negative")
+        if hysteresis is not None and hysteresis[0] > hysteresis[1]:
+            raise ValueError("the low threshold of the hysteresis must not exceed the high one")
+        self.deadband = deadband
+        """Change a sample must exceed to be reported."""
+        self.hysteresis = hysteresis
+        """Low and high threshold of switch-like sensors, None to use the deadband."""
+        self.min_interval = min_interval
+        """Minimum seconds between two reported changes."""
+        self.value: Optional[float] = None
+        """The last reported value, None before the first sample."""
+        self.state: Optional[bool] = None
+        """The on/off state of the last reported value, None without hysteresis."""
+        self.reported = 0
+        """Number of samples reported."""
+        self.suppressed = 0
+        """Number of samples not reported."""
+        self._reported_at: Optional[float] = None
+
+    @classmethod
+    def for_device(cls,
+                   device: Optional[InputDevice],
+                   deadbands: Optional[Dict[InputDevice, float]] = None,
+                   hysteresis: Optional[Tuple[float, float]] = None,
+                   min_interval: float = 0.0) -> "ChangeFilter":
+        """Creates a filter with the deadband of an input device.
+
+        Parameters
+        ----------
+        device : Optional[InputDevice]
+            The device, None for a deadband of 0.
+
+        deadbands : Optional[Dict[InputDevice, float]], optional
+            Deadbands overriding DEFAULT_DEADBANDS, by default None
+        """
+        deadband = 0.0
+        if device is not None:
+            deadband = (deadbands or {}).get(device, DEFAULT_DEADBANDS.get(device, 0.0))
+        return cls(deadband, hysteresis=hysteresis, min_interval=min_interval)
+
+    def _switch(self, value: float) -> bool:
+        low, high = self.hysteresis
+        if self.state is None:
+            return value >= high
+        if self.state:
+            return value > low
+        return value >= high
+
+    def update(self, value: float, timestamp: float) -> bool:
+        """Feeds a sample and returns whether it is reported as a change.
+
+        Parameters
+        ----------
+        value : float
+            The sampled value.
+
+        timestamp : float
+            Time of the sample in seconds, from a monotonic clock.
+        """
+        state = self._switch(value) if self.hysteresis is not None else None
+        if self.value is not None:
+            if self.hysteresis is not None:
+                changed = state != self.state
+            else:
+                changed = abs(value - self.value) > self.deadband
+            if not changed or (self._reported_at is not None and timestamp - self._reported_at < self.min_interval):
+                self.suppressed += 1
+                return False
+        self.value = value
+        self.state = state
+        self._reported_at = timestamp
+        self.reported += 1
+        return True
+
+
+@dataclass(frozen=True)
+class ChangeEvent(Generic[M]):
+    """A reported change of an input or counter."""
+
+    controller_id: int
+    """Id of the controller."""
+
+    id: int
+    """Id of the input or counter."""
+
+    value: float
+    """The new value: the input value or the count."""
+
+    previous: Optional[float]
+    """The previously reported value, None for the first event."""
+
+    state: Optional[bool]
+    """The on/off state if the filter uses hysteresis, otherwise None."""
+
+    timestamp: float
+    """Time of the sample, as returned by loop.time()."""
+
+    model: M
+    """The sampled input or counter."""
+
+
+async def input_changes(api: "ControllerAPI",
+                        controller_id: int,
+                        input_id: int,
+                        rate: float = 10.0,
+                        deadbands: Optional[Dict[InputDevice, float]] = None,
+                        hysteresis: Optional[Tuple[float, float]] = None,
+                        min_interval: float = 0.0) -> AsyncIterator[ChangeEvent[InputModel]]:
+    """Yields the changes of an input, polled through the input poller of the api.
+
+    The deadband is chosen by the device of the input, see DEFAULT_DEADBANDS::
+
+        async for change in input_changes(api, 0, 1, rate=20.0, min_interval=0.2):
+            print(change.previous, "->", change.value)
+
+    Parameters
+    ----------
+    api : ControllerAPI
+        The api client, its `input_poller` is used.
+
+    controller_id : int
+        Id of the controller of the input.
+
+    input_id : int
+        Id of the input.
+
+    rate : float, optional
+        Samples per second, by default 10.0
+
+    deadbands : Optional[Dict[InputDevice, float]], optional
+        Deadbands overriding DEFAULT_DEADBANDS, by default None
+
+    hysteresis : Optional[Tuple[float, float]], optional
+        Low and high threshold for switch-like sensors, see ChangeFilter, by default None
+
+    min_interval : float, optional
+        Minimum seconds between two changes, by default 0.0
+    """
+    change_filter: Optional[ChangeFilter] = None
+    async with api.input_poller().subscribe(controller_id, input_id, rate) as samples:
+        async for sample in samples:
+            value = sample.value.value
+            if value is None:
+                continue
+            if change_filter is None:
+                change_filter = ChangeFilter.for_device(sample.value.device, deadbands, hysteresis, min_interval)
+            previous = change_filter.value
+            if change_filter.update(value, sample.timestamp):
+                yield ChangeEvent(controller_id, input_id, value, previous, change_filter.state,
+                                  sample.timestamp, sample.value)
+
+
+async def counter_changes(api: "ControllerAPI",
+                          controller_id: int,
+                          counter_ids: Optional[Iterable[int]] = None,
+                          deadband: float = 0.0,
+                          min_interval: float = 0.0) -> AsyncIterator[ChangeEvent[CounterModel]]:
+    """Yields the count changes of counters, following the counters message stream.
+
+    Messages of a single counter are ignored until a message of all counters told its id.
+    The stream reconnects when the connection drops::
+
+        async for change in counter_changes(api, 0, deadband=10):
+            print(f"C{change.id + 1}: {change.value}")
+
+    Parameters
+    ----------
+    api : ControllerAPI
+        The api client.
+
+    controller_id : int
+        Id of the controller of the counters.
+
+    counter_ids : Optional[Iterable[int]], optional
+        Ids of the watched counters, by default all
+
+    deadband : float, optional
+        Change of the count which must be exceeded to be reported, by default 0.0
+
+    min_interval : float, optional
+        Minimum seconds between two changes of a counter, by default 0.0
+    """
+    watched = None if counter_ids is None else set(counter_ids)
+    filters: Dict[int, ChangeFilter] = {}
+    # A message holds all counters indexed by id, or a single counter without id which is matched by name.
+    ids: Dict[str, int] = {}
+    loop = asyncio.get_running_loop()
+    stream = api.resilient_stream(lambda: api.get_controller_counter_updates_stream(controller_id))
+    async for update in stream:
+        now = loop.time()
+        if isinstance(update, list):
+            ids = {counter.name: i for i, counter in enumerate(update) if counter.name is not None}
+            counters = list(enumerate(update))
+        elif update.name in ids:
+            counters = [(ids[update.name], update)]
+        else:
+            continue
+        for counter_id, counter in counters:
+            if counter.count is None or (watched is not None and counter_id not in watched):
+                continue
+            change_filter = filters.get(counter_id)
+            if change_filter is None:
+                change_filter = filters[counter_id] = ChangeFilter(deadband, min_interval=min_interval)
+            previous = change_filter.value
+            if change_filter.update(counter.count, now):
+                yield ChangeEvent(controller_id, counter_id, counter.count, previous, None, now, counter)
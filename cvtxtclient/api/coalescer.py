@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.controller import ControllerAPI
+
+logger = logging.getLogger(__name__)
+
+OutputKey = Tuple[str, int, int]
+"""Identifies an output by its kind, controller id and output id."""
+
+
+@dataclass
+class CoalescerStats:
+    """Counts of the commands handled by a CommandCoalescer."""
+
+    submitted: int = 0
+    """Commands handed to the coalescer."""
+
+    sent: int = 0
+    """Commands sent to the controller and acknowledged."""
+
+    coalesced: int = 0
+    """Commands replaced by a newer command for the same output before they were sent."""
+
+    suppressed: int = 0
+    """Commands skipped as they equal the last acknowledged value of the output."""
+
+    failed: int = 0
+    """Commands the controller did not acknowledge."""
+
+
+class _OutputChannel:
+    """Pending and acknowledged state of a single output."""
+
+    def __init__(self, send: Callable[[Any], Awaitable[None]]):
+        self.send = send
+        self.pending: Optional[Union[Motor, Servomotor]] = None
+        self.acknowledged: Optional[Union[Motor, Servomotor]] = None
+        self.last_sent: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class CommandCoalescer:
+    """Coalesces motor and servomotor commands per output and limits their rate.
+
+    For every output only the newest pending value is kept, at most `max_rate` updates per second
+    are sent per output and values equal to the last acknowledged one are skipped.
+    Setting a value never waits for the controller::
+
+        coalescer = CommandCoalescer(api, max_rate=20)
+        coalescer.set_motor(0, 1, Motor(values=[512], direction=Direction.CW))
+        ...
+        await coalescer.flush()
+    """
+
+    MOTOR = "motor"
+    SERVOMOTOR = "servomotor"
+
+    def __init__(self, api: "ControllerAPI", max_rate: float = 20.0, skip_unchanged: bool = True):
+        """Creates a new coalescer.
+
+        Parameters
+        ----------
+        api : ControllerAPI
+            The api client used to send the commands.
+
+        max_rate : float, optional
+            Maximum number of updates per second and output, by default 20.0
+
+        skip_unchanged : bool, optional
+            Skip values equal to the last acknowledged value of the output, by default True
+        """
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        self.api = api
+        """The api client used to send the commands."""
+        self.max_rate = max_rate
+        """Maximum number of updates per second and output."""
+        self.skip_unchanged = skip_unchanged
+        """Whether values equal to the last acknowledged value are skipped."""
+        self.stats = CoalescerStats()
+        """Counts of the handled commands."""
+        self.last_error: Optional[Exception] = None
+        """The most recent error while sending a command."""
+        self._channels: Dict[OutputKey, _OutputChannel] = {}
+
+    def set_motor(self, controller_id: int, motor_id: int, motor: Motor):
+        """Sets the configuration of a motor, replacing a value which is not sent yet."""
+        key = (self.MOTOR, controller_id, motor_id)
+        self._submit(key, motor, lambda value: self.api.update_controller_motor_by_id(controller_id, motor_id, value))
+
+    def set_servomotor(self, controller_id: int, servomotor_id: int, servomotor: Servomotor):
+        """Sets the configuration of a servomotor, replacing a value which is not sent yet."""
+        key = (self.SERVOMOTOR, controller_id, servomotor_id)
+        self._submit(key, servomotor,
+                     lambda value: self.api.update_controller_servomotor_by_id(controller_id, servomotor_id, value))
+
+    def acknowledged(self, kind: str, controller_id: int, output_id: int) -> Optional[Union[Motor, Servomotor]]:
+        """Returns a copy of the last value the controller acknowledged for the output, if any."""
+        channel = self._channels.get((kind, controller_id, output_id))
+        if channel is None or channel.acknowledged is None:
+            return None
+        return channel.acknowledged.model_copy(deep=True)
+
+    async def flush(self):
+        """Waits until all pending commands are sent, including commands set while waiting."""
+        while True:
+            tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+            if not tasks:
+                return
+            # Unlike gather, wait does not cancel the sends if the flush is cancelled.
+            await asyncio.wait(tasks)
+
+    async def close(self, flush: bool = True):
+        """Stops the coalescer, sending pending commands first if `flush` is set."""
+        if flush:
+            await self.flush()
+        tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "CommandCoalescer":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _submit(self, key: OutputKey, value: Union[Motor, Servomotor], send: Callable[[Any], Awaitable[None]]):
+        self.stats.submitted += 1
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _OutputChannel(send)
+        if channel.pending is not None:
+            self.stats.coalesced += 1
+        elif self.skip_unchanged and channel.task is None and value == channel.acknowledged:
+            self.stats.suppressed += 1
+            return
+        # Keep a copy, the caller may modify and resubmit its model before it is sent.
+        channel.pending = value.model_copy(deep=True)
+        if channel.task is None:
+            channel.task = asyncio.get_running_loop().create_task(self._drain(channel))
+
+    async def _drain(self, channel: _OutputChannel):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.max_rate
+        try:
+            while channel.pending is not None:
+                if channel.last_sent is not None:
+                    delay = channel.last_sent + interval - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                value, channel.pending = channel.pending, None
+                if self.skip_unchanged and value == channel.acknowledged:
+                    self.stats.suppressed += 1
+                    continue
+                channel.last_sent = loop.time()
+                try:
+                    await channel.send(value)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats.failed += 1
+                    self.last_error = e
+                    logger.warning(f"Sending command failed: {e}")
+                else:
+                    channel.acknowledged = value
+                    self.stats.sent += 1
+        finally:
+            channel.task = None
@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import TypeAdapter
+
+T = TypeVar('T')
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    """Returns the TypeAdapter of a type, built once and reused, as building one compiles its validator."""
+    return TypeAdapter(type_)
+
+
+class Codec:
+    """Decodes response bodies into models and encodes models into request bodies.
+
+    The default implementation validates JSON bytes directly with pydantic-core and serializes
+    with it as well, without building intermediate dicts.
+    """
+
+    content_type = "application/json"
+    """Content type of the encoded bodies."""
+
+    def decode(self, data: bytes, type_: Type[T]) -> T:
+        """Parses and validates a JSON body, e.g. List[Counter] as a whole.
+
+        Parameters
+        ----------
+        data : bytes
+            The raw body.
+
+        type_ : Type[T]
+            The type to validate against.
+
+        Raises
+        ------
+        pydantic.ValidationError
+            If the body is not valid JSON or does not match the type.
+        """
+        return type_adapter(type_).validate_json(data)
+
+    def encode(self, value: Any, type_: Optional[Any] = None) -> bytes:
+        """Serializes a value by alias, equivalent to json.dumps(value.model_dump(by_alias=True)).
+
+        Parameters
+        ----------
+        value : Any
+            The value, e.g. a model or a list of models.
+
+        type_ : Optional[Any], optional
+            The type of the value, by default the type of value. Has to be given for lists.
+        """
+        return type_adapter(type(value) if type_ is None else type_).dump_json(value, by_alias=True)
+
+
+class OrjsonCodec(Codec):
+    """Codec serializing with orjson, which requires orjson to be installed."""
+
+    def __init__(self):
+        import orjson
+        self._dumps = orjson.dumps
+
+    def encode(self, value: Any, type_: Optional[Any] = None) -> bytes:
+        adapter = type_adapter(type(value) if type_ is None else type_)
+        return self._dumps(adapter.dump_python(value, mode='json', by_alias=True))
+
+
+def get_codec(backend: Optional[str] = None) -> Codec:
+    """Returns a codec.
+
+    Parameters
+    ----------
+    backend : Optional[str], optional
+        Either "pydantic" or "orjson". If None, pydantic is used, by default None
+
+    Raises
+    ------
+    ImportError
+        If "orjson" is requested but not installed.
+    """
+    if backend is None or backend == "pydantic":
+        return Codec()
+    elif backend == "orjson":
+        try:
+            return OrjsonCodec()
+        except ImportError as e:
+            raise ImportError("The orjson codec requires orjson to be installed.") from e
+    raise ValueError(f"Unknown codec backend: {backend}")
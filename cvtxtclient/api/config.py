@@ -1,8 +1,42 @@
+from typing import Optional
+
+
 class APIConfig:
     """Basic configuration for the API client."""
 
-    def __init__(self, base_url: str, api_key: str | None = None):
+    def __init__(self,
+                 base_url: str,
+                 api_key: str | None = None,
+                 keep_alive: bool = True,
+                 limit: int = 100,
+                 limit_per_host: int = 8,
+                 keepalive_timeout: float = 15.0,
+                 ttl_dns_cache: Optional[int] = 300,
+                 request_timeout: Optional[float] = 300.0,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 stream_read_timeout: Optional[float] = None):
         self.base_url = base_url
         """URL for the API server."""
         self.api_key = api_key
-        """API key for authentication."""
\ No newline at end of file
+        """API key for authentication."""
+        self.keep_alive = keep_alive
+        """Reuse TCP connections between requests. If False, every request opens a new connection."""
+        self.limit = limit
+        """Maximum number of simultaneous connections in the pool, 0 for unlimited."""
+        self.limit_per_host = limit_per_host
+        """Maximum number of simultaneous connections to the same host, 0 for unlimited."""
+        self.keepalive_timeout = keepalive_timeout
+        """Seconds an idle connection is kept open for reuse. Ignored if keep_alive is False."""
+        self.ttl_dns_cache = ttl_dns_cache
+        """Seconds resolved host names are cached, None to cache forever."""
+        self.request_timeout = request_timeout
+        """Default deadline in seconds of the idempotent GET requests, None to wait forever.
+        Can be overridden per call with the `timeout` argument."""
+        self.connect_timeout = connect_timeout
+        """Seconds to wait for a connection to be established, None for no separate limit."""
+        self.read_timeout = read_timeout
+        """Seconds to wait for the next chunk of a response, None for no separate limit."""
+        self.stream_read_timeout = stream_read_timeout
+        """Seconds a stream may stay silent before it is considered stalled, None to wait forever.
+        Streams have no overall deadline."""
@@ -1,25 +1,88 @@
+import asyncio
+import contextlib
 import aiohttp
 from cvtxtclient.models.motor import Motor
 from cvtxtclient.models.servomotor import Servomotor
+from cvtxtclient.models.input import InputDevice
 from cvtxtclient.api.config import APIConfig
-from cvtxtclient.api.exceptions import APIError, BadRequestError, NotFoundError, InternalServerError, UnexpectedError
+from cvtxtclient.api.exceptions import (APIError, BadRequestError, NotFoundError, InternalServerError,
+                                        RequestTimeoutError, UnexpectedError)
+from cvtxtclient.api.batch import Batch
+from cvtxtclient.api.cache import ResponseCache
+from cvtxtclient.api.changes import ChangeEvent, counter_changes, input_changes
+from cvtxtclient.api.codec import Codec, type_adapter
+from cvtxtclient.api.decoding import ColorMode, DecodedFrame, FrameDecoder
+from cvtxtclient.api.delivery import BufferedStream, DeliveryPolicy
+from cvtxtclient.api.framing import iter_messages
+from cvtxtclient.api.hedging import HedgingPolicy
+from cvtxtclient.api.hub import StreamHub
+from cvtxtclient.api.metrics import ClientMetrics, StreamMetrics
+from cvtxtclient.api.multipart import Frame, MultipartStreamParser
+from cvtxtclient.api.polling import InputPoller
+from cvtxtclient.api.resilience import DEFAULT_RETRY_ON, BackoffPolicy, ResilientStream
+from cvtxtclient.api.singleflight import SingleFlight
 from cvtxtclient.models import (
     Controller as ControllerModel,
     Counter as CounterModel,
     Input as InputModel,
-    ImageRecognitionConfig,
     CameraConfig,
-    Enabled,
-    DebuggerArguments,
-    DebuggerResponse,
 )
-from typing import AsyncIterator, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar, Union
+
+if TYPE_CHECKING:
+    # The image recognition models are large and rarely used, they are imported on first use.
+    from cvtxtclient.models.image_recognition_config import ImageRecognitionConfig
+
+T = TypeVar('T')
+
+Timeout = Union[float, aiohttp.ClientTimeout, None]
+"""Deadline of a single request: seconds for the whole request, a ClientTimeout, or None for the client default."""
+
+CounterUpdate = Union[List[CounterModel], CounterModel]
+"""A counter message: either all counters, indexed by their id, or a single counter."""
+
+_COUNTER_UPDATE_ADAPTER = type_adapter(CounterUpdate)
+"""Validates a counter message, which holds either all counters or a single one."""
+
+
+def create_connector(config: APIConfig,
+                     limit: Optional[int] = None,
+                     limit_per_host: Optional[int] = None) -> aiohttp.TCPConnector:
+    """Creates a pooled connector based on the connection settings of a config.
+
+    Parameters
+    ----------
+    config : APIConfig
+        Configuration holding the keep-alive, pool and DNS cache settings.
+
+    limit : Optional[int], optional
+        Maximum number of simultaneous connections, overriding the config if given, by default None
+
+    limit_per_host : Optional[int], optional
+        Maximum number of simultaneous connections to the same host, overriding the config if given, by default None
+    """
+    kwargs = dict(
+        limit=config.limit if limit is None else limit,
+        limit_per_host=config.limit_per_host if limit_per_host is None else limit_per_host,
+        ttl_dns_cache=config.ttl_dns_cache,
+        use_dns_cache=True,
+    )
+    if config.keep_alive:
+        kwargs['keepalive_timeout'] = config.keepalive_timeout
+    else:
+        kwargs['force_close'] = True
+    return aiohttp.TCPConnector(**kwargs)
 
 
 class ControllerAPI:
     def __init__(self,
                  config: APIConfig,
-                 session: Optional[aiohttp.ClientSession] = None):
+                 session: Optional[aiohttp.ClientSession] = None,
+                 metrics: Optional[ClientMetrics] = None,
+                 hedging: Optional[HedgingPolicy] = None,
+                 codec: Optional[Codec] = None,
+                 cache: Optional[ResponseCache] = None,
+                 single_flight: bool = False):
         """Api client for the controller.
 
         Parameters
@@ -28,21 +91,186 @@ class ControllerAPI:
             Configuration for the API client.
 
         session : Optional[aiohttp.ClientSession], optional
-            An optional aiohttp session to use for requests. If not provided, a new session will be created.
+            An optional aiohttp session to use for requests. If not provided, a new session with a pooled
+            connector is created from the connection settings of the config. This session is closed by `close`
+            or when leaving an `async with ControllerAPI(...)` block.
+
+        metrics : Optional[ClientMetrics], optional
+            If given, request and stream metrics are recorded into it. A session passed in by the caller
+            must be created with `trace_configs=[metrics.trace_config()]` to record request metrics.
 
+        hedging : Optional[HedgingPolicy], optional
+            If given, slow idempotent GET requests are hedged with a second request, by default None
+
+        codec : Optional[Codec], optional
+            Codec decoding response bodies and encoding request bodies, see `get_codec`, by default Codec()
+
+        cache : Optional[ResponseCache], optional
+            If given, responses of slow changing endpoints are cached and invalidated by writes of this client, by default None
+
+        single_flight : bool, optional
+            If True, concurrent idempotent GET requests to the same url share one request. Callers sharing
+            a request receive the same model instances, which must then not be modified, by default False
         """
         self.config = config
         self._session = session
+        self._owns_session = session is None
         self.headers = {}
+        self.metrics = metrics
+        """Metrics the client records into, None if disabled."""
+        self.hedging = hedging
+        """Hedging policy of the idempotent GET requests, None if disabled."""
+        self.codec = codec if codec is not None else Codec()
+        """Codec of the request and response bodies."""
+        self.cache = cache
+        """Cache of the responses of slow changing endpoints, None if disabled."""
+        self.single_flight = SingleFlight() if single_flight else None
+        """Shares concurrent idempotent GET requests to the same url, None if disabled."""
+        self._writes = 0
+        self._camera_hub: Optional[StreamHub[Frame]] = None
+        self._input_poller: Optional[InputPoller] = None
+
+    async def __aenter__(self) -> "ControllerAPI":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """Creates the pooled connector for the session, based on the connection settings of the config."""
+        return create_connector(self.config)
 
     @property
     def session(self) -> aiohttp.ClientSession:
         """Returns the aiohttp session for making requests."""
-        if self._session is None:
-            connector = aiohttp.TCPConnector(force_close=True)
-            self._session = aiohttp.ClientSession(connector=connector)
+        if self._session is None or (self._owns_session and self._session.closed):
+            trace_configs = [self.metrics.trace_config()] if self.metrics is not None else None
+            self._session = aiohttp.ClientSession(connector=self.create_connector(), trace_configs=trace_configs)
+            self._owns_session = True
         return self._session
 
+    async def close(self):
+        """Closes the session and its connection pool.
+
+        Sessions passed in by the caller are left open, as they are owned by the caller.
+        """
+        if self._camera_hub is not None:
+            await self._camera_hub.close()
+        if self._input_poller is not None:
+            await self._input_poller.close()
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._owns_session:
+            self._session = None
+
+    def batch(self, controller_id: int, max_in_flight: Optional[int] = None) -> Batch:
+        """Creates a batch of output and counter operations for a controller, which are executed concurrently.
+
+        Parameters
+        ----------
+        controller_id : int
+            Id of the controller the operations apply to.
+
+        max_in_flight : Optional[int], optional
+            Maximum number of concurrent requests, by default the `limit_per_host` of the config
+        """
+        return Batch(self, controller_id, max_in_flight=max_in_flight)
+
+    def _stream_metrics(self, name: str) -> Optional[StreamMetrics]:
+        return self.metrics.stream(name) if self.metrics is not None else None
+
+    def request_timeout(self, timeout: Timeout = None) -> aiohttp.ClientTimeout:
+        """Returns the timeout of an idempotent GET request.
+
+        Parameters
+        ----------
+        timeout : Timeout, optional
+            Deadline of the call. A number replaces the request_timeout of the config, while the connect and
+            read timeouts of the config still apply. A ClientTimeout is used as is, by default None
+        """
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            return timeout
+        return aiohttp.ClientTimeout(total=timeout if timeout is not None else self.config.request_timeout,
+                                     sock_connect=self.config.connect_timeout,
+                                     sock_read=self.config.read_timeout)
+
+    def stream_timeout(self) -> aiohttp.ClientTimeout:
+        """Returns the timeout of streams, which have no overall deadline but may detect stalls."""
+        return aiohttp.ClientTimeout(total=None,
+                                     sock_connect=self.config.connect_timeout,
+                                     sock_read=self.config.stream_read_timeout)
+
+    async def _get(self, url: str, type_: Type[T], timeout: aiohttp.ClientTimeout) -> T:
+        async with self.session.get(url, headers=self.get_headers(), timeout=timeout) as response:
+            if response.status == 200:
+                return self.codec.decode(await response.read(), type_)
+            elif response.status == 400:
+                raise BadRequestError(f"Bad Request: {await response.text()}")
+            elif response.status == 404:
+                raise NotFoundError(f"Not Found: {await response.text()}")
+            elif response.status == 500:
+                raise InternalServerError(f"Internal Server Error: {await response.text()}")
+            else:
+                raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
+
+    async def _idempotent_get(self,
+                              name: str,
+                              url: str,
+                              type_: Type[T],
+                              timeout: Timeout = None,
+                              use_cache: bool = True) -> T:
+        """Returns the body of an idempotent GET request validated as type_.
+
+        The response is taken from the cache if it holds a valid one and use_cache is set, otherwise
+        concurrent callers with the same url and timeout share one request if single flight is enabled.
+        A response fetched with use_cache unset still refreshes the cache.
+        """
+        cache = self.cache if self.cache is not None and self.cache.caches(name) else None
+        generation = None
+        if cache is not None and not use_cache:
+            generation = cache.generation
+        elif cache is not None:
+            cached = cache.get(name, url)
+            if self.metrics is not None:
+                self.metrics.increment("cache_misses" if cached is None else "cache_hits")
+            if cached is not None:
+                # Cached lists are shared, callers get their own list of the same models.
+                return list(cached) if isinstance(cached, list) else cached
+            generation = cache.generation
+        if self.single_flight is None:
+            return await self._fetch_and_cache(name, url, type_, timeout, cache, generation)
+        # The models are shared with the other callers of the request, only the list is per caller.
+        # Requests sent before a write completed are not shared with requests sent after it.
+        key = (url, self.request_timeout(timeout), self._writes)
+        value = await self.single_flight.run(key, lambda: self._fetch_and_cache(name, url, type_, timeout, cache, generation),
+                                             self.metrics)
+        return list(value) if isinstance(value, list) else value
+
+    async def _fetch_and_cache(self,
+                               name: str,
+                               url: str,
+                               type_: Type[T],
+                               timeout: Timeout,
+                               cache: Optional[ResponseCache],
+                               generation: Optional[int]) -> T:
+        value = await self._fetch(name, url, type_, timeout)
+        if cache is not None:
+            cache.put(name, url, value, generation)
+        return value
+
+    async def _fetch(self, name: str, url: str, type_: Type[T], timeout: Timeout = None) -> T:
+        """Sends an idempotent GET request with a deadline, hedged if a hedging policy is set, and returns the body validated as type_."""
+        client_timeout = self.request_timeout(timeout)
+        try:
+            if self.hedging is None:
+                return await self._get(url, type_, client_timeout)
+            return await self.hedging.run(name, lambda: self._get(url, type_, client_timeout), self.metrics,
+                                          client_timeout.total)
+        except asyncio.TimeoutError as e:
+            if self.metrics is not None:
+                self.metrics.increment("request_timeouts")
+            raise RequestTimeoutError(f"Request Timeout: GET {url}") from e
+
     def get_headers(self) -> dict:
         """Returns the headers for the API requests."""
         headers = self.headers.copy()
@@ -50,7 +278,24 @@ class ControllerAPI:
             headers['X-API-KEY'] = self.config.api_key
         return headers
 
-    async def add_camera_image_recognition_config(self, image_recognition_config: ImageRecognitionConfig):
+    def _encode(self, value: Any, type_: Optional[Any] = None, headers: Optional[dict] = None) -> dict:
+        """Returns the keyword arguments of a request sending value as body."""
+        headers = self.get_headers() if headers is None else headers.copy()
+        headers['Content-Type'] = self.codec.content_type
+        return dict(headers=headers, data=self.codec.encode(value, type_))
+
+    @contextlib.asynccontextmanager
+    async def _writing(self, *urls: str):
+        """Invalidates the cached and in-flight responses below the urls once the write in the block completed or failed."""
+        try:
+            yield
+        finally:
+            self._writes += 1
+            if self.cache is not None:
+                for url in urls:
+                    self.cache.invalidate(url)
+
+    async def add_camera_image_recognition_config(self, image_recognition_config: "ImageRecognitionConfig"):
         """
         Defines the image recognition configuration of the controller camera.
         Todo: Untested
@@ -61,7 +306,7 @@ class ControllerAPI:
             The image recognition configuration to be set.
         """
         url = f"{self.config.base_url}/controller/camera/image-recognition"
-        async with self.session.post(url, headers=self.headers, json=image_recognition_config.model_dump(by_alias=True)) as response:
+        async with self.session.post(url, **self._encode(image_recognition_config, headers=self.headers)) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -80,11 +325,10 @@ class ControllerAPI:
         if x_api_key:
             params['X-API-KEY'] = x_api_key
         url = f"{self.config.base_url}/controller/camera/message-stream"
-        async with self.session.get(url, headers=headers, params=params) as response:
+        async with self.session.get(url, headers=headers, params=params, timeout=self.stream_timeout()) as response:
             if response.status == 200:
-                async for line in response.content.iter_any():
-                    if line:
-                        yield line.decode('utf-8').strip()
+                async for message in iter_messages(response, self._stream_metrics('camera_messages')):
+                    yield message.decode('utf-8')
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -97,7 +341,7 @@ class ControllerAPI:
     async def start_camera(self, camera_config: CameraConfig):
         """Starts the video stream of the camera."""
         url = f"{self.config.base_url}/controller/camera/start"
-        async with self.session.post(url, headers=self.get_headers(), json=camera_config.model_dump(by_alias=True)) as response:
+        async with self.session.post(url, **self._encode(camera_config)) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -109,50 +353,44 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def camera_image_stream(self) -> AsyncIterator[bytes]:
-        """Retrieves a stream of images from the controller camera."""
-        headers = self.headers.copy()
-        params = dict()
-        params['X-API-KEY'] = self.config.api_key if self.config.api_key else None
-        url = f"{self.config.base_url}/controller/camera/image-stream"
+    async def camera_image_stream(self, zero_copy: bool = False) -> AsyncIterator[Frame]:
+        """Retrieves a stream of images from the controller camera.
+
+        Parameters
+        ----------
+        zero_copy : bool, optional
+            If True, images are yielded as memoryviews into the receive buffer instead of bytes, by default False
+        """
         try:
-            async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    boundary = response.headers.get(
-                        'Content-Type', '').split('boundary=')[-1].strip('"')
-                    if not boundary:
-                        raise ValueError(
-                            "Boundary not found in Content-Type header")
-
-                    async for chunk, ok in response.content.iter_chunks():
-                        if ok:
-                            # Basic splitting, might need more robust handling for partial boundaries
-                            parts = chunk.split(b'--' + boundary.encode())
-                            for part in parts:
-                                if part.startswith(b'\r\nContent-Type: image/jpeg\r\n\r\n') and part.endswith(b'\r\n'):
-                                    image_data = part[len(
-                                        b'\r\nContent-Type: image/jpeg\r\n\r\n'):-len(b'\r\n')]
-                                    if image_data:
-                                        yield image_data
-                elif response.status == 400:
-                    raise BadRequestError(f"Bad Request: {await response.text()}")
-                elif response.status == 404:
-                    raise NotFoundError(f"Not Found: {await response.text()}")
-                elif response.status == 500:
-                    raise InternalServerError(f"Internal Server Error: {await response.text()}")
-                else:
-                    raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
+            async for image_data in self._camera_image_stream(zero_copy):
+                yield image_data
         except aiohttp.ClientError as e:
             print(f"Error during camera stream: {e}")
         except ValueError as e:
             print(f"Error processing camera stream: {e}")
 
-    async def stop_camera(self):
-        """Stops the video stream of the camera."""
-        url = f"{self.config.base_url}/controller/camera/stop"
-        async with self.session.delete(url, headers=self.get_headers()) as response:
+    async def _camera_image_stream(self, zero_copy: bool = False) -> AsyncIterator[Frame]:
+        headers = self.headers.copy()
+        params = dict()
+        if self.config.api_key:
+            params['X-API-KEY'] = self.config.api_key
+        url = f"{self.config.base_url}/controller/camera/image-stream"
+        async with self.session.get(url, headers=headers, params=params, timeout=self.stream_timeout()) as response:
             if response.status == 200:
-                return  # OK
+                boundary = MultipartStreamParser.boundary_from_content_type(
+                    response.headers.get('Content-Type', ''))
+                if not boundary:
+                    raise ValueError(
+                        "Boundary not found in Content-Type header")
+                parser = MultipartStreamParser(boundary, zero_copy=zero_copy)
+                stream_metrics = self._stream_metrics("camera_images")
+                async for chunk in response.content.iter_any():
+                    for image_data in parser.feed(chunk):
+                        if stream_metrics is not None:
+                            stream_metrics.record(len(image_data))
+                        yield image_data
+                    if parser.closed:
+                        break
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -162,13 +400,151 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def get_controllers(self) -> List[ControllerModel]:
-        """Returns information about controller and controllers connected to it."""
-        url = f"{self.config.base_url}/controller/discovery"
-        async with self.session.get(url, headers=self.get_headers()) as response:
+    def resilient_camera_image_stream(self,
+                                      camera_config: Optional[CameraConfig] = None,
+                                      zero_copy: bool = False,
+                                      backoff: Optional[BackoffPolicy] = None) -> ResilientStream[Frame]:
+        """Retrieves a stream of images from the controller camera, which reconnects when the connection drops.
+
+        A reconnect only reopens the image stream, the running camera is reused. If the controller reports
+        the camera as not running and a camera config is given, the camera is started again.
+
+        Parameters
+        ----------
+        camera_config : Optional[CameraConfig], optional
+            Configuration the camera is restarted with, None to not restart it, by default None
+
+        zero_copy : bool, optional
+            If True, images are memoryviews into the receive buffer instead of bytes, by default False
+
+        backoff : Optional[BackoffPolicy], optional
+            Delays between reconnect attempts, by default BackoffPolicy()
+
+        Returns
+        -------
+        ResilientStream[Frame]
+            The stream, to be iterated with `async for`. Interruptions are recorded in its `gaps`.
+        """
+        retry_on = DEFAULT_RETRY_ON
+        recover = None
+        if camera_config is not None:
+            retry_on = retry_on + (BadRequestError, NotFoundError)
+
+            async def recover(error: Optional[BaseException]):
+                if isinstance(error, (BadRequestError, NotFoundError)):
+                    await self.start_camera(camera_config)
+
+        return ResilientStream(lambda: self._camera_image_stream(zero_copy),
+                               backoff=backoff, retry_on=retry_on, recover=recover, metrics=self.metrics)
+
+    def resilient_stream(self,
+                         connect: Callable[[], AsyncIterator[T]],
+                         backoff: Optional[BackoffPolicy] = None) -> ResilientStream[T]:
+        """Wraps a stream of the api, so it reconnects when the connection drops::
+
+            async for message in api.resilient_stream(lambda: api.get_controller_message_stream(key)):
+                ...
+
+        Parameters
+        ----------
+        connect : Callable[[], AsyncIterator[T]]
+            Opens the stream, e.g. a lambda calling one of the message stream methods.
+
+        backoff : Optional[BackoffPolicy], optional
+            Delays between reconnect attempts, by default BackoffPolicy()
+        """
+        return ResilientStream(connect, backoff=backoff, metrics=self.metrics)
+
+    def buffered_camera_image_stream(self,
+                                     policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                                     maxsize: int = 1,
+                                     zero_copy: bool = False) -> BufferedStream[Frame]:
+        """Retrieves a stream of images from the controller camera, which is read in a background task.
+
+        The socket is drained at line rate regardless of the consumer speed, frames the consumer
+        could not keep up with are dropped according to the policy and counted in `dropped`.
+
+        Parameters
+        ----------
+        policy : DeliveryPolicy, optional
+            Policy applied when the consumer falls behind, by default DeliveryPolicy.LATEST
+
+        maxsize : int, optional
+            Number of pending frames for the bounded policies, by default 1
+
+        zero_copy : bool, optional
+            If True, images are memoryviews into the receive buffer instead of bytes, by default False
+
+        Returns
+        -------
+        BufferedStream[Frame]
+            The stream, to be used with `async with` and iterated with `async for`.
+        """
+        return BufferedStream(self.camera_image_stream(zero_copy=zero_copy), policy=policy, maxsize=maxsize)
+
+    def camera_hub(self) -> StreamHub[Frame]:
+        """Returns the hub sharing a single camera image stream between all its subscribers.
+
+        The controller only serves one image stream, consumers like a display, a recorder and a detector
+        should subscribe here instead of each opening their own. Frames are memoryviews shared by all
+        subscribers and must not be modified::
+
+            async with api.camera_hub().subscribe(DeliveryPolicy.LATEST) as frames:
+                async for frame in frames:
+                    ...
+
+        Returns
+        -------
+        StreamHub[Frame]
+            The hub of this client, the same instance on every call.
+        """
+        if self._camera_hub is None:
+            self._camera_hub = StreamHub(lambda: self.camera_image_stream(zero_copy=True))
+        return self._camera_hub
+
+    async def decoded_camera_image_stream(self,
+                                          mode: ColorMode = ColorMode.RGB,
+                                          workers: int = 2,
+                                          policy: Optional[DeliveryPolicy] = None,
+                                          maxsize: int = 1) -> AsyncIterator[DecodedFrame]:
+        """Retrieves a stream of decoded images from the controller camera.
+
+        The JPEG frames are decoded to numpy arrays on a thread pool, so the event loop is not blocked.
+        Requires numpy and either opencv-python or Pillow to be installed.
+
+        Parameters
+        ----------
+        mode : ColorMode, optional
+            Pixel layout of the decoded frames, by default ColorMode.RGB
+
+        workers : int, optional
+            Number of decode threads, by default 2
+
+        policy : Optional[DeliveryPolicy], optional
+            If given, the encoded frames are buffered with this policy before decoding,
+            so frames the consumer can not keep up with are dropped without being decoded, by default None
+
+        maxsize : int, optional
+            Number of pending frames for the bounded policies, by default 1
+        """
+        decoder = FrameDecoder(mode=mode, workers=workers, metrics=self.metrics)
+        source = self.camera_image_stream(zero_copy=True)
+        if policy is not None:
+            source = BufferedStream(source, policy=policy, maxsize=maxsize)
+        try:
+            async for frame in decoder.decode(source):
+                yield frame
+        finally:
+            if isinstance(source, BufferedStream):
+                await source.stop()
+            decoder.close()
+
+    async def stop_camera(self):
+        """Stops the video stream of the camera."""
+        url = f"{self.config.base_url}/controller/camera/stop"
+        async with self.session.delete(url, headers=self.get_headers()) as response:
             if response.status == 200:
-                data = await response.json()
-                return [ControllerModel(**item) for item in data]
+                return  # OK
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -178,6 +554,11 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
+    async def get_controllers(self, timeout: Timeout = None) -> List[ControllerModel]:
+        """Returns information about controller and controllers connected to it."""
+        url = f"{self.config.base_url}/controller/discovery"
+        return await self._idempotent_get('discovery', url, List[ControllerModel], timeout)
+
     async def get_controller_message_stream(self, x_api_key: Optional[str] = None) -> AsyncIterator[str]:
         """Retrieves all console outputs for a running program."""
         headers = self.get_headers().copy()
@@ -185,11 +566,10 @@ class ControllerAPI:
         if x_api_key:
             params['X-API-KEY'] = x_api_key
         url = f"{self.config.base_url}/controller/message-stream"
-        async with self.session.get(url, headers=headers, params=params) as response:
+        async with self.session.get(url, headers=headers, params=params, timeout=self.stream_timeout()) as response:
             if response.status == 200:
-                async for line in response.content.iter_any():
-                    if line:
-                        yield line.decode('utf-8').strip()
+                async for message in iter_messages(response, self._stream_metrics('controller_messages')):
+                    yield message.decode('utf-8')
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -199,26 +579,16 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def get_controller_by_id(self, controller_id: int) -> ControllerModel:
+    async def get_controller_by_id(self, controller_id: int, timeout: Timeout = None) -> ControllerModel:
         """Returns a controller with the specified ID."""
         url = f"{self.config.base_url}/controller/{controller_id}"
-        async with self.session.get(url, headers=self.get_headers()) as response:
-            if response.status == 200:
-                data = await response.json()
-                return ControllerModel(**data)
-            elif response.status == 400:
-                raise BadRequestError(f"Bad Request: {await response.text()}")
-            elif response.status == 404:
-                raise NotFoundError(f"Not Found: {await response.text()}")
-            elif response.status == 500:
-                raise InternalServerError(f"Internal Server Error: {await response.text()}")
-            else:
-                raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
+        return await self._idempotent_get('controller', url, ControllerModel, timeout)
 
     async def init_controller_by_id(self, controller_id: int):
         """Initializes a controller with the specified ID."""
         url = f"{self.config.base_url}/controller/{controller_id}"
-        async with self.session.post(url, headers=self.get_headers()) as response:
+        discovery = f"{self.config.base_url}/controller/discovery"
+        async with self._writing(url, discovery), self.session.post(url, headers=self.get_headers()) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -230,27 +600,21 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def get_controller_counters(self, controller_id: int) -> List[CounterModel]:
-        """Returns a list of all initialized counters."""
+    async def get_controller_counters(self,
+                                      controller_id: int,
+                                      timeout: Timeout = None,
+                                      use_cache: bool = True) -> List[CounterModel]:
+        """Returns a list of all initialized counters.
+
+        Set use_cache to False to always ask the controller, e.g. when polling.
+        """
         url = f"{self.config.base_url}/controller/{controller_id}/counters"
-        async with self.session.get(url, headers=self.get_headers()) as response:
-            if response.status == 200:
-                data = await response.json()
-                return [CounterModel(**item) for item in data]
-            elif response.status == 400:
-                raise BadRequestError(f"Bad Request: {await response.text()}")
-            elif response.status == 404:
-                raise NotFoundError(f"Not Found: {await response.text()}")
-            elif response.status == 500:
-                raise InternalServerError(f"Internal Server Error: {await response.text()}")
-            else:
-                raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
+        return await self._idempotent_get('counters', url, List[CounterModel], timeout, use_cache)
 
     async def add_controller_counters(self, controller_id: int, counters: List[CounterModel]):
         """Initializes a list of counters."""
         url = f"{self.config.base_url}/controller/{controller_id}/counters"
-        payload = [counter.model_dump(by_alias=True) for counter in counters]
-        async with self.session.post(url, headers=self.get_headers(), json=payload) as response:
+        async with self._writing(url), self.session.post(url, **self._encode(counters, List[CounterModel])) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -267,11 +631,10 @@ class ControllerAPI:
         if x_api_key:
             params['X-API-KEY'] = x_api_key
         url = f"{self.config.base_url}/controller/{controller_id}/counters/message-stream"
-        async with self.session.get(url, headers=headers, params=params) as response:
+        async with self.session.get(url, headers=headers, params=params, timeout=self.stream_timeout()) as response:
             if response.status == 200:
-                async for line in response.content.iter_any():
-                    if line:
-                        yield line.decode('utf-8').strip()
+                async for message in iter_messages(response, self._stream_metrics('counter_messages')):
+                    yield message.decode('utf-8')
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -281,13 +644,31 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def get_controller_counter_by_id(self, controller_id: int, counter_id: int) -> CounterModel:
-        """Returns a counter with the specified ID."""
-        url = f"{self.config.base_url}/controller/{controller_id}/counters/{counter_id}"
-        async with self.session.get(url, headers=self.get_headers()) as response:
+    async def get_controller_counters_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> AsyncIterator[List[CounterModel]]:
+        """Retrieves current state of controller counters (updating every 100 ms), parsed to counter models.
+
+        A message holding a single counter is yielded as list of one counter, use
+        `get_controller_counter_updates_stream` to tell it apart from a list of all counters.
+        """
+        async with contextlib.aclosing(self.get_controller_counter_updates_stream(controller_id, x_api_key)) as updates:
+            async for counters in updates:
+                yield counters if isinstance(counters, list) else [counters]
+
+    async def get_controller_counter_updates_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> AsyncIterator[CounterUpdate]:
+        """Retrieves current state of controller counters (updating every 100 ms), as sent by the controller.
+
+        Yields a list of all counters, indexed by their id, or a single counter which changed.
+        Each message is validated from the raw JSON bytes in a single pass, without an intermediate decode.
+        """
+        headers = self.headers.copy()
+        params = {}
+        if x_api_key:
+            params['X-API-KEY'] = x_api_key
+        url = f"{self.config.base_url}/controller/{controller_id}/counters/message-stream"
+        async with self.session.get(url, headers=headers, params=params, timeout=self.stream_timeout()) as response:
             if response.status == 200:
-                data = await response.json()
-                return CounterModel(**data)
+                async for message in iter_messages(response, self._stream_metrics('counter_messages')):
+                    yield _COUNTER_UPDATE_ADAPTER.validate_json(message)
             elif response.status == 400:
                 raise BadRequestError(f"Bad Request: {await response.text()}")
             elif response.status == 404:
@@ -297,10 +678,16 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
+    async def get_controller_counter_by_id(self, controller_id: int, counter_id: int, timeout: Timeout = None) -> CounterModel:
+        """Returns a counter with the specified ID."""
+        url = f"{self.config.base_url}/controller/{controller_id}/counters/{counter_id}"
+        return await self._idempotent_get('counter', url, CounterModel, timeout)
+
     async def update_controller_counter_by_id(self, controller_id: int, counter_id: int):
         """Resets a counter with the specified ID."""
         url = f"{self.config.base_url}/controller/{controller_id}/counters/{counter_id}"
-        async with self.session.patch(url, headers=self.get_headers()) as response:
+        counters = f"{self.config.base_url}/controller/{controller_id}/counters"
+        async with self._writing(counters), self.session.patch(url, headers=self.get_headers()) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -312,27 +699,58 @@ class ControllerAPI:
             else:
                 raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
 
-    async def get_controller_inputs(self, controller_id: int) -> List[InputModel]:
-        """Returns a list of all initialized inputs."""
+    async def get_controller_inputs(self,
+                                    controller_id: int,
+                                    timeout: Timeout = None,
+                                    use_cache: bool = True) -> List[InputModel]:
+        """Returns a list of all initialized inputs.
+
+        Set use_cache to False to always ask the controller, e.g. when polling.
+        """
         url = f"{self.config.base_url}/controller/{controller_id}/inputs"
-        async with self.session.get(url, headers=self.get_headers()) as response:
-            if response.status == 200:
-                data = await response.json()
-                return [InputModel(**item) for item in data]
-            elif response.status == 400:
-                raise BadRequestError(f"Bad Request: {await response.text()}")
-            elif response.status == 404:
-                raise NotFoundError(f"Not Found: {await response.text()}")
-            elif response.status == 500:
-                raise InternalServerError(f"Internal Server Error: {await response.text()}")
-            else:
-                raise UnexpectedError(f"Unexpected Error: {response.status}", response.status, await response.text())
+        return await self._idempotent_get('inputs', url, List[InputModel], timeout, use_cache)
+
+    def input_poller(self) -> InputPoller:
+        """Returns the poller sharing the polling of the inputs between all its subscribers.
+
+        Consumers of input values should subscribe here instead of each polling `get_controller_inputs`,
+        the poller sends one request per controller at the highest subscribed rate::
+
+            async with api.input_poller().subscribe(0, 2, rate=20.0) as samples:
+                async for sample in samples:
+                    ...
+
+        Returns
+        -------
+        InputPoller
+            The poller of this client, the same instance on every call.
+        """
+        if self._input_poller is None:
+            self._input_poller = InputPoller(self)
+        return self._input_poller
+
+    def input_changes(self,
+                      controller_id: int,
+                      input_id: int,
+                      rate: float = 10.0,
+                      deadbands: Optional[Dict[InputDevice, float]] = None,
+                      hysteresis: Optional[Tuple[float, float]] = None,
+                      min_interval: float = 0.0) -> AsyncIterator[ChangeEvent[InputModel]]:
+        """Yields only the changes of an input beyond the deadband of its device, see `changes.input_changes`."""
+        return input_changes(self, controller_id, input_id, rate, deadbands, hysteresis, min_interval)
+
+    def counter_changes(self,
+                        controller_id: int,
+                        counter_ids: Optional[Iterable[int]] = None,
+                        deadband: float = 0.0,
+                        min_interval: float = 0.0) -> AsyncIterator[ChangeEvent[CounterModel]]:
+        """Yields only the count changes of counters, see `changes.counter_changes`."""
+        return counter_changes(self, controller_id, counter_ids, deadband, min_interval)
 
     async def add_controller_inputs(self, controller_id: int, inputs: List[InputModel]):
         """Initializes a list of inputs."""
         url = f"{self.config.base_url}/controller/{controller_id}/inputs"
-        payload = [input.model_dump(by_alias=True) for input in inputs]
-        async with self.session.post(url, headers=self.get_headers(), json=payload) as response:
+        async with self._writing(url), self.session.post(url, **self._encode(inputs, List[InputModel])) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -345,7 +763,7 @@ class ControllerAPI:
     async def update_controller_motor_by_id(self, controller_id: int, motor_id: int, motor: Motor):
         """Sets the configuration of a motor with the specified ID."""
         url = f"{self.config.base_url}/controller/{controller_id}/motors/{motor_id}"
-        async with self.session.post(url, headers=self.get_headers(), json=motor.model_dump(by_alias=True)) as response:
+        async with self.session.post(url, **self._encode(motor)) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
@@ -361,7 +779,7 @@ class ControllerAPI:
     async def update_controller_servomotor_by_id(self, controller_id: int, servomotor_id: int, servomotor: Servomotor):
         """Sets the configuration of a servomotor with the specified ID."""
         url = f"{self.config.base_url}/controller/{controller_id}/servomotors/{servomotor_id}"
-        async with self.session.post(url, headers=self.get_headers(), json=servomotor.model_dump(by_alias=True)) as response:
+        async with self.session.post(url, **self._encode(servomotor)) as response:
             if response.status == 200:
                 return  # OK
             elif response.status == 400:
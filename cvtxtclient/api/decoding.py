@@ -0,0 +1,239 @@
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Callable, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from cvtxtclient.api.metrics import ClientMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class ColorMode(str, Enum):
+    """Pixel layout of decoded frames."""
+    RGB = "RGB"
+    """Three channels, shape (height, width, 3)."""
+    GRAY = "GRAY"
+    """One channel, shape (height, width)."""
+
+
+@dataclass
+class DecodedFrame:
+    """A decoded camera frame with its metadata."""
+
+    image: "np.ndarray"
+    """The decoded pixels as uint8 array."""
+
+    index: int
+    """Position of the frame within the stream, starting at 0."""
+
+    timestamp: float
+    """Time the encoded frame was received, as returned by time.time()."""
+
+    encoded_size: int
+    """Size of the encoded JPEG in bytes."""
+
+    decode_time: float
+    """Seconds spent decoding the frame."""
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
+
+
+def _decode_opencv(data: Union[bytes, memoryview], mode: ColorMode) -> "np.ndarray":
+    import cv2
+    import numpy as np
+    flag = cv2.IMREAD_GRAYSCALE if mode == ColorMode.GRAY else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if image is None:
+        raise ValueError("Could not decode JPEG frame")
+    if mode == ColorMode.RGB:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return image
+
+
+def _decode_pillow(data: Union[bytes, memoryview], mode: ColorMode) -> "np.ndarray":
+    import numpy as np
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        if mode == ColorMode.GRAY:
+            # Let the JPEG decoder produce luminance directly, skipping the color conversion.
+            image.draft("L", image.size)
+        return np.asarray(image.convert("L" if mode == ColorMode.GRAY else "RGB"))
+
+
+def get_jpeg_decoder(backend: Optional[str] = None) -> Callable[[Union[bytes, memoryview], ColorMode], "np.ndarray"]:
+    """Returns a function decoding JPEG data to a numpy array.
+
+    Parameters
+    ----------
+    backend : Optional[str], optional
+        Either "opencv" or "pillow". If None, OpenCV is used if installed, otherwise Pillow, by default None
+
+    Raises
+    ------
+    ImportError
+        If numpy or the requested backend is not installed.
+    """
+    import numpy  # noqa: F401
+    if backend is None:
+        try:
+            import cv2  # noqa: F401
+            backend = "opencv"
+        except ImportError:
+            backend = "pillow"
+    if backend == "opencv":
+        import cv2  # noqa: F401
+        return _decode_opencv
+    elif backend == "pillow":
+        try:
+            import PIL  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Decoding frames requires either opencv-python or Pillow to be installed.") from e
+        return _decode_pillow
+    raise ValueError(f"Unknown decoder backend: {backend}")
+
+
+class FrameDecoder:
+    """Decodes a stream of JPEG frames on a thread pool, keeping the frame order.
+
+    Up to `max_pending` frames are decoded concurrently, the decoders release the GIL
+    so multiple cores are used. Frames are yielded in the order they were received.
+    Frames which can not be decoded, e.g. truncated JPEGs, are skipped and counted in `errors`.
+    """
+
+    def __init__(self,
+                 mode: ColorMode = ColorMode.RGB,
+                 workers: int = 2,
+                 max_pending: Optional[int] = None,
+                 executor: Optional[Executor] = None,
+                 backend: Optional[str] = None,
+                 metrics: Optional["ClientMetrics"] = None):
+        """Creates a new frame decoder.
+
+        Parameters
+        ----------
+        mode : ColorMode, optional
+            Pixel layout of the decoded frames, by default ColorMode.RGB
+
+        workers : int, optional
+            Number of decode threads, if no executor is given, by default 2
+
+        max_pending : Optional[int], optional
+            Maximum number of frames in flight, by default twice the number of workers
+
+        executor : Optional[Executor], optional
+            Executor to decode on. It is not shut down by the decoder, by default a dedicated thread pool
+
+        backend : Optional[str], optional
+            Decoder backend, see `get_jpeg_decoder`, by default None
+
+        metrics : Optional[ClientMetrics], optional
+            If given, skipped frames are counted as `decode_errors`, by default None
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.mode = ColorMode(mode)
+        """Pixel layout of the decoded frames."""
+        self.workers = workers
+        """Number of decode threads."""
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+        """Maximum number of frames in flight."""
+        self.metrics = metrics
+        """Metrics the skipped frames are counted in."""
+        self.errors = 0
+        """Number of frames skipped as they could not be decoded."""
+        self.last_error: Optional[Exception] = None
+        """The most recent error while decoding a frame."""
+        self._decode = get_jpeg_decoder(backend)
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cvtxt-decode")
+        return self._executor
+
+    def close(self):
+        """Shuts down the thread pool, if it was created by the decoder."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _decode_frame(self, data: Union[bytes, memoryview], index: int, timestamp: float) -> DecodedFrame:
+        start = time.perf_counter()
+        image = self._decode(data, self.mode)
+        return DecodedFrame(image=image,
+                            index=index,
+                            timestamp=timestamp,
+                            encoded_size=len(data),
+                            decode_time=time.perf_counter() - start)
+
+    async def decode(self, source: AsyncIterable[Union[bytes, memoryview]]) -> AsyncIterator[DecodedFrame]:
+        """Decodes the frames of the source, yielding them in order.
+
+        Combine with a BufferedStream as source to drop frames before they are decoded,
+        if the consumer can not keep up.
+        """
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_pending)
+
+        async def submit():
+            try:
+                index = 0
+                async for data in source:
+                    timestamp = time.time()
+                    await slots.acquire()
+                    pending.put_nowait(loop.run_in_executor(
+                        self.executor, self._decode_frame, data, index, timestamp))
+                    index += 1
+            finally:
+                pending.put_nowait(None)
+
+        reader = loop.create_task(submit())
+        try:
+            while True:
+                future = await pending.get()
+                if future is None:
+                    break
+                try:
+                    frame = await future
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # A single corrupt frame does not end the stream, only errors of the source do.
+                    self.errors += 1
+                    self.last_error = e
+                    if self.metrics is not None:
+                        self.metrics.increment("decode_errors")
+                    logger.warning(f"Skipping frame which could not be decoded: {e}")
+                    continue
+                finally:
+                    slots.release()
+                yield frame
+            # Raises errors of the source.
+            await reader
+        finally:
+            if not reader.done():
+                reader.cancel()
+                try:
+                    await reader
+                except asyncio.CancelledError:
+                    pass
+            while not pending.empty():
+                future = pending.get_nowait()
+                if future is not None:
+                    future.cancel()
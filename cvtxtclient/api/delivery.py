@@ -0,0 +1,188 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import AsyncIterable, AsyncIterator, Deque, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class DeliveryPolicy(str, Enum):
+    """How items are handed to a consumer which is slower than the producer."""
+    LATEST = "LATEST"
+    """Only the newest item is kept, older pending items are dropped."""
+    DROP_OLDEST = "DROP_OLDEST"
+    """A bounded ring buffer, the oldest pending item is dropped when it is full."""
+    BLOCK = "BLOCK"
+    """A bounded queue, the producer waits until the consumer made room."""
+
+
+class DeliveryQueue(Generic[T]):
+    """Queue between a producer and a single consumer which applies a delivery policy."""
+
+    def __init__(self, policy: DeliveryPolicy = DeliveryPolicy.LATEST, maxsize: int = 1):
+        """Creates a new delivery queue.
+
+        Parameters
+        ----------
+        policy : DeliveryPolicy, optional
+            Policy applied when the queue is full, by default DeliveryPolicy.LATEST
+
+        maxsize : int, optional
+            Number of pending items the queue can hold. Always 1 for DeliveryPolicy.LATEST, by default 1
+        """
+        policy = DeliveryPolicy(policy)
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.policy = policy
+        """Policy applied when the queue is full."""
+        self.maxsize = 1 if policy == DeliveryPolicy.LATEST else maxsize
+        """Number of pending items the queue can hold."""
+        self.dropped = 0
+        """Number of items dropped because the consumer fell behind."""
+        self.delivered = 0
+        """Number of items handed to the consumer."""
+        self._items: Deque[T] = deque()
+        self._changed = asyncio.Condition()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        """Whether no more items will be put into the queue."""
+        return self._closed
+
+    async def put(self, item: T):
+        """Puts an item into the queue, applying the delivery policy if it is full."""
+        async with self._changed:
+            if self.policy == DeliveryPolicy.BLOCK:
+                await self._changed.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+            if self._closed:
+                return
+            while len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._changed.notify_all()
+
+    async def get(self) -> T:
+        """Returns the next item, waiting if necessary.
+
+        Raises
+        ------
+        StopAsyncIteration
+            If the queue was closed and all pending items were consumed.
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._items or self._closed)
+            if self._items:
+                item = self._items.popleft()
+                self.delivered += 1
+                self._changed.notify_all()
+                return item
+            if self._error is not None:
+                raise self._error
+            raise StopAsyncIteration
+
+    async def close(self, error: Optional[BaseException] = None):
+        """Closes the queue. Pending items can still be consumed, afterwards the error is raised to the consumer, if given."""
+        async with self._changed:
+            self._closed = True
+            self._error = error
+            self._changed.notify_all()
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        return await self.get()
+
+
+class BufferedStream(Generic[T]):
+    """Drains an async iterable in a background task and delivers its items through a DeliveryQueue.
+
+    The source is read as fast as it produces, independent of the consumer speed,
+    so a slow consumer only ever sees the items the delivery policy keeps.
+    Use as an async context manager to make sure the background task is stopped::
+
+        async with api.buffered_camera_image_stream(DeliveryPolicy.LATEST) as frames:
+            async for frame in frames:
+                ...
+    """
+
+    def __init__(self,
+                 source: AsyncIterable[T],
+                 policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                 maxsize: int = 1):
+        """Creates a new buffered stream. The source is not read before the stream is started.
+
+        Parameters
+        ----------
+        source : AsyncIterable[T]
+            The async iterable to drain.
+
+        policy : DeliveryPolicy, optional
+            Policy applied when the consumer falls behind, by default DeliveryPolicy.LATEST
+
+        maxsize : int, optional
+            Number of pending items for the bounded policies, by default 1
+        """
+        self.source = source
+        """The async iterable which is drained."""
+        self.queue: DeliveryQueue[T] = DeliveryQueue(policy, maxsize)
+        """Queue the items are delivered through."""
+        self.received = 0
+        """Number of items read from the source."""
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def dropped(self) -> int:
+        """Number of items dropped because the consumer fell behind."""
+        return self.queue.dropped
+
+    def start(self):
+        """Starts draining the source in a background task, if not already running."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def stop(self):
+        """Stops the background task and closes the source."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.queue.close()
+
+    async def _drain(self):
+        error = None
+        try:
+            async for item in self.source:
+                self.received += 1
+                await self.queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            aclose = getattr(self.source, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+            await self.queue.close(error)
+
+    async def __aenter__(self) -> "BufferedStream[T]":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        self.start()
+        return self
+
+    async def __anext__(self) -> T:
+        return await self.queue.get()
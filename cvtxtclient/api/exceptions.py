@@ -18,5 +18,8 @@ class PreconditionFailedError(APIError):
 class InternalServerError(APIError):
     """500 Internal Server Error."""
 
+class RequestTimeoutError(APIError):
+    """The request did not complete within its deadline."""
+
 class UnexpectedError(APIError):
     """Unexpected API Error."""
\ No newline at end of file
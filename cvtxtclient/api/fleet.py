@@ -0,0 +1,267 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar
+
+import aiohttp
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI, create_connector
+from cvtxtclient.api.metrics import ClientMetrics
+from cvtxtclient.models import Controller as ControllerModel, Counter as CounterModel, Input as InputModel
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+T = TypeVar('T')
+
+
+@dataclass
+class ControllerResult(Generic[T]):
+    """Outcome of an operation on a single controller of the fleet."""
+
+    api: ControllerAPI
+    """Client of the controller."""
+
+    value: Optional[T] = None
+    """The value returned by the operation, None if it failed."""
+
+    error: Optional[Exception] = None
+    """The error raised by the operation, None if it succeeded."""
+
+    latency: float = 0.0
+    """Seconds the operation took."""
+
+    @property
+    def base_url(self) -> str:
+        return self.api.config.base_url
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FleetResult(Generic[T]):
+    """Outcome of an operation on all controllers of the fleet, in the order of their configs."""
+
+    results: List[ControllerResult[T]] = field(default_factory=list)
+    """Results per controller."""
+
+    duration: float = 0.0
+    """Seconds the whole operation took."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation succeeded on all controllers."""
+        return all(result.ok for result in self.results)
+
+    @property
+    def errors(self) -> List[ControllerResult[T]]:
+        """Results of the controllers the operation failed on."""
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def values(self) -> Dict[str, T]:
+        """Values of the controllers the operation succeeded on, by base url."""
+        return {result.base_url: result.value for result in self.results if result.ok}
+
+    def raise_for_errors(self):
+        """Raises the error of the first failed controller, if any."""
+        for result in self.results:
+            if result.error is not None:
+                raise result.error
+
+
+class Fleet:
+    """Runs operations on many controllers concurrently, each reachable under its own base url.
+
+    All clients share one connection pool and at most `max_in_flight` controllers are worked on
+    at once. Every operation returns a FleetResult holding the outcome per controller, failures
+    of single controllers do not affect the others::
+
+        async with Fleet([APIConfig(f"http://10.0.0.{i}/api/v1", key) for i in range(1, 41)]) as fleet:
+            result = await fleet.startup(counters=counters, inputs=inputs)
+            for failed in result.errors:
+                print(failed.base_url, failed.error)
+            await fleet.set_motor(0, 1, Motor(values=[0]))
+    """
+
+    def __init__(self,
+                 configs: Iterable[APIConfig],
+                 max_in_flight: int = 16,
+                 limit_per_host: int = 4,
+                 metrics: Optional[ClientMetrics] = None):
+        """Creates a new fleet.
+
+        Parameters
+        ----------
+        configs : Iterable[APIConfig]
+            Configurations of the controllers.
+
+        max_in_flight : int, optional
+            Maximum number of controllers worked on concurrently, by default 16
+
+        limit_per_host : int, optional
+            Maximum number of simultaneous connections to a single controller, by default 4
+
+        metrics : Optional[ClientMetrics], optional
+            If given, request metrics of all controllers are recorded into it, by default None
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        """Maximum number of controllers worked on concurrently."""
+        self.limit_per_host = limit_per_host
+        """Maximum number of simultaneous connections to a single controller."""
+        self.metrics = metrics
+        """Metrics all clients record into, None if disabled."""
+        self.configs: List[APIConfig] = list(configs)
+        """Configurations of the controllers."""
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._apis: Optional[List[ControllerAPI]] = None
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+    @property
+    def apis(self) -> List[ControllerAPI]:
+        """Clients of the controllers in the order of their configs, all using the shared session."""
+        if self._apis is None or self._session is None or self._session.closed:
+            session = self.session
+            self._apis = [ControllerAPI(config, session=session, metrics=self.metrics) for config in self.configs]
+        return self._apis
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Returns the session shared by all clients.
+
+        The keep-alive and DNS cache settings are taken from the first config, the pool is sized for the fleet.
+        """
+        if self._session is None or self._session.closed:
+            config = self.configs[0] if self.configs else APIConfig("")
+            connector = create_connector(config, limit=self.max_in_flight * self.limit_per_host,
+                                         limit_per_host=self.limit_per_host)
+            trace_configs = [self.metrics.trace_config()] if self.metrics is not None else None
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+        return self._session
+
+    async def close(self):
+        """Closes the clients and the shared session."""
+        for api in self._apis or ():
+            await api.close()
+        self._apis = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "Fleet":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def run(self,
+                  operation: Callable[[ControllerAPI], Awaitable[T]],
+                  apis: Optional[Sequence[ControllerAPI]] = None) -> FleetResult[T]:
+        """Runs an operation on all controllers concurrently.
+
+        Parameters
+        ----------
+        operation : Callable[[ControllerAPI], Awaitable[T]]
+            The operation, called with the client of each controller.
+
+        apis : Optional[Sequence[ControllerAPI]], optional
+            The clients to run the operation on, by default all clients of the fleet
+
+        Returns
+        -------
+        FleetResult[T]
+            The results in the order of the clients.
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+
+        async def run_one(api: ControllerAPI) -> ControllerResult[T]:
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    value = await operation(api)
+                except Exception as e:
+                    return ControllerResult(api, error=e, latency=time.perf_counter() - start)
+                return ControllerResult(api, value=value, latency=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_one(api) for api in (self.apis if apis is None else apis)))
+        return FleetResult(results=list(results), duration=time.perf_counter() - start)
+
+    async def discover(self) -> FleetResult[List[ControllerModel]]:
+        """Returns the controllers connected to each controller of the fleet."""
+        return await self.run(lambda api: api.get_controllers())
+
+    async def init(self, controller_ids: Iterable[int] = (0,)) -> FleetResult[None]:
+        """Initializes the given controllers of every controller of the fleet."""
+        controller_ids = list(controller_ids)
+
+        async def init_one(api: ControllerAPI):
+            for controller_id in controller_ids:
+                await api.init_controller_by_id(controller_id)
+
+        return await self.run(init_one)
+
+    async def configure(self,
+                        counters: Optional[List[CounterModel]] = None,
+                        inputs: Optional[List[InputModel]] = None,
+                        controller_id: int = 0) -> FleetResult[None]:
+        """Sets the same counter and input configuration on every controller of the fleet."""
+        return await self.run(lambda api: _configure(api, counters, inputs, controller_id))
+
+    async def startup(self,
+                      counters: Optional[List[CounterModel]] = None,
+                      inputs: Optional[List[InputModel]] = None,
+                      controller_id: int = 0) -> FleetResult[List[ControllerModel]]:
+        """Discovers, initializes and configures every controller of the fleet.
+
+        The steps run one after the other per controller, but without waiting for the other controllers,
+        so a slow controller does not hold back the rest. A controller failing a step skips the remaining ones.
+
+        Returns
+        -------
+        FleetResult[List[ControllerModel]]
+            The discovered controllers of each controller which completed all steps.
+        """
+        async def startup_one(api: ControllerAPI) -> List[ControllerModel]:
+            controllers = await api.get_controllers()
+            await api.init_controller_by_id(controller_id)
+            await _configure(api, counters, inputs, controller_id)
+            return controllers
+
+        return await self.run(startup_one)
+
+    async def set_motor(self, controller_id: int, motor_id: int, motor: Motor) -> FleetResult[None]:
+        """Sets the configuration of a motor on every controller of the fleet."""
+        return await self.run(lambda api: api.update_controller_motor_by_id(controller_id, motor_id, motor))
+
+    async def set_servomotor(self, controller_id: int, servomotor_id: int, servomotor: Servomotor) -> FleetResult[None]:
+        """Sets the configuration of a servomotor on every controller of the fleet."""
+        return await self.run(lambda api: api.update_controller_servomotor_by_id(controller_id, servomotor_id, servomotor))
+
+    async def reset_counter(self, controller_id: int, counter_id: int) -> FleetResult[None]:
+        """Resets a counter on every controller of the fleet."""
+        return await self.run(lambda api: api.update_controller_counter_by_id(controller_id, counter_id))
+
+    async def get_counters(self, controller_id: int = 0) -> FleetResult[List[CounterModel]]:
+        """Returns the counters of every controller of the fleet."""
+        return await self.run(lambda api: api.get_controller_counters(controller_id))
+
+    async def get_inputs(self, controller_id: int = 0) -> FleetResult[List[InputModel]]:
+        """Returns the inputs of every controller of the fleet."""
+        return await self.run(lambda api: api.get_controller_inputs(controller_id))
+
+
+async def _configure(api: ControllerAPI,
+                     counters: Optional[List[CounterModel]],
+                     inputs: Optional[List[InputModel]],
+                     controller_id: int):
+    if counters is not None:
+        await api.add_controller_counters(controller_id, counters)
+    if inputs is not None:
+        await api.add_controller_inputs(controller_id, inputs)
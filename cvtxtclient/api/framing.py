@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+import aiohttp
+
+from cvtxtclient.api.metrics import StreamMetrics
+
+
+@dataclass
+class ServerSentEvent:
+    """A single event of a text/event-stream."""
+
+    data: bytes
+    """Payload of the event, multiple data lines are joined by newlines."""
+
+    event: Optional[str] = None
+    """Event type, if given."""
+
+    id: Optional[str] = None
+    """Event id, if given."""
+
+    retry: Optional[int] = None
+    """Reconnection time in milliseconds, if given."""
+
+
+class LineFramer:
+    """Splits a byte stream into lines, carrying incomplete lines over to the next chunk.
+
+    Lines are terminated by LF. Surrounding whitespace is stripped and empty lines are skipped,
+    unless `raw` is set, in which case only a trailing CR is removed.
+    """
+
+    def __init__(self, raw: bool = False):
+        self.raw = raw
+        """Whether lines are passed through unstripped, including empty lines."""
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Feeds a chunk and returns all lines completed by it."""
+        if not chunk:
+            return []
+        if not self._buffer and chunk.endswith(b'\n'):
+            # Fast path, the chunk ends on a line break.
+            lines = chunk.split(b'\n')
+            lines.pop()
+        else:
+            self._buffer += chunk
+            end = self._buffer.rfind(b'\n')
+            if end < 0:
+                return []
+            lines = bytes(self._buffer[:end]).split(b'\n')
+            del self._buffer[:end + 1]
+        return self._clean(lines)
+
+    def flush(self) -> List[bytes]:
+        """Returns the remaining incomplete line at the end of the stream."""
+        lines = [bytes(self._buffer)] if self._buffer else []
+        self._buffer.clear()
+        return self._clean(lines)
+
+    def _clean(self, lines: List[bytes]) -> List[bytes]:
+        if self.raw:
+            return [line.rstrip(b'\r') for line in lines]
+        return [line for line in (line.strip() for line in lines) if line]
+
+
+class SSEFramer:
+    """Parses a text/event-stream incrementally into ServerSentEvents."""
+
+    def __init__(self):
+        self._lines = LineFramer(raw=True)
+        self._data: List[bytes] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        """Feeds a chunk and returns all events completed by it."""
+        events = []
+        for line in self._lines.feed(chunk):
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> List[ServerSentEvent]:
+        """Returns the remaining event if the stream ended without a blank line."""
+        events = []
+        for line in self._lines.flush() + [b'']:
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _process_line(self, line: bytes) -> Optional[ServerSentEvent]:
+        if not line:
+            if not self._data:
+                self._event = None
+                return None
+            event = ServerSentEvent(data=b'\n'.join(self._data), event=self._event, id=self._id, retry=self._retry)
+            self._data = []
+            self._event = None
+            self._retry = None
+            return event
+        if line.startswith(b':'):
+            return None
+        field, _, value = line.partition(b':')
+        if value.startswith(b' '):
+            value = value[1:]
+        if field == b'data':
+            self._data.append(value)
+        elif field == b'event':
+            self._event = value.decode('utf-8')
+        elif field == b'id':
+            self._id = value.decode('utf-8')
+        elif field == b'retry' and value.isdigit():
+            self._retry = int(value)
+        return None
+
+
+def is_event_stream(content_type: str) -> bool:
+    """Whether the Content-Type header value denotes a text/event-stream."""
+    return content_type.split(';')[0].strip().lower() == 'text/event-stream'
+
+
+def iter_messages(response: aiohttp.ClientResponse, metrics: Optional[StreamMetrics] = None) -> AsyncIterator[bytes]:
+    """Yields the complete messages of a streaming response.
+
+    Server sent event streams are framed by events and the data of each event is yielded,
+    all other streams are treated as line delimited. If metrics are given, every message is recorded.
+    """
+    messages = _iter_framed(response)
+    return messages if metrics is None else _record(messages, metrics)
+
+
+async def _record(messages: AsyncIterator[bytes], metrics: StreamMetrics) -> AsyncIterator[bytes]:
+    async for message in messages:
+        metrics.record(len(message))
+        yield message
+
+
+async def _iter_framed(response: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+    if is_event_stream(response.headers.get('Content-Type', '')):
+        framer = SSEFramer()
+        async for chunk in response.content.iter_any():
+            for event in framer.feed(chunk):
+                yield event.data
+        for event in framer.flush():
+            yield event.data
+    else:
+        framer = LineFramer()
+        async for chunk in response.content.iter_any():
+            for line in framer.feed(chunk):
+                yield line
+        for line in framer.flush():
+            yield line
@@ -0,0 +1,159 @@
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.metrics import ClientMetrics
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """Hedges idempotent requests: if the first request has not answered after a latency percentile
+    of the recent requests to the same endpoint, a second one is sent and the first reply is taken.
+
+    This bounds the tail latency caused by single slow requests, at the cost of a few additional
+    requests. The delay is derived per endpoint from a window of recent latencies, until enough
+    latencies are observed the `initial_delay` is used.
+    """
+
+    def __init__(self,
+                 percentile: float = 0.95,
+                 window: int = 200,
+                 min_samples: int = 20,
+                 initial_delay: Optional[float] = None,
+                 min_delay: float = 0.001,
+                 max_delay: Optional[float] = None):
+        """Creates a new hedging policy.
+
+        Parameters
+        ----------
+        percentile : float, optional
+            Percentile of the recent latencies after which the second request is sent, by default 0.95
+
+        window : int, optional
+            Number of recent latencies per endpoint the percentile is computed from, by default 200
+
+        min_samples : int, optional
+            Number of latencies required before the percentile is used, by default 20
+
+        initial_delay : Optional[float], optional
+            Delay in seconds used until enough latencies are observed, None to not hedge until then, by default None
+
+        min_delay : float, optional
+            Lower bound of the delay in seconds, by default 0.001
+
+        max_delay : Optional[float], optional
+            Upper bound of the delay in seconds, None for no bound, by default None
+        """
+        if not 0.0 < percentile < 1.0:
+            raise ValueError("percentile must be between 0 and 1")
+        if min_samples < 1 or window < min_samples:
+            raise ValueError("window must be at least min_samples, which must be at least 1")
+        self.percentile = percentile
+        """Percentile of the recent latencies after which the second request is sent."""
+        self.window = window
+        """Number of recent latencies per endpoint the percentile is computed from."""
+        self.min_samples = min_samples
+        """Number of latencies required before the percentile is used."""
+        self.initial_delay = initial_delay
+        """Delay used until enough latencies are observed, None to not hedge until then."""
+        self.min_delay = min_delay
+        """Lower bound of the delay in seconds."""
+        self.max_delay = max_delay
+        """Upper bound of the delay in seconds, None for no bound."""
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, latency: float):
+        """Records the latency of a completed request to an endpoint."""
+        latencies = self._latencies.get(key)
+        if latencies is None:
+            latencies = self._latencies[key] = deque(maxlen=self.window)
+        latencies.append(latency)
+
+    def delay(self, key: str) -> Optional[float]:
+        """Returns the delay in seconds after which a request to an endpoint is hedged, None to not hedge it."""
+        latencies = self._latencies.get(key)
+        if latencies is None or len(latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            ordered = sorted(latencies)
+            delay = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        if delay is None:
+            return None
+        delay = max(delay, self.min_delay)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+
+    async def run(self,
+                  key: str,
+                  attempt: Callable[[], Awaitable[T]],
+                  metrics: Optional["ClientMetrics"] = None,
+                  timeout: Optional[float] = None) -> T:
+        """Runs a request, hedged with a second attempt if the first one is slow.
+
+        Only the latencies of first attempts are observed, as hedges are sent only when the first
+        attempt is slow. A first attempt which lost to its hedge or ran into the deadline is observed
+        with its elapsed time, a lower bound of its latency, so slow requests keep raising the delay.
+
+        Parameters
+        ----------
+        key : str
+            Name of the endpoint, the latencies are tracked per key.
+
+        attempt : Callable[[], Awaitable[T]]
+            Sends the request once. Must be safe to call twice concurrently.
+
+        metrics : Optional[ClientMetrics], optional
+            If given, sent hedges are counted as `hedged_requests` and hedges answering first
+            as `hedge_wins`, by default None
+
+        timeout : Optional[float], optional
+            Seconds for the whole call, the hedge only gets the time left when it is sent,
+            None for no deadline, by default None
+
+        Returns
+        -------
+        T
+            The first successful reply. If all attempts fail, the error of the first attempt is raised.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If no attempt succeeded within the timeout.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + timeout if timeout is not None else None
+        delay = self.delay(key)
+        hedge_at = start + delay if delay is not None else None
+        first = asyncio.ensure_future(attempt())
+        pending = {first}
+        try:
+            while pending:
+                wake = min((t for t in (deadline, hedge_at) if t is not None), default=None)
+                done, pending = await asyncio.wait(pending,
+                                                   timeout=max(0.0, wake - loop.time()) if wake is not None else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    self.observe(key, loop.time() - start)
+                    if task is not first and metrics is not None:
+                        metrics.increment("hedge_wins")
+                    return task.result()
+                now = loop.time()
+                if deadline is not None and now >= deadline:
+                    if not first.done():
+                        self.observe(key, now - start)
+                    raise asyncio.TimeoutError()
+                if hedge_at is not None and now >= hedge_at and first in pending:
+                    hedge_at = None
+                    if metrics is not None:
+                        metrics.increment("hedged_requests")
+                    pending.add(asyncio.ensure_future(attempt()))
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,176 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Callable, Generic, List, Optional, TypeVar
+
+from cvtxtclient.api.delivery import DeliveryPolicy, DeliveryQueue
+
+T = TypeVar('T')
+
+
+class HubSubscriber(Generic[T]):
+    """A consumer of a StreamHub, receiving the shared items through its own DeliveryQueue."""
+
+    def __init__(self, hub: "StreamHub[T]", policy: DeliveryPolicy, maxsize: int):
+        self.hub = hub
+        """The hub the subscriber is registered at."""
+        self.queue: DeliveryQueue[T] = DeliveryQueue(policy, maxsize)
+        """Queue the items are delivered through."""
+
+    @property
+    def dropped(self) -> int:
+        """Number of items dropped because the subscriber fell behind."""
+        return self.queue.dropped
+
+    @property
+    def delivered(self) -> int:
+        """Number of items handed to the subscriber."""
+        return self.queue.delivered
+
+    async def aclose(self):
+        """Unsubscribes from the hub. The upstream is stopped if this was the last subscriber."""
+        await self.hub._unsubscribe(self)
+        await self.queue.close()
+
+    async def __aenter__(self) -> "HubSubscriber[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        return await self.queue.get()
+
+
+class StreamHub(Generic[T]):
+    """Shares one upstream stream between any number of subscribers.
+
+    Every item is handed to all subscribers as the same object, e.g. frames are not copied.
+    Each subscriber applies its own delivery policy, so a slow subscriber only drops its own items.
+    Subscribers with DeliveryPolicy.BLOCK hold back the upstream and with it all other subscribers.
+    The upstream is opened with the first subscriber and closed after the last one left::
+
+        hub = api.camera_hub()
+        async with hub.subscribe(DeliveryPolicy.LATEST) as frames:
+            async for frame in frames:
+                ...
+    """
+
+    def __init__(self, connect: Callable[[], AsyncIterable[T]], linger: float = 0.0):
+        """Creates a new hub. The upstream is not opened before the first subscription.
+
+        Parameters
+        ----------
+        connect : Callable[[], AsyncIterable[T]]
+            Opens the upstream stream.
+
+        linger : float, optional
+            Seconds the upstream is kept open after the last subscriber left,
+            so a quickly resubscribing consumer does not reconnect, by default 0.0
+        """
+        self.connect = connect
+        """Opens the upstream stream."""
+        self.linger = linger
+        """Seconds the upstream is kept open after the last subscriber left."""
+        self.received = 0
+        """Number of items read from the upstream."""
+        self.connects = 0
+        """Number of times the upstream was opened."""
+        self._subscribers: List[HubSubscriber[T]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stop_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def subscribers(self) -> int:
+        """Number of current subscribers."""
+        return len(self._subscribers)
+
+    @property
+    def running(self) -> bool:
+        """Whether the upstream is open."""
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, policy: DeliveryPolicy = DeliveryPolicy.LATEST, maxsize: int = 1) -> HubSubscriber[T]:
+        """Adds a subscriber, opening the upstream if it is the first one.
+
+        Parameters
+        ----------
+        policy : DeliveryPolicy, optional
+            Policy applied when the subscriber falls behind, by default DeliveryPolicy.LATEST
+
+        maxsize : int, optional
+            Number of pending items for the bounded policies, by default 1
+
+        Returns
+        -------
+        HubSubscriber[T]
+            The subscriber, to be used with `async with` and iterated with `async for`.
+        """
+        subscriber = HubSubscriber(self, policy, maxsize)
+        self._subscribers.append(subscriber)
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        if not self.running:
+            self.connects += 1
+            self._task = asyncio.get_running_loop().create_task(self._pump())
+        return subscriber
+
+    async def _unsubscribe(self, subscriber: HubSubscriber[T]):
+        if subscriber not in self._subscribers:
+            return
+        self._subscribers.remove(subscriber)
+        if self._subscribers:
+            return
+        if self.linger > 0:
+            loop = asyncio.get_running_loop()
+            self._stop_handle = loop.call_later(self.linger, lambda: loop.create_task(self._stop_if_idle()))
+        else:
+            await self._stop()
+
+    async def _stop_if_idle(self):
+        self._stop_handle = None
+        if not self._subscribers:
+            await self._stop()
+
+    async def _stop(self):
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def close(self):
+        """Closes the upstream and ends the streams of all subscribers."""
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        subscribers, self._subscribers = self._subscribers, []
+        await self._stop()
+        for subscriber in subscribers:
+            await subscriber.queue.close()
+
+    async def _pump(self):
+        error = None
+        source = self.connect().__aiter__()
+        try:
+            async for item in source:
+                self.received += 1
+                for subscriber in tuple(self._subscribers):
+                    await subscriber.queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            aclose = getattr(source, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        # The upstream ended on its own, the subscribers are ended with it and
+        # the next subscription opens a new upstream.
+        subscribers, self._subscribers = self._subscribers, []
+        for subscriber in subscribers:
+            await subscriber.queue.close(error)
@@ -0,0 +1,312 @@
+import re
+import time
+from bisect import bisect_left
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds in seconds of the latency histogram buckets."""
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, as used by Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        """Upper bounds of the buckets, the last bucket is unbounded."""
+        self.counts = [0] * (len(buckets) + 1)
+        """Number of observations per bucket, not cumulative."""
+        self.count = 0
+        """Number of observations."""
+        self.sum = 0.0
+        """Sum of all observed values."""
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile by interpolating within the bucket it falls into."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99),
+                "buckets": {str(bound): count for bound, count in zip(self.buckets + (float('inf'),), self.counts)}}
+
+
+class EndpointMetrics:
+    """Metrics of the requests to a single endpoint."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        """Seconds from sending the request until the response headers arrived."""
+        self.statuses: Dict[int, int] = {}
+        """Number of responses per status code."""
+        self.errors: Dict[str, int] = {}
+        """Number of failed requests per exception type."""
+        self.bytes_sent = 0
+        """Bytes of request bodies sent."""
+        self.bytes_received = 0
+        """Bytes of response bodies read as a whole. Streamed bodies are accounted in the stream metrics."""
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"latency": self.latency.snapshot(),
+                "statuses": dict(self.statuses),
+                "errors": dict(self.errors),
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received}
+
+
+class StreamMetrics:
+    """Item and byte rates of a stream, e.g. camera frames or messages."""
+
+    SMOOTHING = 0.1
+    """Weight of the newest interval in the smoothed rate."""
+
+    def __init__(self):
+        self.items = 0
+        """Number of received items."""
+        self.bytes = 0
+        """Number of received payload bytes."""
+        self.rate: Optional[float] = None
+        """Exponentially smoothed items per second."""
+        self._last: Optional[float] = None
+
+    def record(self, size: int):
+        now = time.monotonic()
+        if self._last is not None:
+            interval = now - self._last
+            if interval > 0:
+                rate = 1.0 / interval
+                self.rate = rate if self.rate is None else self.rate + self.SMOOTHING * (rate - self.rate)
+        self._last = now
+        self.items += 1
+        self.bytes += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"items": self.items, "bytes": self.bytes, "rate": self.rate}
+
+
+class ClientMetrics:
+    """Opt-in metrics of a ControllerAPI, collected through aiohttp request tracing.
+
+    Records per endpoint latency histograms, status codes, errors and body bytes, the time spent waiting
+    for a free pooled connection, establishing new connections (TCP and, for https, TLS) and resolving
+    host names, as well as item rates of the camera and message streams.
+    Endpoints are named by method and path, with numeric ids replaced by `{id}`::
+
+        metrics = ClientMetrics()
+        async with ControllerAPI(config, metrics=metrics) as api:
+            ...
+        metrics.snapshot()["endpoints"]["GET /api/v1/controller/{id}/counters"]
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        """Metrics per endpoint."""
+        self.connection_queued = Histogram()
+        """Seconds waited for a free connection of the pool."""
+        self.connection_create = Histogram()
+        """Seconds spent establishing new connections, including the TLS handshake."""
+        self.dns_resolve = Histogram()
+        """Seconds spent resolving host names, cache hits are not recorded."""
+        self.connections_reused = 0
+        """Number of requests served by a pooled connection."""
+        self.connections_created = 0
+        """Number of newly established connections."""
+        self.streams: Dict[str, StreamMetrics] = {}
+        """Metrics per stream."""
+        self.counters: Dict[str, int] = {}
+        """Named event counters of client features, e.g. hedged requests."""
+        self._labels: Dict[Tuple[str, str], str] = {}
+
+    def endpoint(self, method: str, url: Any) -> EndpointMetrics:
+        """Returns the metrics of the endpoint a request goes to."""
+        key = (method, url.path if hasattr(url, 'path') else str(url))
+        label = self._labels.get(key)
+        if label is None:
+            label = self._labels[key] = f"{method} {_ID_SEGMENT.sub('/{id}', key[1])}"
+        metrics = self.endpoints.get(label)
+        if metrics is None:
+            metrics = self.endpoints[label] = EndpointMetrics()
+        return metrics
+
+    def stream(self, name: str) -> StreamMetrics:
+        """Returns the metrics of a named stream."""
+        metrics = self.streams.get(name)
+        if metrics is None:
+            metrics = self.streams[name] = StreamMetrics()
+        return metrics
+
+    def increment(self, name: str, value: int = 1):
+        """Increments a named event counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Creates a trace config recording into these metrics, to be passed to an aiohttp.ClientSession."""
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_request_chunk_sent.append(self._on_request_chunk_sent)
+        trace.on_response_chunk_received.append(self._on_response_chunk_received)
+        trace.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace.on_connection_queued_end.append(self._on_connection_queued_end)
+        trace.on_connection_create_start.append(self._on_connection_create_start)
+        trace.on_connection_create_end.append(self._on_connection_create_end)
+        trace.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace.on_dns_resolvehost_start.append(self._on_dns_resolvehost_start)
+        trace.on_dns_resolvehost_end.append(self._on_dns_resolvehost_end)
+        return trace
+
+    async def _on_request_start(self, session, ctx: SimpleNamespace, params):
+        ctx.endpoint = self.endpoint(params.method, params.url)
+        ctx.request_start = time.perf_counter()
+
+    async def _on_request_end(self, session, ctx: SimpleNamespace, params):
+        ctx.endpoint.latency.observe(time.perf_counter() - ctx.request_start)
+        status = params.response.status
+        ctx.endpoint.statuses[status] = ctx.endpoint.statuses.get(status, 0) + 1
+
+    async def _on_request_exception(self, session, ctx: SimpleNamespace, params):
+        name = type(params.exception).__name__
+        ctx.endpoint.errors[name] = ctx.endpoint.errors.get(name, 0) + 1
+
+    async def _on_request_chunk_sent(self, session, ctx: SimpleNamespace, params):
+        ctx.endpoint.bytes_sent += len(params.chunk)
+
+    async def _on_response_chunk_received(self, session, ctx: SimpleNamespace, params):
+        ctx.endpoint.bytes_received += len(params.chunk)
+
+    async def _on_connection_queued_start(self, session, ctx: SimpleNamespace, params):
+        ctx.queued_start = time.perf_counter()
+
+    async def _on_connection_queued_end(self, session, ctx: SimpleNamespace, params):
+        self.connection_queued.observe(time.perf_counter() - ctx.queued_start)
+
+    async def _on_connection_create_start(self, session, ctx: SimpleNamespace, params):
+        ctx.create_start = time.perf_counter()
+
+    async def _on_connection_create_end(self, session, ctx: SimpleNamespace, params):
+        self.connection_create.observe(time.perf_counter() - ctx.create_start)
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx: SimpleNamespace, params):
+        self.connections_reused += 1
+
+    async def _on_dns_resolvehost_start(self, session, ctx: SimpleNamespace, params):
+        ctx.dns_start = time.perf_counter()
+
+    async def _on_dns_resolvehost_end(self, session, ctx: SimpleNamespace, params):
+        self.dns_resolve.observe(time.perf_counter() - ctx.dns_start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a JSON serializable copy of all metrics."""
+        return {"endpoints": {label: metrics.snapshot() for label, metrics in self.endpoints.items()},
+                "connections": {"queued": self.connection_queued.snapshot(),
+                                "create": self.connection_create.snapshot(),
+                                "dns_resolve": self.dns_resolve.snapshot(),
+                                "reused": self.connections_reused,
+                                "created": self.connections_created},
+                "streams": {name: metrics.snapshot() for name, metrics in self.streams.items()},
+                "counters": dict(self.counters)}
+
+    def to_prometheus(self, prefix: str = "cvtxt") -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram(name: str, help: str, series: List[Tuple[str, Histogram]]):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, hist in series:
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float('inf'),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f"{prefix}_{name}_bucket{{{labels}{',' if labels else ''}le=\"{le}\"}} {cumulative}")
+                braces = f"{{{labels}}}" if labels else ""
+                lines.append(f"{prefix}_{name}_sum{braces} {hist.sum}")
+                lines.append(f"{prefix}_{name}_count{braces} {hist.count}")
+
+        def counter(name: str, help: str, series: List[Tuple[str, float]], kind: str = "counter"):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in series:
+                lines.append(f"{prefix}_{name}{{{labels}}} {value}" if labels else f"{prefix}_{name} {value}")
+
+        endpoints = sorted(self.endpoints.items())
+        histogram("request_duration_seconds", "Time until the response headers arrived.",
+                  [(f'endpoint="{label}"', metrics.latency) for label, metrics in endpoints])
+        counter("responses_total", "Responses by status code.",
+                [(f'endpoint="{label}",status="{status}"', count)
+                 for label, metrics in endpoints for status, count in sorted(metrics.statuses.items())])
+        counter("request_errors_total", "Failed requests by exception type.",
+                [(f'endpoint="{label}",error="{error}"', count)
+                 for label, metrics in endpoints for error, count in sorted(metrics.errors.items())])
+        counter("request_bytes_sent_total", "Bytes of request bodies sent.",
+                [(f'endpoint="{label}"', metrics.bytes_sent) for label, metrics in endpoints])
+        counter("response_bytes_received_total", "Bytes of response bodies received.",
+                [(f'endpoint="{label}"', metrics.bytes_received) for label, metrics in endpoints])
+        histogram("connection_queued_seconds", "Time waited for a free pooled connection.",
+                  [("", self.connection_queued)])
+        histogram("connection_create_seconds", "Time spent establishing connections, including TLS.",
+                  [("", self.connection_create)])
+        histogram("dns_resolve_seconds", "Time spent resolving host names.", [("", self.dns_resolve)])
+        counter("connections_reused_total", "Requests served by a pooled connection.", [("", self.connections_reused)])
+        counter("connections_created_total", "Newly established connections.", [("", self.connections_created)])
+        streams = sorted(self.streams.items())
+        counter("stream_items_total", "Items received per stream.",
+                [(f'stream="{name}"', metrics.items) for name, metrics in streams])
+        counter("stream_bytes_total", "Payload bytes received per stream.",
+                [(f'stream="{name}"', metrics.bytes) for name, metrics in streams])
+        counter("stream_items_per_second", "Smoothed item rate per stream.",
+                [(f'stream="{name}"', metrics.rate or 0.0) for name, metrics in streams], kind="gauge")
+        counter("events_total", "Events of client features.",
+                [(f'event="{name}"', value) for name, value in sorted(self.counters.items())])
+        return "\n".join(lines) + "\n"
+
+
+def create_prometheus_app(metrics: ClientMetrics, path: str = "/metrics") -> "web.Application":
+    """Creates an aiohttp application exposing the metrics for Prometheus scraping."""
+    # The server side of aiohttp is only imported when serving, clients do not pay for it.
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+    app = web.Application()
+    app.router.add_get(path, handle)
+    return app
+
+
+async def start_prometheus_exporter(metrics: ClientMetrics, host: str = "127.0.0.1", port: int = 9464) -> "web.AppRunner":
+    """Serves the metrics for Prometheus scraping. Stop the exporter with `await runner.cleanup()`."""
+    from aiohttp import web
+    runner = web.AppRunner(create_prometheus_app(metrics))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
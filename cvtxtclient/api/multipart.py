@@ -0,0 +1,142 @@
+from typing import List, Optional, Union
+
+Frame = Union[bytes, memoryview]
+"""A single part body handed out by the parser."""
+
+
+class MultipartStreamParser:
+    """Incremental parser for multipart/x-mixed-replace streams as used for MJPEG.
+
+    Chunks are fed in as they arrive from the network, the parser keeps its state in between,
+    so parts spanning several chunks are reassembled. If a part carries a `Content-Length` header
+    the body is taken by length, otherwise the body ends at the next boundary delimiter.
+    """
+
+    _SEEK_BOUNDARY = 0
+    _HEADERS = 1
+    _BODY = 2
+
+    def __init__(self, boundary: Union[str, bytes], zero_copy: bool = False):
+        """Creates a new parser.
+
+        Parameters
+        ----------
+        boundary : Union[str, bytes]
+            The boundary as given in the Content-Type header, without the leading dashes.
+
+        zero_copy : bool, optional
+            If True, frames are returned as memoryviews into the internal buffer instead of bytes copies.
+            The views stay valid as the parser never mutates a buffer it handed out views of, by default False
+        """
+        if isinstance(boundary, str):
+            boundary = boundary.encode('latin-1')
+        if not boundary:
+            raise ValueError("Boundary must not be empty")
+        self.delimiter = b'--' + boundary
+        """Boundary delimiter which separates the parts."""
+        self.zero_copy = zero_copy
+        """If frames are handed out as memoryviews."""
+        self.content_type: Optional[str] = None
+        """Content type of the most recent part, if given in its headers."""
+        self.closed = False
+        """Whether the closing delimiter was seen."""
+        self._buffer = bytearray()
+        self._state = self._SEEK_BOUNDARY
+        self._scan = 0
+        self._content_length: Optional[int] = None
+
+    @staticmethod
+    def boundary_from_content_type(content_type: str) -> Optional[str]:
+        """Extracts the boundary parameter from a Content-Type header value."""
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'boundary':
+                value = value.strip().strip('"')
+                # Some servers repeat the dashes in the header.
+                if value.startswith('--'):
+                    value = value[2:]
+                return value or None
+        return None
+
+    def feed(self, chunk: bytes) -> List[Frame]:
+        """Feeds a chunk of the stream and returns all parts completed by it."""
+        if self.closed or not chunk:
+            return []
+        self._buffer += chunk
+        frames: List[Frame] = []
+        view = memoryview(self._buffer)
+        try:
+            pos = self._parse(view, frames)
+        finally:
+            if not (self.zero_copy and frames):
+                view.release()
+        if pos > 0:
+            self._scan -= pos
+            if self.zero_copy and frames:
+                # Handed out views keep the old buffer alive, continue on a copy of the tail.
+                self._buffer = self._buffer[pos:]
+            else:
+                del self._buffer[:pos]
+        return frames
+
+    def _parse(self, view: memoryview, frames: List[Frame]) -> int:
+        buffer = self._buffer
+        delimiter = self.delimiter
+        pos = 0
+        while True:
+            if self._state == self._SEEK_BOUNDARY:
+                index = buffer.find(delimiter, max(pos, self._scan))
+                if index < 0:
+                    # Everything before a possible partial delimiter at the end can be dropped.
+                    pos = max(pos, len(buffer) - len(delimiter) + 1)
+                    self._scan = pos
+                    return pos
+                pos = index + len(delimiter)
+                self._scan = pos
+                self._state = self._HEADERS
+            elif self._state == self._HEADERS:
+                if len(buffer) - pos < 2:
+                    return pos
+                if buffer[pos:pos + 2] == b'--':
+                    self.closed = True
+                    return len(buffer)
+                end = buffer.find(b'\r\n\r\n', max(pos, self._scan))
+                if end < 0:
+                    self._scan = max(pos, len(buffer) - 3)
+                    return pos
+                self._read_headers(bytes(view[pos:end]))
+                pos = end + 4
+                self._scan = pos
+                self._state = self._BODY
+            else:
+                length = self._content_length
+                if length is not None:
+                    end = pos + length
+                    if end > len(buffer):
+                        return pos
+                    next_pos = end
+                else:
+                    end = buffer.find(b'\r\n' + delimiter, max(pos, self._scan))
+                    if end < 0:
+                        self._scan = max(pos, len(buffer) - len(delimiter) - 1)
+                        return pos
+                    next_pos = end + 2
+                if end > pos:
+                    frames.append(view[pos:end] if self.zero_copy else bytes(view[pos:end]))
+                pos = next_pos
+                self._scan = pos
+                self._state = self._SEEK_BOUNDARY
+
+    def _read_headers(self, raw: bytes):
+        self._content_length = None
+        self.content_type = None
+        for line in raw.decode('latin-1').split('\r\n'):
+            key, _, value = line.partition(':')
+            key = key.strip().lower()
+            if key == 'content-length':
+                try:
+                    self._content_length = int(value.strip())
+                except ValueError:
+                    self._content_length = None
+            elif key == 'content-type':
+                self.content_type = value.strip()
@@ -0,0 +1,354 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Deque, Dict, List, Optional
+
+from cvtxtclient.api.delivery import DeliveryPolicy, DeliveryQueue
+from cvtxtclient.api.resilience import BackoffPolicy
+from cvtxtclient.models import Input as InputModel
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.controller import ControllerAPI
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InputSample:
+    """The value of an input at the time it was polled."""
+
+    controller_id: int
+    """Id of the controller of the input."""
+
+    input_id: int
+    """Id of the input."""
+
+    value: InputModel
+    """The polled input."""
+
+    timestamp: float
+    """Time the poll returned, as returned by loop.time()."""
+
+
+@dataclass(frozen=True)
+class PollStats:
+    """Rates and latency of the polling of a controller."""
+
+    controller_id: int
+    """Id of the polled controller."""
+
+    target_rate: float
+    """Highest rate in polls per second any subscriber asked for."""
+
+    scheduled_rate: float
+    """Rate the poller currently aims for, below the target while it backs off."""
+
+    achieved_rate: Optional[float]
+    """Rate of the recent successful polls, None before two polls completed."""
+
+    latency: Optional[float]
+    """Smoothed latency of the polls in seconds, None before the first poll completed."""
+
+    polls: int
+    """Number of successful polls."""
+
+    errors: int
+    """Number of failed polls."""
+
+    subscribers: int
+    """Number of current subscribers."""
+
+
+class InputSubscription:
+    """Interest of a consumer in an input, receiving its samples through its own DeliveryQueue."""
+
+    def __init__(self,
+                 poller: "InputPoller",
+                 controller_id: int,
+                 input_id: int,
+                 rate: float,
+                 policy: DeliveryPolicy,
+                 maxsize: int):
+        self.poller = poller
+        """The poller the subscription is registered at."""
+        self.controller_id = controller_id
+        """Id of the controller of the input."""
+        self.input_id = input_id
+        """Id of the input."""
+        self.rate = rate
+        """Desired samples per second."""
+        self.queue: DeliveryQueue[InputSample] = DeliveryQueue(policy, maxsize)
+        """Queue the samples are delivered through."""
+        self._last: Optional[float] = None
+
+    @property
+    def dropped(self) -> int:
+        """Number of samples dropped because the subscriber fell behind."""
+        return self.queue.dropped
+
+    @property
+    def delivered(self) -> int:
+        """Number of samples handed to the subscriber."""
+        return self.queue.delivered
+
+    async def aclose(self):
+        """Unsubscribes. Polling of the controller stops if this was its last subscription."""
+        await self.poller._unsubscribe(self)
+        await self.queue.close()
+
+    async def __aenter__(self) -> "InputSubscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def __aiter__(self) -> AsyncIterator[InputSample]:
+        return self
+
+    async def __anext__(self) -> InputSample:
+        return await self.queue.get()
+
+
+class _Schedule:
+    """Polling state of a single controller."""
+
+    def __init__(self, window: int):
+        self.subscriptions: List[InputSubscription] = []
+        self.task: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+        self.latency: Optional[float] = None
+        self.completed: Deque[float] = deque(maxlen=window)
+        self.polls = 0
+        self.errors = 0
+
+    @property
+    def target_interval(self) -> float:
+        return 1.0 / max(subscription.rate for subscription in self.subscriptions)
+
+
+class InputPoller:
+    """Polls the inputs of controllers for any number of subscribers.
+
+    Inputs have no message stream, so they are polled with `get_controller_inputs`, which returns all inputs
+    of a controller at once. Polls bypass the response cache of the client. All subscriptions of a controller share one poll loop running at the highest
+    rate any of them asked for, each subscriber receives its input at its own rate.
+
+    The poller keeps the controller busy for at most `utilization` of the time: when the latency of the
+    polls rises, the interval is stretched to latency / utilization and returns to the target once the
+    latency drops. Failed polls are retried with backoff. `stats` reports the achieved against the target rate::
+
+        poller = api.input_poller()
+        async with poller.subscribe(0, 2, rate=20.0) as samples:
+            async for sample in samples:
+                print(sample.value.value)
+    """
+
+    def __init__(self,
+                 api: "ControllerAPI",
+                 utilization: float = 0.5,
+                 smoothing: float = 0.2,
+                 max_interval: float = 5.0,
+                 window: int = 20,
+                 backoff: Optional[BackoffPolicy] = None):
+        """Creates a new poller. Nothing is polled before the first subscription.
+
+        Parameters
+        ----------
+        api : ControllerAPI
+            The api client used to poll.
+
+        utilization : float, optional
+            Maximum fraction of the time a controller is kept busy by polls, by default 0.5
+
+        smoothing : float, optional
+            Weight of the newest latency in the smoothed latency, by default 0.2
+
+        max_interval : float, optional
+            Upper bound of the poll interval in seconds while backing off, by default 5.0
+
+        window : int, optional
+            Number of recent polls the achieved rate is computed from, by default 20
+
+        backoff : Optional[BackoffPolicy], optional
+            Delays between retries of failed polls, by default BackoffPolicy()
+        """
+        if not 0.0 < utilization <= 1.0:
+            raise ValueError("utilization must be in (0, 1]")
+        if not 0.0 < smoothing <= 1.0:
+            raise ValueError("smoothing must be in (0, 1]")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.api = api
+        """The api client used to poll."""
+        self.utilization = utilization
+        """Maximum fraction of the time a controller is kept busy by polls."""
+        self.smoothing = smoothing
+        """Weight of the newest latency in the smoothed latency."""
+        self.max_interval = max_interval
+        """Upper bound of the poll interval in seconds while backing off."""
+        self.window = window
+        """Number of recent polls the achieved rate is computed from."""
+        self.backoff = backoff if backoff is not None else BackoffPolicy()
+        """Delays between retries of failed polls."""
+        self.last_error: Optional[Exception] = None
+        """The most recent error while polling."""
+        self._schedules: Dict[int, _Schedule] = {}
+
+    async def __aenter__(self) -> "InputPoller":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def subscribe(self,
+                  controller_id: int,
+                  input_id: int,
+                  rate: float = 10.0,
+                  policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                  maxsize: int = 1) -> InputSubscription:
+        """Subscribes to an input, starting to poll its controller if it is the first subscription.
+
+        Parameters
+        ----------
+        controller_id : int
+            Id of the controller of the input.
+
+        input_id : int
+            Id of the input.
+
+        rate : float, optional
+            Desired samples per second, by default 10.0
+
+        policy : DeliveryPolicy, optional
+            Policy applied when the subscriber falls behind, by default DeliveryPolicy.LATEST
+
+        maxsize : int, optional
+            Number of pending samples for the bounded policies, by default 1
+
+        Returns
+        -------
+        InputSubscription
+            The subscription, to be used with `async with` and iterated with `async for`.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        subscription = InputSubscription(self, controller_id, input_id, rate, policy, maxsize)
+        schedule = self._schedules.get(controller_id)
+        if schedule is None:
+            schedule = self._schedules[controller_id] = _Schedule(self.window)
+        schedule.subscriptions.append(subscription)
+        if schedule.task is None or schedule.task.done():
+            schedule.task = asyncio.get_running_loop().create_task(self._poll(controller_id, schedule))
+        else:
+            # Let the running loop pick up a possibly higher rate right away.
+            schedule.wake.set()
+        return subscription
+
+    async def _unsubscribe(self, subscription: InputSubscription):
+        schedule = self._schedules.get(subscription.controller_id)
+        if schedule is None or subscription not in schedule.subscriptions:
+            return
+        schedule.subscriptions.remove(subscription)
+        if not schedule.subscriptions:
+            del self._schedules[subscription.controller_id]
+            await self._stop(schedule)
+
+    @staticmethod
+    async def _stop(schedule: _Schedule):
+        task, schedule.task = schedule.task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def close(self):
+        """Stops polling and ends the streams of all subscriptions."""
+        schedules, self._schedules = self._schedules, {}
+        for schedule in schedules.values():
+            await self._stop(schedule)
+            for subscription in schedule.subscriptions:
+                await subscription.queue.close()
+
+    def interval(self, controller_id: int) -> float:
+        """Returns the seconds between the polls of a controller the poller currently aims for."""
+        return self._interval(self._schedules[controller_id])
+
+    def _interval(self, schedule: _Schedule) -> float:
+        interval = schedule.target_interval
+        if schedule.latency is not None:
+            interval = max(interval, min(schedule.latency / self.utilization, self.max_interval))
+        return interval
+
+    def stats(self, controller_id: int) -> PollStats:
+        """Returns the rates and latency of the polling of a controller.
+
+        Raises
+        ------
+        KeyError
+            If the controller has no subscriptions.
+        """
+        schedule = self._schedules[controller_id]
+        completed = schedule.completed
+        achieved = None
+        if len(completed) >= 2 and completed[-1] > completed[0]:
+            achieved = (len(completed) - 1) / (completed[-1] - completed[0])
+        return PollStats(controller_id=controller_id,
+                         target_rate=1.0 / schedule.target_interval,
+                         scheduled_rate=1.0 / self._interval(schedule),
+                         achieved_rate=achieved,
+                         latency=schedule.latency,
+                         polls=schedule.polls,
+                         errors=schedule.errors,
+                         subscribers=len(schedule.subscriptions))
+
+    async def _poll(self, controller_id: int, schedule: _Schedule):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            started = loop.time()
+            try:
+                # Bypass the response cache, a cached response would fake the latency and repeat stale values.
+                inputs = await self.api.get_controller_inputs(controller_id, use_cache=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                schedule.errors += 1
+                self.last_error = e
+                logger.warning(f"Polling inputs of controller {controller_id} failed: {e}")
+                await asyncio.sleep(self.backoff.delay(attempt))
+                attempt += 1
+                continue
+            attempt = 0
+            now = loop.time()
+            latency = now - started
+            schedule.latency = latency if schedule.latency is None else \
+                schedule.latency + self.smoothing * (latency - schedule.latency)
+            schedule.completed.append(now)
+            schedule.polls += 1
+            await self._dispatch(controller_id, schedule, inputs, now)
+            # Sleep until the next poll is due, waking up early if a subscription changed the rate.
+            while True:
+                remaining = started + self._interval(schedule) - loop.time()
+                if remaining <= 0:
+                    break
+                schedule.wake.clear()
+                try:
+                    await asyncio.wait_for(schedule.wake.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+    async def _dispatch(self, controller_id: int, schedule: _Schedule, inputs: List[InputModel], now: float):
+        # A subscriber slower than the poll loop receives every n-th sample. Half a poll interval of
+        # tolerance keeps it from skipping samples due to jitter in the poll timing.
+        tolerance = self._interval(schedule) / 2
+        for subscription in tuple(schedule.subscriptions):
+            if subscription.input_id >= len(inputs):
+                continue
+            if subscription._last is not None and now - subscription._last < 1.0 / subscription.rate - tolerance:
+                continue
+            subscription._last = now
+            await subscription.queue.put(InputSample(controller_id, subscription.input_id,
+                                                     inputs[subscription.input_id], now))
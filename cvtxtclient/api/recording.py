@@ -0,0 +1,367 @@
+import asyncio
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from cvtxtclient.api.multipart import Frame
+
+INDEX_MAGIC = b"CVTXIDX1"
+"""Header of index files."""
+
+_RECORD = struct.Struct("<dQI")
+"""Index record: timestamp as float64 seconds, offset as uint64 and length as uint32 in bytes."""
+
+
+def index_path(path: str) -> str:
+    """Returns the path of the index belonging to a segment."""
+    return path + ".idx"
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Position of a frame within a segment."""
+
+    timestamp: float
+    """Time the frame was recorded, as returned by time.time()."""
+
+    offset: int
+    """Offset of the frame in the segment in bytes."""
+
+    length: int
+    """Length of the frame in bytes."""
+
+
+def _repair(path: str):
+    """Truncates a segment to its last complete frame, as left behind by a recorder which did not close cleanly.
+
+    The index is cut to whole records pointing into the data, the data to the end of the last indexed frame.
+    """
+    if not os.path.exists(index_path(path)):
+        return
+    with open(index_path(path), "r+b") as index:
+        header = index.read(len(INDEX_MAGIC))
+        if len(header) < len(INDEX_MAGIC) and INDEX_MAGIC.startswith(header):
+            # Interrupted before the header was complete, there is no frame yet.
+            index.truncate(0)
+            count = 0
+        elif header != INDEX_MAGIC:
+            raise ValueError(f"Not a segment index: {index_path(path)}")
+        else:
+            count = (os.fstat(index.fileno()).st_size - len(INDEX_MAGIC)) // _RECORD.size
+        data_size = os.path.getsize(path) if os.path.exists(path) else 0
+        end = 0
+        while count > 0:
+            index.seek(len(INDEX_MAGIC) + (count - 1) * _RECORD.size)
+            _, offset, length = _RECORD.unpack(index.read(_RECORD.size))
+            end = offset + length
+            if end <= data_size:
+                break
+            count -= 1
+            end = 0
+        if header == INDEX_MAGIC:
+            index.truncate(len(INDEX_MAGIC) + count * _RECORD.size)
+    if data_size > end:
+        with open(path, "r+b") as data:
+            data.truncate(end)
+
+
+class SegmentRecorder:
+    """Records frames into a single append-only segment file with a binary index.
+
+    Frames are collected in batches, which are written by a background thread, so the event
+    loop is never blocked on disk I/O. The segment holds the frames back to back, the index
+    `<path>.idx` one fixed size record of timestamp, offset and length per frame. The index is
+    always written after the frames it points to, so a crash never leaves it pointing past the data.
+    Recording into an existing segment appends to it, after cutting off a partial frame or index
+    record a crash left at its end::
+
+        async with SegmentRecorder("session.mjpeg") as recorder:
+            async with api.camera_hub().subscribe(DeliveryPolicy.DROP_OLDEST, maxsize=64) as frames:
+                await recorder.record(frames)
+    """
+
+    def __init__(self,
+                 path: str,
+                 batch_frames: int = 32,
+                 batch_bytes: int = 4 * 1024 * 1024,
+                 flush_interval: float = 0.5,
+                 fsync: bool = False):
+        """Creates a new recorder and opens the segment for appending.
+
+        Parameters
+        ----------
+        path : str
+            Path of the segment file, the index is written next to it.
+
+        batch_frames : int, optional
+            Number of frames after which a batch is written, by default 32
+
+        batch_bytes : int, optional
+            Number of bytes after which a batch is written, by default 4 MiB
+
+        flush_interval : float, optional
+            Seconds after which a batch is written regardless of its size, by default 0.5
+
+        fsync : bool, optional
+            If True, every batch is synced to disk before the next one is written, by default False
+        """
+        self.path = path
+        """Path of the segment file."""
+        self.batch_frames = batch_frames
+        """Number of frames after which a batch is written."""
+        self.batch_bytes = batch_bytes
+        """Number of bytes after which a batch is written."""
+        self.flush_interval = flush_interval
+        """Seconds after which a batch is written regardless of its size."""
+        self.fsync = fsync
+        """Whether every batch is synced to disk."""
+        self.frames = 0
+        """Number of frames recorded by this recorder."""
+        self.bytes = 0
+        """Number of frame bytes recorded by this recorder."""
+        _repair(path)
+        self._data = open(path, "ab")
+        self._index = open(index_path(path), "ab")
+        if self._index.tell() == 0:
+            self._index.write(INDEX_MAGIC)
+        self._offset = self._data.tell()
+        self._batch: List[Frame] = []
+        self._records: List[bytes] = []
+        self._batch_size = 0
+        self._last_flush = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cvtxt-record")
+        self._writing: Optional[asyncio.Future] = None
+        self._closed = False
+
+    async def append(self, frame: Frame, timestamp: Optional[float] = None):
+        """Appends a frame. It is written with the next batch.
+
+        Frames are referenced, not copied, until their batch is written, so they must not be modified.
+
+        Parameters
+        ----------
+        frame : Frame
+            The encoded frame.
+
+        timestamp : Optional[float], optional
+            Time the frame was received, by default time.time()
+        """
+        if self._closed:
+            raise ValueError("Recorder is closed")
+        length = len(frame)
+        self._batch.append(frame)
+        self._records.append(_RECORD.pack(time.time() if timestamp is None else timestamp, self._offset, length))
+        self._offset += length
+        self._batch_size += length
+        self.frames += 1
+        self.bytes += length
+        if (len(self._batch) >= self.batch_frames or self._batch_size >= self.batch_bytes
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            await self._submit()
+
+    async def record(self, frames: AsyncIterable[Frame]) -> int:
+        """Appends all frames of a stream until it ends, stamped with their arrival time.
+
+        Returns
+        -------
+        int
+            Number of recorded frames.
+        """
+        count = 0
+        async for frame in frames:
+            await self.append(frame)
+            count += 1
+        return count
+
+    async def _submit(self):
+        # Only one batch is written at a time, which keeps the batches in order and
+        # holds back the producer if the disk can not keep up.
+        if self._writing is not None:
+            await self._writing
+            self._writing = None
+        self._last_flush = time.monotonic()
+        if not self._batch:
+            return
+        batch, records = self._batch, self._records
+        self._batch, self._records, self._batch_size = [], [], 0
+        self._writing = asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch, records)
+
+    def _write(self, batch: List[Frame], records: List[bytes]):
+        self._data.writelines(batch)
+        self._data.flush()
+        if self.fsync:
+            os.fsync(self._data.fileno())
+        self._index.write(b"".join(records))
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+
+    async def flush(self):
+        """Writes the pending frames and waits until they are on disk."""
+        await self._submit()
+        if self._writing is not None:
+            await self._writing
+            self._writing = None
+
+    async def close(self):
+        """Writes the pending frames and closes the files."""
+        if self._closed:
+            return
+        await self.flush()
+        self._closed = True
+        self._data.close()
+        self._index.close()
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "SegmentRecorder":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class SegmentReader(Sequence[memoryview]):
+    """Random access to a recorded segment through memory maps.
+
+    Frames are returned as memoryviews into the mapped segment, nothing is read before it is accessed.
+    Indexing, slicing and time seeks are O(1) respectively O(log n)::
+
+        with SegmentReader("session.mjpeg") as reader:
+            first, last = reader[0], reader[-1]
+            for timestamp, frame in reader.between(start, start + 5.0):
+                ...
+
+    The segment is mapped as it was when the reader was opened. The memoryviews must be released,
+    or copied with bytes(), before the reader is closed.
+    """
+
+    def __init__(self, path: str):
+        """Opens a segment and its index.
+
+        Parameters
+        ----------
+        path : str
+            Path of the segment file, the index is expected next to it.
+        """
+        self.path = path
+        """Path of the segment file."""
+        self._data_file = open(path, "rb")
+        self._index_file = open(index_path(path), "rb")
+        self._data = self._map(self._data_file)
+        self._index = self._map(self._index_file)
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"Not a segment index: {index_path(path)}")
+        data_size = len(self._data)
+        count = (len(self._index) - len(INDEX_MAGIC)) // _RECORD.size
+        # A recorder may have been interrupted while writing, frames without data are ignored.
+        while count > 0 and sum(self._record(count - 1)[1:]) > data_size:
+            count -= 1
+        self._count = count
+
+    @staticmethod
+    def _map(file) -> Union[mmap.mmap, bytes]:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _record(self, i: int) -> Tuple[float, int, int]:
+        return _RECORD.unpack_from(self._index, len(INDEX_MAGIC) + i * _RECORD.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, i: int) -> memoryview: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[memoryview]: ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[memoryview, List[memoryview]]:
+        """Returns the frame at a position, or a list of the frames of a slice."""
+        if isinstance(i, slice):
+            return [self.frame(j) for j in range(*i.indices(self._count))]
+        return self.frame(i)
+
+    def _position(self, i: int) -> int:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("frame index out of range")
+        return i
+
+    def entry(self, i: int) -> IndexEntry:
+        """Returns the index entry of the frame at a position."""
+        return IndexEntry(*self._record(self._position(i)))
+
+    def timestamp(self, i: int) -> float:
+        """Returns the time the frame at a position was recorded."""
+        return self._record(self._position(i))[0]
+
+    def frame(self, i: int) -> memoryview:
+        """Returns the frame at a position as a memoryview into the segment."""
+        _, offset, length = self._record(self._position(i))
+        return memoryview(self._data)[offset:offset + length]
+
+    def read(self, i: int) -> bytes:
+        """Returns a copy of the frame at a position."""
+        _, offset, length = self._record(self._position(i))
+        return self._data[offset:offset + length]
+
+    @property
+    def timestamps(self) -> Sequence[float]:
+        """The timestamps of all frames, read lazily from the index."""
+        return _Timestamps(self)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        """Time of the first frame, None if the segment is empty."""
+        return self.timestamp(0) if self._count else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        """Time of the last frame, None if the segment is empty."""
+        return self.timestamp(-1) if self._count else None
+
+    def seek(self, timestamp: float) -> int:
+        """Returns the position of the first frame recorded at or after a time, len(self) if there is none."""
+        return bisect_left(self.timestamps, timestamp)
+
+    def between(self, start: float, end: float) -> Iterator[Tuple[float, memoryview]]:
+        """Yields timestamp and frame of all frames recorded in [start, end)."""
+        for i in range(self.seek(start), self.seek(end)):
+            yield self.timestamp(i), self.frame(i)
+
+    def close(self):
+        """Unmaps and closes the segment and its index."""
+        for mapped in (self._data, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def __enter__(self) -> "SegmentReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _Timestamps(Sequence[float]):
+    """Timestamps of a segment as a sequence, so they can be bisected without reading the whole index."""
+
+    def __init__(self, reader: SegmentReader):
+        self._reader = reader
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._reader.timestamp(j) for j in range(*i.indices(len(self._reader)))]
+        return self._reader.timestamp(i)
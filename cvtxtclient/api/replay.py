@@ -0,0 +1,340 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cvtxtclient.api.codec import type_adapter
+from cvtxtclient.api.controller import ControllerAPI, CounterUpdate
+from cvtxtclient.api.delivery import DeliveryPolicy
+from cvtxtclient.api.multipart import Frame
+from cvtxtclient.api.recording import SegmentReader, SegmentRecorder, index_path
+from cvtxtclient.models import Counter as CounterModel
+
+CAMERA_IMAGES = "camera.mjpeg"
+"""Segment of the camera images within a session directory."""
+
+CAMERA_MESSAGES = "camera-messages.seg"
+"""Segment of the image recognition messages within a session directory."""
+
+CONTROLLER_MESSAGES = "controller-messages.seg"
+"""Segment of the console outputs within a session directory."""
+
+
+def counter_messages(controller_id: int) -> str:
+    """Returns the name of the segment of the counter messages of a controller within a session directory."""
+    return f"counters-{controller_id}.seg"
+
+
+async def record_session(api: ControllerAPI,
+                         directory: str,
+                         controller_ids: Iterable[int] = (0,),
+                         camera: bool = True,
+                         camera_messages: bool = False,
+                         controller_messages: bool = True,
+                         duration: Optional[float] = None):
+    """Records the camera and message streams of a controller into a session directory, to be replayed with ReplaySession.
+
+    Runs until the duration elapsed or the task is cancelled. The camera has to be started before.
+
+    Parameters
+    ----------
+    api : ControllerAPI
+        Client of the recorded controller.
+
+    directory : str
+        Directory the segments are written to, created if missing.
+
+    controller_ids : Iterable[int], optional
+        Controllers whose counter messages are recorded, by default (0,)
+
+    camera : bool, optional
+        Whether the camera images are recorded, by default True
+
+    camera_messages : bool, optional
+        Whether the image recognition messages are recorded, by default False
+
+    controller_messages : bool, optional
+        Whether the console outputs are recorded, by default True
+
+    duration : Optional[float], optional
+        Seconds to record, None to record until cancelled, by default None
+
+    Raises
+    ------
+    ValueError
+        If no stream is selected for recording.
+    """
+    controller_ids = list(controller_ids)
+    if not (camera or camera_messages or controller_messages or controller_ids):
+        raise ValueError("No stream selected for recording")
+    os.makedirs(directory, exist_ok=True)
+    key = api.config.api_key
+
+    async def record_frames():
+        async with SegmentRecorder(os.path.join(directory, CAMERA_IMAGES)) as recorder:
+            async with api.camera_hub().subscribe(DeliveryPolicy.DROP_OLDEST, maxsize=64) as frames:
+                await recorder.record(frames)
+
+    async def record_messages(name: str, messages: AsyncIterator[str]):
+        async with SegmentRecorder(os.path.join(directory, name)) as recorder:
+            async for message in messages:
+                await recorder.append(message.encode('utf-8'))
+
+    recorders = []
+    if camera:
+        recorders.append(record_frames())
+    if camera_messages:
+        recorders.append(record_messages(CAMERA_MESSAGES, api.camera_message_stream(key)))
+    if controller_messages:
+        recorders.append(record_messages(CONTROLLER_MESSAGES, api.get_controller_message_stream(key)))
+    for controller_id in controller_ids:
+        recorders.append(record_messages(counter_messages(controller_id),
+                                         api.get_controller_counters_message_stream(controller_id, key)))
+    tasks = [asyncio.ensure_future(recorder) for recorder in recorders]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=duration, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ReplayClock:
+    """Paces the streams of a replay, so they stay in sync with each other.
+
+    Without a speed, items are released one per event loop iteration, the one recorded first among
+    the currently waiting items first. Streams consumed concurrently thereby still take turns in about
+    their recorded order, but only a stream which is waiting for its next item holds back the others.
+    For an order that is the same on every run, replay the streams through `ReplaySession.merged`.
+    """
+
+    def __init__(self, origin: float, speed: Optional[float] = 1.0):
+        """Creates a new clock. It starts running when the first item is due.
+
+        Parameters
+        ----------
+        origin : float
+            Recorded time which is replayed first.
+
+        speed : Optional[float], optional
+            Replay speed relative to real time, None to replay as fast as possible, by default 1.0
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.origin = origin
+        """Recorded time which is replayed first."""
+        self.speed = speed
+        """Replay speed relative to real time, None to replay as fast as possible."""
+        self._started: Optional[float] = None
+        self._waiting: List[Tuple[float, str, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._release_handle: Optional[asyncio.Handle] = None
+
+    def _schedule(self):
+        # Released on the next loop iteration, so streams woken in this one can post their next item first.
+        if self._waiting and self._release_handle is None:
+            self._release_handle = asyncio.get_running_loop().call_soon(self._release)
+
+    def _release(self):
+        self._release_handle = None
+        while self._waiting:
+            turn = heapq.heappop(self._waiting)[3]
+            # Skip the turn of a cancelled wait, which did not remove its entry yet.
+            if not turn.done():
+                turn.set_result(None)
+                break
+        self._schedule()
+
+    async def wait(self, timestamp: float, stream: str = ""):
+        """Waits until an item recorded at the given time is due.
+
+        Parameters
+        ----------
+        timestamp : float
+            Recorded time of the item.
+
+        stream : str, optional
+            Name of the stream of the item, orders unpaced items recorded at the same time, by default ""
+        """
+        loop = asyncio.get_running_loop()
+        if self.speed is None:
+            entry = (timestamp, stream, next(self._sequence), loop.create_future())
+            heapq.heappush(self._waiting, entry)
+            self._schedule()
+            try:
+                await entry[3]
+            finally:
+                if entry in self._waiting:
+                    # Cancelled before its turn.
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+            return
+        if self._started is None:
+            self._started = loop.time()
+        delay = self._started + (timestamp - self.origin) / self.speed - loop.time()
+        await asyncio.sleep(max(0.0, delay))
+
+
+class ReplaySession:
+    """Replays a recorded session through the same stream interfaces as ControllerAPI.
+
+    The streams of a session share a clock, so they are replayed in sync in real time, at a multiple
+    of it or as fast as possible. The replayed items are the recorded ones in their recorded order,
+    so every run produces the same output::
+
+        async with ReplaySession("sessions/run-1", speed=None) as replay:
+            async for frame in replay.camera_image_stream():
+                ...
+    """
+
+    def __init__(self,
+                 directory: str,
+                 speed: Optional[float] = 1.0,
+                 start: Optional[float] = None,
+                 end: Optional[float] = None):
+        """Opens a recorded session.
+
+        Parameters
+        ----------
+        directory : str
+            Directory the session was recorded into, see `record_session`.
+
+        speed : Optional[float], optional
+            Replay speed relative to real time, None to replay as fast as possible, by default 1.0
+
+        start : Optional[float], optional
+            Recorded time to start the replay at, by default the start of the session
+
+        end : Optional[float], optional
+            Recorded time to end the replay at, by default the end of the session
+        """
+        self.directory = directory
+        """Directory of the replayed session."""
+        self._readers: Dict[str, SegmentReader] = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.exists(index_path(path)):
+                self._readers[name] = SegmentReader(path)
+        start_times = [reader.start_time for reader in self._readers.values() if len(reader)]
+        self.start = start if start is not None else min(start_times, default=0.0)
+        """Recorded time the replay starts at."""
+        self.end = end
+        """Recorded time the replay ends at, None for the end of the session."""
+        self.clock = ReplayClock(self.start, speed)
+        """Clock shared by the streams of the session."""
+
+    @property
+    def segments(self) -> List[str]:
+        """Names of the recorded segments."""
+        return list(self._readers)
+
+    def reader(self, name: str) -> SegmentReader:
+        """Returns the reader of a recorded segment."""
+        try:
+            return self._readers[name]
+        except KeyError:
+            raise ValueError(f"Segment {name} was not recorded in {self.directory}") from None
+
+    async def timestamped(self, name: str, zero_copy: bool = False) -> AsyncIterator[Tuple[float, Frame]]:
+        """Replays a segment as pairs of recorded time and item.
+
+        Parameters
+        ----------
+        name : str
+            Name of the segment, e.g. CAMERA_IMAGES.
+
+        zero_copy : bool, optional
+            If True, items are memoryviews into the segment instead of bytes, by default False
+        """
+        reader = self.reader(name)
+        for i in self._range(reader):
+            timestamp = reader.timestamp(i)
+            await self.clock.wait(timestamp, name)
+            yield timestamp, reader.frame(i) if zero_copy else reader.read(i)
+
+    async def merged(self,
+                     names: Optional[Iterable[str]] = None,
+                     zero_copy: bool = False) -> AsyncIterator[Tuple[str, float, Frame]]:
+        """Replays segments as one stream of segment name, recorded time and item, merged by recorded time.
+
+        Items recorded at the same time are ordered by segment name, so the order is the same on every run::
+
+            async for name, timestamp, item in replay.merged([CAMERA_IMAGES, counter_messages(0)]):
+                ...
+
+        Parameters
+        ----------
+        names : Optional[Iterable[str]], optional
+            Names of the segments, by default all segments
+
+        zero_copy : bool, optional
+            If True, items are memoryviews into the segments instead of bytes, by default False
+        """
+        readers = {name: self.reader(name) for name in (self.segments if names is None else names)}
+        for timestamp, name, i in heapq.merge(*(self._entries(name, reader) for name, reader in readers.items())):
+            await self.clock.wait(timestamp, name)
+            reader = readers[name]
+            yield name, timestamp, reader.frame(i) if zero_copy else reader.read(i)
+
+    def _entries(self, name: str, reader: SegmentReader) -> Iterator[Tuple[float, str, int]]:
+        for i in self._range(reader):
+            yield reader.timestamp(i), name, i
+
+    def _range(self, reader: SegmentReader) -> range:
+        """Returns the indices of the items of a segment within the replayed time span."""
+        return range(reader.seek(self.start), len(reader) if self.end is None else reader.seek(self.end))
+
+    async def _messages(self, name: str) -> AsyncIterator[str]:
+        async for _, message in self.timestamped(name):
+            yield str(message, 'utf-8')
+
+    async def camera_image_stream(self, zero_copy: bool = False) -> AsyncIterator[Frame]:
+        """Replays the camera images.
+
+        Parameters
+        ----------
+        zero_copy : bool, optional
+            If True, images are yielded as memoryviews into the segment instead of bytes, by default False
+        """
+        async for _, frame in self.timestamped(CAMERA_IMAGES, zero_copy):
+            yield frame
+
+    def camera_message_stream(self, x_api_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Replays the image recognition messages."""
+        return self._messages(CAMERA_MESSAGES)
+
+    def get_controller_message_stream(self, x_api_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Replays the console outputs."""
+        return self._messages(CONTROLLER_MESSAGES)
+
+    def get_controller_counters_message_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Replays the counter messages of a controller."""
+        return self._messages(counter_messages(controller_id))
+
+    async def get_controller_counters_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> AsyncIterator[List[CounterModel]]:
+        """Replays the counter messages of a controller, parsed to counter models."""
+        async with contextlib.aclosing(self.get_controller_counter_updates_stream(controller_id)) as updates:
+            async for counters in updates:
+                yield counters if isinstance(counters, list) else [counters]
+
+    async def get_controller_counter_updates_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> AsyncIterator[CounterUpdate]:
+        """Replays the counter messages of a controller as sent by the controller, all counters or a single one."""
+        adapter = type_adapter(CounterUpdate)
+        async for _, message in self.timestamped(counter_messages(controller_id)):
+            yield adapter.validate_json(message)
+
+    def close(self):
+        """Closes the segments. Memoryviews of replayed items must be released before."""
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+    async def __aenter__(self) -> "ReplaySession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Deque, Generic, Optional, Tuple, Type,
+                    TypeVar)
+
+import aiohttp
+
+from cvtxtclient.api.exceptions import InternalServerError
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.metrics import ClientMetrics
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_ON: Tuple[Type[BaseException], ...] = (
+    aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, InternalServerError)
+"""Errors after which a stream is reconnected."""
+
+
+class BackoffPolicy:
+    """Exponential backoff with jitter between reconnect attempts."""
+
+    def __init__(self,
+                 initial_delay: float = 0.1,
+                 max_delay: float = 5.0,
+                 multiplier: float = 2.0,
+                 jitter: float = 0.5,
+                 max_attempts: Optional[int] = None):
+        """Creates a new backoff policy.
+
+        Parameters
+        ----------
+        initial_delay : float, optional
+            Delay in seconds before the first reconnect attempt, by default 0.1
+
+        max_delay : float, optional
+            Upper bound of the delay in seconds, by default 5.0
+
+        multiplier : float, optional
+            Factor the delay grows by with every failed attempt, by default 2.0
+
+        jitter : float, optional
+            Fraction of the delay which is randomized, so clients do not reconnect in lockstep, by default 0.5
+
+        max_attempts : Optional[int], optional
+            Number of failed attempts after which the stream gives up, None to retry forever, by default None
+        """
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError("jitter must be between 0 and 1")
+        self.initial_delay = initial_delay
+        """Delay in seconds before the first reconnect attempt."""
+        self.max_delay = max_delay
+        """Upper bound of the delay in seconds."""
+        self.multiplier = multiplier
+        """Factor the delay grows by with every failed attempt."""
+        self.jitter = jitter
+        """Fraction of the delay which is randomized."""
+        self.max_attempts = max_attempts
+        """Number of failed attempts after which the stream gives up, None to retry forever."""
+
+    def delay(self, attempt: int) -> float:
+        """Returns the delay in seconds before the given attempt, counted from 0."""
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** attempt)
+        return delay * (1.0 - self.jitter) + random.uniform(0.0, delay * self.jitter)
+
+
+@dataclass
+class StreamGap:
+    """An interruption of a stream, from the connection drop to the first item after the reconnect."""
+
+    started: float
+    """Time.monotonic() when the drop was detected."""
+
+    duration: float
+    """Seconds no items were received."""
+
+    attempts: int
+    """Number of connection attempts needed."""
+
+    error: Optional[BaseException] = None
+    """The error which ended the connection, None if the server closed it."""
+
+
+class ResilientStream(Generic[T]):
+    """Keeps a stream alive across connection drops.
+
+    The stream is reconnected with jittered backoff whenever it ends or fails with one of the
+    `retry_on` errors, the consumer's `async for` loop continues transparently. Interruptions are
+    recorded in `gaps`::
+
+        stream = api.resilient_stream(lambda: api.get_controller_message_stream(key))
+        async for message in stream:
+            ...
+    """
+
+    def __init__(self,
+                 connect: Callable[[], AsyncIterator[T]],
+                 backoff: Optional[BackoffPolicy] = None,
+                 retry_on: Tuple[Type[BaseException], ...] = DEFAULT_RETRY_ON,
+                 recover: Optional[Callable[[Optional[BaseException]], Awaitable[None]]] = None,
+                 on_gap: Optional[Callable[[StreamGap], None]] = None,
+                 metrics: Optional["ClientMetrics"] = None,
+                 max_gaps: int = 100):
+        """Creates a new resilient stream.
+
+        Parameters
+        ----------
+        connect : Callable[[], AsyncIterator[T]]
+            Opens a new connection of the underlying stream.
+
+        backoff : Optional[BackoffPolicy], optional
+            Delays between reconnect attempts, by default BackoffPolicy()
+
+        retry_on : Tuple[Type[BaseException], ...], optional
+            Errors after which the stream is reconnected, other errors are raised to the consumer,
+            by default DEFAULT_RETRY_ON
+
+        recover : Optional[Callable[[Optional[BaseException]], Awaitable[None]]], optional
+            Called with the last error before every reconnect attempt, e.g. to restart the camera, by default None
+
+        on_gap : Optional[Callable[[StreamGap], None]], optional
+            Called when the stream delivers again after an interruption, by default None
+
+        metrics : Optional[ClientMetrics], optional
+            If given, reconnects are counted as `stream_reconnects`, by default None
+
+        max_gaps : int, optional
+            Number of recent gaps kept in `gaps`, by default 100
+        """
+        self.connect = connect
+        self.backoff = backoff if backoff is not None else BackoffPolicy()
+        """Delays between reconnect attempts."""
+        self.retry_on = retry_on
+        """Errors after which the stream is reconnected."""
+        self.recover = recover
+        self.on_gap = on_gap
+        self.metrics = metrics
+        self.gaps: Deque[StreamGap] = deque(maxlen=max_gaps)
+        """The most recent interruptions."""
+        self.reconnects = 0
+        """Number of successful reconnects."""
+        self.gap_time = 0.0
+        """Total seconds the stream was interrupted."""
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self._iterate()
+
+    def _end_gap(self, started: float, attempts: int, error: Optional[BaseException]):
+        gap = StreamGap(started=started, duration=time.monotonic() - started, attempts=attempts, error=error)
+        self.gaps.append(gap)
+        self.reconnects += 1
+        self.gap_time += gap.duration
+        if self.metrics is not None:
+            self.metrics.increment("stream_reconnects")
+        if self.on_gap is not None:
+            self.on_gap(gap)
+
+    async def _iterate(self) -> AsyncIterator[T]:
+        attempt = 0
+        error: Optional[BaseException] = None
+        gap_started: Optional[float] = None
+        gap_error: Optional[BaseException] = None
+        delivered = False
+        while True:
+            if attempt > 0:
+                if self.backoff.max_attempts is not None and attempt > self.backoff.max_attempts:
+                    if error is not None:
+                        raise error
+                    return
+                await asyncio.sleep(self.backoff.delay(attempt - 1))
+                if self.recover is not None:
+                    try:
+                        await self.recover(error)
+                    except self.retry_on as e:
+                        error = e
+                        attempt += 1
+                        continue
+            source = self.connect()
+            try:
+                async for item in source:
+                    if gap_started is not None:
+                        self._end_gap(gap_started, attempt, gap_error)
+                        gap_started = None
+                    attempt = 0
+                    delivered = True
+                    yield item
+                error = None
+            except self.retry_on as e:
+                error = e
+            finally:
+                aclose = getattr(source, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            if delivered and gap_started is None:
+                gap_started = time.monotonic()
+                gap_error = error
+                logger.warning("Stream interrupted, reconnecting: %s", error or "closed by the server")
+            attempt += 1
@@ -0,0 +1,81 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.metrics import ClientMetrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A call in flight and the number of callers waiting for it."""
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers asking for the same key.
+
+    The first caller starts the call, callers arriving while it runs wait for the same result or
+    error instead of starting their own. Once the call completed the next caller starts a new one,
+    so no result outlives its call. The call is cancelled only when all of its callers are::
+
+        flight = SingleFlight()
+        inputs = await flight.run(url, lambda: fetch(url))
+    """
+
+    def __init__(self):
+        self.started = 0
+        """Number of calls started."""
+        self.shared = 0
+        """Number of callers which joined a call in flight instead of starting one, i.e. the saved calls."""
+        self._calls: Dict[Hashable, _Call] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
+
+    async def run(self,
+                  key: Hashable,
+                  call: Callable[[], Awaitable[T]],
+                  metrics: Optional["ClientMetrics"] = None) -> T:
+        """Returns the result of the call in flight for a key, starting the call if there is none.
+
+        Parameters
+        ----------
+        key : Hashable
+            Identifies the call, callers with equal keys share it.
+
+        call : Callable[[], Awaitable[T]]
+            Starts the call, only invoked if none is in flight for the key.
+
+        metrics : Optional[ClientMetrics], optional
+            If given, callers joining a call in flight are counted as `single_flight_saved`, by default None
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            entry = self._calls[key] = _Call(asyncio.ensure_future(call()))
+            entry.task.add_done_callback(lambda task: self._done(key, entry))
+            self.started += 1
+        else:
+            self.shared += 1
+            if metrics is not None:
+                metrics.increment("single_flight_saved")
+        entry.waiters += 1
+        try:
+            # Shielded, so a cancelled caller does not cancel the call of the others.
+            return await asyncio.shield(entry.task)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                entry.task.cancel()
+
+    def _done(self, key: Hashable, entry: _Call):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+        if not entry.task.cancelled():
+            # Mark the error as retrieved, the callers may all have been cancelled before it was raised.
+            entry.task.exception()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Generic, List, Optional, TypeVar
+
+from cvtxtclient.models import Counter as CounterModel, Input as InputModel
+
+if TYPE_CHECKING:
+    from cvtxtclient.api.controller import ControllerAPI
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MirroredValue(Generic[T]):
+    """A locally mirrored value together with its freshness."""
+
+    value: T
+    """The mirrored value."""
+
+    updated_at: float
+    """Time of the last update, as returned by time.monotonic()."""
+
+    stale_after: float
+    """Age in seconds after which the value is considered stale."""
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last update."""
+        return time.monotonic() - self.updated_at
+
+    @property
+    def stale(self) -> bool:
+        """Whether the value is older than its staleness threshold."""
+        return self.age > self.stale_after
+
+
+class ControllerStateMirror:
+    """Keeps a local snapshot of the counters and inputs of a controller.
+
+    Counters follow the counters message stream, inputs are polled as there is no stream for them.
+    Reads are served from memory, use `wait_for_update` to wait for fresh data::
+
+        async with ControllerStateMirror(api, controller_id=0) as mirror:
+            await mirror.wait_for_update()
+            count = mirror.get_counter(0).value.count
+    """
+
+    COUNTERS = "counters"
+    INPUTS = "inputs"
+
+    def __init__(self,
+                 api: "ControllerAPI",
+                 controller_id: int,
+                 input_poll_interval: Optional[float] = 0.1,
+                 stale_after: float = 0.5,
+                 stream_counters: bool = True,
+                 counter_poll_interval: float = 0.1,
+                 retry_interval: float = 1.0):
+        """Creates a new state mirror. Nothing is mirrored before the mirror is started.
+
+        Parameters
+        ----------
+        api : ControllerAPI
+            The api client used to receive the state.
+
+        controller_id : int
+            Id of the controller to mirror.
+
+        input_poll_interval : Optional[float], optional
+            Seconds between polls of the inputs, None to not mirror inputs, by default 0.1
+
+        stale_after : float, optional
+            Age in seconds after which mirrored values are considered stale, by default 0.5
+
+        stream_counters : bool, optional
+            Follow the counters message stream. If False, counters are polled as well, by default True
+
+        counter_poll_interval : float, optional
+            Seconds between polls of the counters, if they are not streamed, by default 0.1
+
+        retry_interval : float, optional
+            Seconds to wait before reconnecting a failed stream or poll, by default 1.0
+        """
+        self.api = api
+        """The api client used to receive the state."""
+        self.controller_id = controller_id
+        """Id of the mirrored controller."""
+        self.input_poll_interval = input_poll_interval
+        """Seconds between polls of the inputs."""
+        self.stale_after = stale_after
+        """Age in seconds after which mirrored values are considered stale."""
+        self.stream_counters = stream_counters
+        """Whether counters follow the message stream."""
+        self.counter_poll_interval = counter_poll_interval
+        """Seconds between polls of the counters, if they are not streamed."""
+        self.retry_interval = retry_interval
+        """Seconds to wait before reconnecting a failed stream or poll."""
+        self.last_error: Optional[Exception] = None
+        """The most recent error while receiving the state."""
+        self._counters: Dict[int, MirroredValue[CounterModel]] = {}
+        self._inputs: Dict[int, MirroredValue[InputModel]] = {}
+        self._generations = {self.COUNTERS: 0, self.INPUTS: 0}
+        self._changed = asyncio.Condition()
+        self._tasks: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "ControllerStateMirror":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Starts mirroring in background tasks."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        if self.stream_counters:
+            self._tasks.append(loop.create_task(self._follow_counters()))
+        else:
+            self._tasks.append(loop.create_task(self._poll(
+                self.COUNTERS, self.api.get_controller_counters, self.counter_poll_interval)))
+        if self.input_poll_interval is not None:
+            self._tasks.append(loop.create_task(self._poll(
+                self.INPUTS, self.api.get_controller_inputs, self.input_poll_interval)))
+
+    async def stop(self):
+        """Stops mirroring. The last snapshot stays readable."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_counter(self, counter_id: int) -> MirroredValue[CounterModel]:
+        """Returns the mirrored counter with the specified ID.
+
+        Raises
+        ------
+        KeyError
+            If the counter was not received yet.
+        """
+        return self._counters[counter_id]
+
+    def get_counters(self) -> Dict[int, MirroredValue[CounterModel]]:
+        """Returns all mirrored counters by their ID."""
+        return dict(self._counters)
+
+    def get_input(self, input_id: int) -> MirroredValue[InputModel]:
+        """Returns the mirrored input with the specified ID.
+
+        Raises
+        ------
+        KeyError
+            If the input was not received yet.
+        """
+        return self._inputs[input_id]
+
+    def get_inputs(self) -> Dict[int, MirroredValue[InputModel]]:
+        """Returns all mirrored inputs by their ID."""
+        return dict(self._inputs)
+
+    async def wait_for_update(self, kind: Optional[str] = None, timeout: Optional[float] = None):
+        """Waits until the next update of the mirrored state arrived.
+
+        Parameters
+        ----------
+        kind : Optional[str], optional
+            Either ControllerStateMirror.COUNTERS or ControllerStateMirror.INPUTS to wait for
+            a specific update, by default None for any update
+
+        timeout : Optional[float], optional
+            Maximum seconds to wait, by default None
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If no update arrived within the timeout.
+        """
+        kinds = [kind] if kind is not None else list(self._generations)
+        async with self._changed:
+            seen = [self._generations[k] for k in kinds]
+            predicate = lambda: any(self._generations[k] != g for k, g in zip(kinds, seen))  # noqa: E731
+            await asyncio.wait_for(self._changed.wait_for(predicate), timeout)
+
+    async def _update(self, kind: str, values: list):
+        """Replaces the mirrored counters or inputs by a list of all of them, indexed by their id.
+
+        The list is a complete snapshot, entries removed by a reconfiguration are dropped.
+        """
+        now = time.monotonic()
+        mirrored = self._counters if kind == self.COUNTERS else self._inputs
+        mirrored.clear()
+        mirrored.update((i, MirroredValue(value, now, self.stale_after)) for i, value in enumerate(values))
+        await self._notify(kind)
+
+    async def _update_counter(self, counter: CounterModel):
+        """Merges a single counter into the mirrored counters.
+
+        A single counter carries no id, it is matched by name against the counters of the last full update.
+        """
+        counter_id = next((i for i, mirrored in self._counters.items()
+                           if counter.name is not None and mirrored.value.name == counter.name), None)
+        if counter_id is None:
+            logger.debug(f"Ignoring update of unknown counter {counter.name!r} of controller {self.controller_id}")
+            return
+        self._counters[counter_id] = MirroredValue(counter, time.monotonic(), self.stale_after)
+        await self._notify(self.COUNTERS)
+
+    async def _notify(self, kind: str):
+        async with self._changed:
+            self._generations[kind] += 1
+            self._changed.notify_all()
+
+    async def _follow_counters(self):
+        while True:
+            try:
+                async for update in self.api.get_controller_counter_updates_stream(self.controller_id):
+                    if isinstance(update, list):
+                        await self._update(self.COUNTERS, update)
+                    else:
+                        await self._update_counter(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = e
+                logger.warning(f"Counter stream of controller {self.controller_id} failed: {e}")
+            await asyncio.sleep(self.retry_interval)
+
+    async def _poll(self, kind: str, fetch, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self._update(kind, await fetch(self.controller_id, use_cache=False))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = e
+                logger.warning(f"Polling {kind} of controller {self.controller_id} failed: {e}")
+                await asyncio.sleep(self.retry_interval)
+                continue
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
@@ -0,0 +1,429 @@
+import asyncio
+import concurrent.futures
+import threading
+from concurrent.futures import Future
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Callable, Coroutine, Dict, Generic, Iterable, Iterator, List,
+                    Optional, Tuple, TypeVar)
+
+from cvtxtclient.api.batch import Batch, BatchResult
+from cvtxtclient.api.changes import ChangeEvent
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI, CounterUpdate, Timeout
+from cvtxtclient.api.decoding import ColorMode, DecodedFrame
+from cvtxtclient.api.delivery import BufferedStream, DeliveryPolicy
+from cvtxtclient.api.exceptions import RequestTimeoutError
+from cvtxtclient.api.multipart import Frame
+from cvtxtclient.api.polling import InputSample, PollStats
+from cvtxtclient.api.resilience import BackoffPolicy
+from cvtxtclient.models import (
+    Controller as ControllerModel,
+    Counter as CounterModel,
+    Input as InputModel,
+    CameraConfig,
+)
+from cvtxtclient.models.input import InputDevice
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+if TYPE_CHECKING:
+    from cvtxtclient.models.image_recognition_config import ImageRecognitionConfig
+
+T = TypeVar('T')
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever in a daemon thread.
+
+    Coroutines are submitted from any thread. A process wide instance is returned by `default`,
+    so all blocking clients share one loop and their connection pools live on it.
+    """
+
+    _default: Optional["BackgroundLoop"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, name: str = "cvtxt-loop"):
+        self.loop = asyncio.new_event_loop()
+        """The event loop running in the background thread."""
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def default(cls) -> "BackgroundLoop":
+        """Returns the shared background loop, starting it on first use."""
+        with cls._default_lock:
+            if cls._default is None or not cls._default.running:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Schedules a coroutine on the loop and returns a future for its result."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking calls can not be made from within the background loop")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Runs a coroutine on the loop and blocks until its result is available."""
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        """Stops the loop and waits for its thread to finish."""
+        if self.running:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+
+
+class SyncStream(Generic[T]):
+    """Blocking iterator over an async stream running on a background loop.
+
+    Items are pulled one at a time, so the consumer speed sets the pace unless the stream is buffered
+    with a delivery policy. Close the stream, or use it as a context manager, to release the connection.
+    """
+
+    def __init__(self,
+                 runner: BackgroundLoop,
+                 source: Callable[[], AsyncIterator[T]],
+                 policy: Optional[DeliveryPolicy] = None,
+                 maxsize: int = 1):
+        self._runner = runner
+        self._source = source
+        self._policy = policy
+        self._maxsize = maxsize
+        self._iterator: Optional[AsyncIterator[T]] = None
+        self._closed = False
+
+    @property
+    def dropped(self) -> int:
+        """Number of items dropped by the delivery policy."""
+        return self._iterator.dropped if isinstance(self._iterator, BufferedStream) else 0
+
+    async def _next(self) -> Tuple[bool, Optional[T]]:
+        if self._iterator is None:
+            iterator = self._source()
+            if self._policy is not None:
+                iterator = BufferedStream(iterator, policy=self._policy, maxsize=self._maxsize)
+                iterator.start()
+            self._iterator = iterator
+        try:
+            return True, await self._iterator.__anext__()
+        except StopAsyncIteration:
+            return False, None
+
+    async def _close(self):
+        if isinstance(self._iterator, BufferedStream):
+            await self._iterator.stop()
+        elif self._iterator is not None:
+            await self._iterator.aclose()
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        if self._closed:
+            raise StopIteration
+        has_item, item = self._runner.run(self._next())
+        if not has_item:
+            self.close()
+            raise StopIteration
+        return item
+
+    def close(self):
+        """Closes the underlying stream."""
+        if not self._closed:
+            self._closed = True
+            self._runner.run(self._close())
+
+    def __enter__(self) -> "SyncStream[T]":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Subscription:
+    """Handle of a stream which is forwarded to a callback on the background loop."""
+
+    def __init__(self, future: "Future[None]"):
+        self._future = future
+
+    @property
+    def active(self) -> bool:
+        return not self._future.done()
+
+    def cancel(self):
+        """Stops forwarding and closes the stream."""
+        self._future.cancel()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Blocks until the stream ended, raising its error if it failed."""
+        self._future.result(timeout)
+
+
+class SyncControllerAPI:
+    """Blocking api client for the controller.
+
+    Mirrors the methods of ControllerAPI and runs them on a long-lived background event loop,
+    which is shared by all blocking clients by default, so scripts and GUI threads do not need
+    their own event loop and connections are reused across calls::
+
+        with SyncControllerAPI(APIConfig(base_url)) as api:
+            api.start_camera(CameraConfig())
+            with api.camera_image_stream(policy=DeliveryPolicy.LATEST) as frames:
+                for frame in frames:
+                    ...
+
+    An instance can be shared between threads, its calls then share one connection pool.
+    Methods must not be called from within the background loop itself, e.g. from a subscription callback.
+    """
+
+    def __init__(self,
+                 config: APIConfig,
+                 timeout: Optional[float] = None,
+                 loop: Optional[BackgroundLoop] = None):
+        """Creates a new blocking client.
+
+        Parameters
+        ----------
+        config : APIConfig
+            Configuration for the API client.
+
+        timeout : Optional[float], optional
+            Seconds to wait for the result of a call before cancelling it and raising a RequestTimeoutError,
+            by default None
+
+        loop : Optional[BackgroundLoop], optional
+            Loop the calls are run on, by default the shared background loop
+        """
+        self.runner = loop if loop is not None else BackgroundLoop.default()
+        """The background loop the calls are run on."""
+        self.timeout = timeout
+        """Seconds to wait for the result of a call."""
+        self.api = ControllerAPI(config)
+        """The async client the calls are delegated to."""
+
+    @property
+    def config(self) -> APIConfig:
+        return self.api.config
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        future = self.runner.submit(coro)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError as e:
+            # Cancel the call on the loop, it would otherwise keep running and holding its connection.
+            future.cancel()
+            raise RequestTimeoutError(f"Request Timeout: no result within {self.timeout} s") from e
+
+    def close(self):
+        """Closes the connection pool of the client."""
+        self._run(self.api.close())
+
+    def __enter__(self) -> "SyncControllerAPI":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def subscribe(self, stream: Callable[[], AsyncIterator[T]], callback: Callable[[T], Any]) -> Subscription:
+        """Forwards every item of an async stream of the client to a callback.
+
+        The callback runs on the background loop thread and should hand the item over quickly,
+        e.g. by emitting a Qt signal or putting it into a queue::
+
+            subscription = api.subscribe(lambda: api.api.get_controller_counters_stream(0), on_counters)
+
+        Parameters
+        ----------
+        stream : Callable[[], AsyncIterator[T]]
+            Factory creating the async stream, called on the background loop.
+
+        callback : Callable[[T], Any]
+            Called with each item.
+        """
+        async def forward():
+            async for item in stream():
+                callback(item)
+        return Subscription(self.runner.submit(forward()))
+
+    def batch(self, controller_id: int, max_in_flight: Optional[int] = None) -> Batch:
+        """Creates a batch of output and counter operations for a controller, run it with `execute_batch`."""
+        return self.api.batch(controller_id, max_in_flight=max_in_flight)
+
+    def execute_batch(self, batch: Batch) -> BatchResult:
+        """Executes all operations of a batch concurrently."""
+        return self._run(batch.execute())
+
+    def add_camera_image_recognition_config(self, image_recognition_config: "ImageRecognitionConfig"):
+        """Defines the image recognition configuration of the controller camera."""
+        return self._run(self.api.add_camera_image_recognition_config(image_recognition_config))
+
+    def camera_message_stream(self, x_api_key: Optional[str] = None) -> SyncStream[str]:
+        """Retrieves the current state of the image recognition."""
+        return SyncStream(self.runner, lambda: self.api.camera_message_stream(x_api_key))
+
+    def start_camera(self, camera_config: CameraConfig):
+        """Starts the video stream of the camera."""
+        return self._run(self.api.start_camera(camera_config))
+
+    def camera_image_stream(self,
+                            policy: Optional[DeliveryPolicy] = None,
+                            maxsize: int = 1,
+                            zero_copy: bool = False) -> SyncStream[Frame]:
+        """Retrieves a stream of images from the controller camera.
+
+        If a policy is given, the stream is drained in the background and frames
+        the consumer can not keep up with are dropped accordingly.
+        """
+        return SyncStream(self.runner, lambda: self.api.camera_image_stream(zero_copy=zero_copy),
+                          policy=policy, maxsize=maxsize)
+
+    def resilient_camera_image_stream(self,
+                                      camera_config: Optional[CameraConfig] = None,
+                                      policy: Optional[DeliveryPolicy] = None,
+                                      maxsize: int = 1,
+                                      zero_copy: bool = False,
+                                      backoff: Optional[BackoffPolicy] = None) -> SyncStream[Frame]:
+        """Retrieves a stream of images from the controller camera, which reconnects when the connection drops.
+
+        If a camera config is given, the camera is restarted when the controller reports it as not running.
+        """
+        return SyncStream(self.runner, lambda: self.api.resilient_camera_image_stream(
+            camera_config=camera_config, zero_copy=zero_copy, backoff=backoff).__aiter__(),
+            policy=policy, maxsize=maxsize)
+
+    def buffered_camera_image_stream(self,
+                                     policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                                     maxsize: int = 1,
+                                     zero_copy: bool = False) -> SyncStream[Frame]:
+        """Retrieves a stream of images from the controller camera, which is read in a background task."""
+        return SyncStream(self.runner, lambda: self.api.buffered_camera_image_stream(
+            policy=policy, maxsize=maxsize, zero_copy=zero_copy).__aiter__())
+
+    def camera_subscription(self,
+                            policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                            maxsize: int = 1) -> SyncStream[Frame]:
+        """Subscribes to the camera image stream shared by all subscribers of this client, see `ControllerAPI.camera_hub`."""
+        return SyncStream(self.runner, lambda: self.api.camera_hub().subscribe(policy=policy, maxsize=maxsize))
+
+    def decoded_camera_image_stream(self,
+                                    mode: ColorMode = ColorMode.RGB,
+                                    workers: int = 2,
+                                    policy: Optional[DeliveryPolicy] = None,
+                                    maxsize: int = 1) -> SyncStream[DecodedFrame]:
+        """Retrieves a stream of decoded images from the controller camera."""
+        return SyncStream(self.runner, lambda: self.api.decoded_camera_image_stream(
+            mode=mode, workers=workers, policy=policy, maxsize=maxsize))
+
+    def stop_camera(self):
+        """Stops the video stream of the camera."""
+        return self._run(self.api.stop_camera())
+
+    def get_controllers(self, timeout: Timeout = None) -> List[ControllerModel]:
+        """Returns information about controller and controllers connected to it."""
+        return self._run(self.api.get_controllers(timeout))
+
+    def get_controller_message_stream(self, x_api_key: Optional[str] = None) -> SyncStream[str]:
+        """Retrieves all console outputs for a running program."""
+        return SyncStream(self.runner, lambda: self.api.get_controller_message_stream(x_api_key))
+
+    def get_controller_by_id(self, controller_id: int, timeout: Timeout = None) -> ControllerModel:
+        """Returns a controller with the specified ID."""
+        return self._run(self.api.get_controller_by_id(controller_id, timeout))
+
+    def init_controller_by_id(self, controller_id: int):
+        """Initializes a controller with the specified ID."""
+        return self._run(self.api.init_controller_by_id(controller_id))
+
+    def get_controller_counters(self,
+                                controller_id: int,
+                                timeout: Timeout = None,
+                                use_cache: bool = True) -> List[CounterModel]:
+        """Returns a list of all initialized counters."""
+        return self._run(self.api.get_controller_counters(controller_id, timeout, use_cache))
+
+    def add_controller_counters(self, controller_id: int, counters: List[CounterModel]):
+        """Initializes a list of counters."""
+        return self._run(self.api.add_controller_counters(controller_id, counters))
+
+    def get_controller_counters_message_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> SyncStream[str]:
+        """Retrieves current state of controller counters (updating every 100 ms)."""
+        return SyncStream(self.runner, lambda: self.api.get_controller_counters_message_stream(controller_id, x_api_key))
+
+    def get_controller_counters_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> SyncStream[List[CounterModel]]:
+        """Retrieves current state of controller counters (updating every 100 ms), parsed to counter models."""
+        return SyncStream(self.runner, lambda: self.api.get_controller_counters_stream(controller_id, x_api_key))
+
+    def get_controller_counter_updates_stream(self, controller_id: int, x_api_key: Optional[str] = None) -> SyncStream[CounterUpdate]:
+        """Retrieves current state of controller counters (updating every 100 ms), as sent by the controller."""
+        return SyncStream(self.runner, lambda: self.api.get_controller_counter_updates_stream(controller_id, x_api_key))
+
+    def get_controller_counter_by_id(self, controller_id: int, counter_id: int, timeout: Timeout = None) -> CounterModel:
+        """Returns a counter with the specified ID."""
+        return self._run(self.api.get_controller_counter_by_id(controller_id, counter_id, timeout))
+
+    def update_controller_counter_by_id(self, controller_id: int, counter_id: int):
+        """Resets a counter with the specified ID."""
+        return self._run(self.api.update_controller_counter_by_id(controller_id, counter_id))
+
+    def get_controller_inputs(self,
+                              controller_id: int,
+                              timeout: Timeout = None,
+                              use_cache: bool = True) -> List[InputModel]:
+        """Returns a list of all initialized inputs."""
+        return self._run(self.api.get_controller_inputs(controller_id, timeout, use_cache))
+
+    def input_subscription(self,
+                           controller_id: int,
+                           input_id: int,
+                           rate: float = 10.0,
+                           policy: DeliveryPolicy = DeliveryPolicy.LATEST,
+                           maxsize: int = 1) -> SyncStream[InputSample]:
+        """Subscribes to an input polled by the input poller of this client, see `ControllerAPI.input_poller`."""
+        return SyncStream(self.runner, lambda: self.api.input_poller().subscribe(
+            controller_id, input_id, rate=rate, policy=policy, maxsize=maxsize))
+
+    def input_poll_stats(self, controller_id: int) -> PollStats:
+        """Returns the rates and latency of the polling of a controller, see `InputPoller.stats`."""
+        async def stats():
+            return self.api.input_poller().stats(controller_id)
+        return self._run(stats())
+
+    def input_changes(self,
+                      controller_id: int,
+                      input_id: int,
+                      rate: float = 10.0,
+                      deadbands: Optional[Dict[InputDevice, float]] = None,
+                      hysteresis: Optional[Tuple[float, float]] = None,
+                      min_interval: float = 0.0) -> SyncStream[ChangeEvent[InputModel]]:
+        """Yields only the changes of an input beyond the deadband of its device, see `changes.input_changes`."""
+        return SyncStream(self.runner, lambda: self.api.input_changes(
+            controller_id, input_id, rate, deadbands, hysteresis, min_interval))
+
+    def counter_changes(self,
+                        controller_id: int,
+                        counter_ids: Optional[Iterable[int]] = None,
+                        deadband: float = 0.0,
+                        min_interval: float = 0.0) -> SyncStream[ChangeEvent[CounterModel]]:
+        """Yields only the count changes of counters, see `changes.counter_changes`."""
+        return SyncStream(self.runner, lambda: self.api.counter_changes(controller_id, counter_ids, deadband, min_interval))
+
+    def add_controller_inputs(self, controller_id: int, inputs: List[InputModel]):
+        """Initializes a list of inputs."""
+        return self._run(self.api.add_controller_inputs(controller_id, inputs))
+
+    def update_controller_motor_by_id(self, controller_id: int, motor_id: int, motor: Motor):
+        """Sets the configuration of a motor with the specified ID."""
+        return self._run(self.api.update_controller_motor_by_id(controller_id, motor_id, motor))
+
+    def update_controller_servomotor_by_id(self, controller_id: int, servomotor_id: int, servomotor: Servomotor):
+        """Sets the configuration of a servomotor with the specified ID."""
+        return self._run(self.api.update_controller_servomotor_by_id(controller_id, servomotor_id, servomotor))
@@ -1,11 +1,46 @@
-from .ball_detector import BallDetector
-from .camera_config import CameraConfig
-from .controller import Controller
-from .motor import Motor
-from .output import Output
-from .counter import Counter
-from .input import Input
-from .image_recognition_config import ImageRecognitionConfig
-from .enabled import Enabled
-from .debugger_arguments import DebuggerArguments
-from .debugger_response import DebuggerResponse
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .ball_detector import BallDetector
+    from .camera_config import CameraConfig
+    from .controller import Controller
+    from .motor import Motor
+    from .output import Output
+    from .counter import Counter
+    from .input import Input
+    from .image_recognition_config import ImageRecognitionConfig
+    from .enabled import Enabled
+    from .debugger_arguments import DebuggerArguments
+    from .debugger_response import DebuggerResponse
+
+# Models are imported on first access, so importing a few of them does not build the schemas of all.
+_MODULES = {
+    "BallDetector": ".ball_detector",
+    "CameraConfig": ".camera_config",
+    "Controller": ".controller",
+    "Motor": ".motor",
+    "Output": ".output",
+    "Counter": ".counter",
+    "Input": ".input",
+    "ImageRecognitionConfig": ".image_recognition_config",
+    "Enabled": ".enabled",
+    "DebuggerArguments": ".debugger_arguments",
+    "DebuggerResponse": ".debugger_response",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    try:
+        module = _MODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
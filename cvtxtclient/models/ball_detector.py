@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from .rectangle import Rectangle
 
 class BallDetector(BaseModel):
     """Configuration for detecting balls in an image."""
+    model_config = ConfigDict(defer_build=True)
     area: Optional[Rectangle] = None
     """The rectangular area to search within."""
     end_range_value: Optional[int] = 100
@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class Breakpoint(BaseModel):
     """Represents a breakpoint in the debugger."""
+    model_config = ConfigDict(defer_build=True)
     enabled: Optional[bool] = None
     """Indicates if the breakpoint is enabled."""
     filename: str
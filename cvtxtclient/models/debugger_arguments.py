@@ -1,10 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from .breakpoint import Breakpoint
 from .expression import Expression
 
 class DebuggerArguments(BaseModel):
     """Arguments for the debugger."""
+    model_config = ConfigDict(defer_build=True)
     breakpoints: Optional[List[Breakpoint]] = None
     """List of breakpoints to set."""
     expressions: Optional[List[Expression]] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List
 from .breakpoint import Breakpoint
 from .program_location import ProgramLocation
@@ -6,6 +6,7 @@ from .expression import Expression
 
 class DebuggerResponse(BaseModel):
     """Response from the debugger."""
+    model_config = ConfigDict(defer_build=True)
     breakpoints: List[Breakpoint]
     """List of active breakpoints."""
     callstack: List[ProgramLocation]
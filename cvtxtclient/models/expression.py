@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class Expression(BaseModel):
     """Represents an expression to be evaluated by the debugger."""
+    model_config = ConfigDict(defer_build=True)
     command: Optional[str] = None
     """Debugger command associated with the expression."""
     expression_key: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from .ball_detector import BallDetector
 from .rectangle import Rectangle
@@ -8,6 +8,7 @@ from .motion_detector import MotionDetector
 
 class ImageRecognitionConfig(BaseModel):
     """Configuration for image recognition on the camera."""
+    model_config = ConfigDict(defer_build=True)
     ball_detectors: Optional[List[BallDetector]] = None
     """List of ball detectors."""
     blocked_areas: Optional[List[Rectangle]] = None
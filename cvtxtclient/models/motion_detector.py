@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from .rectangle import Rectangle
 
 class MotionDetector(BaseModel):
     """Configuration for detecting motion in an image."""
+    model_config = ConfigDict(defer_build=True)
     area: Optional[Rectangle] = None
     """The rectangular area to search for motion within."""
     name: Optional[str] = None
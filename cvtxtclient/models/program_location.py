@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class ProgramLocation(BaseModel):
     """Represents a location in the program."""
+    model_config = ConfigDict(defer_build=True)
     current_frame: Optional[bool] = False
     """Indicates if this is the current frame."""
     filename: Optional[str] = None
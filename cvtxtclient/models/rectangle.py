@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class Rectangle(BaseModel):
     """Represents a rectangular area."""
+    model_config = ConfigDict(defer_build=True)
     height: Optional[int] = None
     """Height of the rectangle."""
     width: Optional[int] = None
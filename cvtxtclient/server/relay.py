@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""Relay serving the REST API of one TXT controller to many clients.
+
+The relay holds a single upstream connection per stream through ControllerAPI and re-serves it to
+any number of downstream clients, e.g. several browsers running js-ui plus Python tools. GET requests
+are answered from short-lived snapshots held by the api's ResponseCache and commands are passed through. Run it with::
+
+    python -m cvtxtclient.server.relay --upstream http://192.168.7.2/api/v1 --api-key <key> --port 8080
+"""
+import argparse
+import asyncio
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+from pydantic import BaseModel
+
+from cvtxtclient.api.cache import ResponseCache
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.api.delivery import DeliveryPolicy
+from cvtxtclient.api.exceptions import (APIError, BadRequestError, InternalServerError, NotFoundError,
+                                        RequestTimeoutError)
+from cvtxtclient.api.hub import StreamHub
+from cvtxtclient.models import CameraConfig, Counter as CounterModel, ImageRecognitionConfig, Input as InputModel
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+MJPEG_BOUNDARY = "frame"
+"""Boundary of the relayed image stream, the same as used by the TXT controller."""
+
+_MJPEG_PART_HEADER = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n\r\n".encode()
+
+_SSE_HEARTBEAT = b": heartbeat\n\n"
+"""Comment sent on idle event streams, ignored by event stream clients."""
+
+SNAPSHOT_ENDPOINTS = ("discovery", "controller", "counters", "counter", "inputs")
+"""Names of the GET endpoints the relay answers from snapshots."""
+
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PATCH, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Accept, X-API-KEY',
+}
+
+
+async def _sse_events(messages: AsyncIterable[str]) -> AsyncIterator[bytes]:
+    """Encodes messages as server-sent events, once for all listeners."""
+    async with aclosing(messages.__aiter__()) as iterator:
+        async for message in iterator:
+            yield "".join(f"data: {line}\n" for line in message.splitlines() or [""]).encode() + b"\n"
+
+
+def snapshot_cache(ttl: float = 0.1) -> ResponseCache:
+    """Returns a cache serving the responses of the relayed GET endpoints to further clients for ttl seconds.
+
+    Together with single flight, repeated and concurrent GET requests of the clients share one upstream request::
+
+        api = ControllerAPI(config, cache=snapshot_cache(), single_flight=True)
+    """
+    return ResponseCache({name: ttl for name in SNAPSHOT_ENDPOINTS})
+
+
+class ControllerRelay:
+    """aiohttp server re-serving one controller to many clients.
+
+    Use as async context manager, the relayed api is then available under `base_url`. GET requests are
+    shared between clients as far as the api caches and single flights them::
+
+        async with ControllerAPI(APIConfig("http://192.168.7.2/api/v1", api_key), cache=snapshot_cache(),
+                                 single_flight=True) as upstream:
+            async with ControllerRelay(upstream, port=8080) as relay:
+                ...
+    """
+
+    def __init__(self,
+                 api: ControllerAPI,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 api_key: Optional[str] = None,
+                 heartbeat_interval: float = 1.0):
+        """Creates a new relay.
+
+        Parameters
+        ----------
+        api : ControllerAPI
+            Client of the upstream controller.
+
+        host : str, optional
+            Host to bind to, by default "127.0.0.1"
+
+        port : int, optional
+            Port to bind to, 0 for a free port, by default 0
+
+        api_key : Optional[str], optional
+            API key downstream clients have to send, None to accept any, by default None
+
+        heartbeat_interval : float, optional
+            Seconds a relayed stream may stay idle before the relay checks whether its client is still
+            connected and sends a heartbeat on event streams, by default 1.0
+        """
+        self.api = api
+        """Client of the upstream controller."""
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        """API key downstream clients have to send, None to accept any."""
+        self.heartbeat_interval = heartbeat_interval
+        """Seconds a relayed stream may stay idle before the relay checks whether its client is still connected."""
+        self.requests = 0
+        """Number of handled downstream requests."""
+        self.camera_config: Optional[CameraConfig] = None
+        """Configuration the camera was last started with through the relay."""
+        self._image_hub: StreamHub[bytes] = StreamHub(self._image_parts)
+        self._event_hubs: Dict[Tuple[str, int], StreamHub[bytes]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    @property
+    def upstream_requests(self) -> Optional[int]:
+        """Number of GET requests sent upstream, None if the api does not share them through single flight."""
+        return None if self.api.single_flight is None else self.api.single_flight.started
+
+    @property
+    def viewers(self) -> int:
+        """Number of clients connected to the image stream."""
+        return self._image_hub.subscribers
+
+    def create_app(self) -> web.Application:
+        """Creates the aiohttp application serving the relayed api."""
+        app = web.Application(middlewares=[self._middleware])
+        prefix = "/api/v1/controller"
+        app.router.add_post(f"{prefix}/camera/image-recognition", self.add_image_recognition_config)
+        app.router.add_get(f"{prefix}/camera/message-stream", self.camera_message_stream)
+        app.router.add_post(f"{prefix}/camera/start", self.start_camera)
+        app.router.add_get(f"{prefix}/camera/image-stream", self.camera_image_stream)
+        app.router.add_delete(f"{prefix}/camera/stop", self.stop_camera)
+        app.router.add_get(f"{prefix}/discovery", self.get_controllers)
+        app.router.add_get(f"{prefix}/message-stream", self.controller_message_stream)
+        app.router.add_get(prefix + "/{controller_id:\\d+}", self.get_controller)
+        app.router.add_post(prefix + "/{controller_id:\\d+}", self.init_controller)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters", self.get_counters)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/counters", self.add_counters)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters/message-stream", self.counters_message_stream)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters/{counter_id:\\d+}", self.get_counter)
+        app.router.add_patch(prefix + "/{controller_id:\\d+}/counters/{counter_id:\\d+}", self.reset_counter)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/inputs", self.get_inputs)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/inputs", self.add_inputs)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/motors/{motor_id:\\d+}", self.update_motor)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/servomotors/{servomotor_id:\\d+}", self.update_servomotor)
+        return app
+
+    async def start(self):
+        """Starts serving."""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stops serving and closes the upstream streams."""
+        await self._image_hub.close()
+        for hub in self._event_hubs.values():
+            await hub.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "ControllerRelay":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # Infrastructure
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        if request.method == "OPTIONS":
+            return web.Response(headers=_CORS_HEADERS)
+        if self.api_key is not None:
+            key = request.headers.get('X-API-KEY') or request.query.get('X-API-KEY')
+            if key != self.api_key:
+                raise web.HTTPBadRequest(text="Invalid API key", headers=_CORS_HEADERS)
+        try:
+            response = await handler(request)
+        except RequestTimeoutError as e:
+            raise web.HTTPGatewayTimeout(text=e.message, headers=_CORS_HEADERS)
+        except APIError as e:
+            status = e.status_code or _status_of(e)
+            return web.Response(status=status, text=e.message, headers=_CORS_HEADERS)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise web.HTTPBadGateway(text=str(e), headers=_CORS_HEADERS)
+        if not response.prepared:
+            response.headers.update(_CORS_HEADERS)
+        return response
+
+    async def _relay(self,
+                     request: web.Request,
+                     hub: StreamHub[bytes],
+                     headers: Dict[str, str],
+                     policy: DeliveryPolicy,
+                     maxsize: int) -> web.StreamResponse:
+        """Streams the items of a hub to a client until it disconnects.
+
+        Disconnects are otherwise only noticed on the next write, so while the hub is idle the connection
+        is checked every heartbeat interval and event streams are sent a heartbeat comment. The hub stops
+        its upstream once the last client left.
+        """
+        response = web.StreamResponse(headers={**headers, 'Cache-Control': 'no-cache', **_CORS_HEADERS})
+        await response.prepare(request)
+        heartbeat = _SSE_HEARTBEAT if headers.get('Content-Type') == 'text/event-stream' else None
+        async with hub.subscribe(policy, maxsize) as items:
+            next_item: Optional["asyncio.Future[bytes]"] = None
+            try:
+                while True:
+                    if next_item is None:
+                        next_item = asyncio.ensure_future(items.__anext__())
+                    done, _ = await asyncio.wait([next_item], timeout=self.heartbeat_interval)
+                    if not done:
+                        if request.transport is None or request.transport.is_closing():
+                            break
+                        if heartbeat is not None:
+                            await response.write(heartbeat)
+                        continue
+                    item, next_item = next_item.result(), None
+                    await response.write(item)
+            except StopAsyncIteration:
+                pass
+            except (ConnectionResetError, APIError, OSError):
+                # The client left or the upstream failed, either way the stream ends here.
+                pass
+            finally:
+                if next_item is not None:
+                    next_item.cancel()
+        return response
+
+    def _event_hub(self, name: str, controller_id: int, connect: Callable[[], AsyncIterator[str]]) -> StreamHub[bytes]:
+        key = (name, controller_id)
+        hub = self._event_hubs.get(key)
+        if hub is None:
+            hub = self._event_hubs[key] = StreamHub(lambda: _sse_events(self.api.resilient_stream(connect)))
+        return hub
+
+    # Camera
+
+    async def _image_parts(self) -> AsyncIterator[bytes]:
+        """Encodes the frames of the camera hub as parts of the multipart image stream, once for all viewers.
+
+        The parts are laid out like the ones of the TXT controller, as js-ui depends on it.
+        """
+        async with self.api.camera_hub().subscribe(DeliveryPolicy.DROP_OLDEST, maxsize=4) as frames:
+            async for frame in frames:
+                yield b"".join((_MJPEG_PART_HEADER, frame, b"\r\n"))
+
+    async def add_image_recognition_config(self, request: web.Request) -> web.Response:
+        config = _parse(ImageRecognitionConfig, await _body(request))
+        await self.api.add_camera_image_recognition_config(config)
+        return web.Response()
+
+    async def start_camera(self, request: web.Request) -> web.Response:
+        camera_config = _parse(CameraConfig, await _body(request))
+        # Every viewer of js-ui starts the camera, which only needs to reach the controller once.
+        if camera_config != self.camera_config:
+            await self.api.start_camera(camera_config)
+            self.camera_config = camera_config
+        return web.Response()
+
+    async def stop_camera(self, request: web.Request) -> web.Response:
+        # The camera keeps running while other clients are watching.
+        if self._image_hub.subscribers == 0:
+            await self.api.stop_camera()
+            self.camera_config = None
+        return web.Response()
+
+    async def camera_image_stream(self, request: web.Request) -> web.StreamResponse:
+        return await self._relay(request, self._image_hub,
+                                 {'Content-Type': f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}'},
+                                 DeliveryPolicy.LATEST, 1)
+
+    async def camera_message_stream(self, request: web.Request) -> web.StreamResponse:
+        hub = self._event_hub("camera", -1, lambda: self.api.camera_message_stream(self.api.config.api_key))
+        return await self._relay(request, hub, {'Content-Type': 'text/event-stream'}, DeliveryPolicy.DROP_OLDEST, 64)
+
+    # Controllers
+
+    async def get_controllers(self, request: web.Request) -> web.Response:
+        return _json_response(await self.api.get_controllers())
+
+    async def controller_message_stream(self, request: web.Request) -> web.StreamResponse:
+        hub = self._event_hub("controller", -1, lambda: self.api.get_controller_message_stream(self.api.config.api_key))
+        return await self._relay(request, hub, {'Content-Type': 'text/event-stream'}, DeliveryPolicy.DROP_OLDEST, 256)
+
+    async def get_controller(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        return _json_response(await self.api.get_controller_by_id(controller_id))
+
+    async def init_controller(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        await self.api.init_controller_by_id(controller_id)
+        return web.Response()
+
+    # Counters
+
+    async def get_counters(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        return _json_response(await self.api.get_controller_counters(controller_id))
+
+    async def add_counters(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        counters = _parse_list(CounterModel, await _body(request))
+        await self.api.add_controller_counters(controller_id, counters)
+        return web.Response()
+
+    async def counters_message_stream(self, request: web.Request) -> web.StreamResponse:
+        controller_id = int(request.match_info['controller_id'])
+        hub = self._event_hub("counters", controller_id, lambda: self.api.get_controller_counters_message_stream(
+            controller_id, self.api.config.api_key))
+        return await self._relay(request, hub, {'Content-Type': 'text/event-stream'}, DeliveryPolicy.LATEST, 1)
+
+    async def get_counter(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        counter_id = int(request.match_info['counter_id'])
+        return _json_response(await self.api.get_controller_counter_by_id(controller_id, counter_id))
+
+    async def reset_counter(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        await self.api.update_controller_counter_by_id(controller_id, int(request.match_info['counter_id']))
+        return web.Response()
+
+    # Inputs
+
+    async def get_inputs(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        return _json_response(await self.api.get_controller_inputs(controller_id))
+
+    async def add_inputs(self, request: web.Request) -> web.Response:
+        controller_id = int(request.match_info['controller_id'])
+        inputs = _parse_list(InputModel, await _body(request))
+        await self.api.add_controller_inputs(controller_id, inputs)
+        return web.Response()
+
+    # Outputs
+
+    async def update_motor(self, request: web.Request) -> web.Response:
+        motor = _parse(Motor, await _body(request))
+        await self.api.update_controller_motor_by_id(int(request.match_info['controller_id']),
+                                                     int(request.match_info['motor_id']), motor)
+        return web.Response()
+
+    async def update_servomotor(self, request: web.Request) -> web.Response:
+        servomotor = _parse(Servomotor, await _body(request))
+        await self.api.update_controller_servomotor_by_id(int(request.match_info['controller_id']),
+                                                          int(request.match_info['servomotor_id']), servomotor)
+        return web.Response()
+
+
+async def _body(request: web.Request) -> Any:
+    try:
+        return await request.json()
+    except ValueError as e:
+        # json.JSONDecodeError, and UnicodeDecodeError for bodies which are not UTF-8, are ValueErrors.
+        raise web.HTTPBadRequest(text=f"Invalid JSON: {e}", headers=_CORS_HEADERS)
+
+
+def _parse(model: Any, data: Any) -> Any:
+    try:
+        return model(**data)
+    except (ValueError, TypeError) as e:
+        raise web.HTTPBadRequest(text=str(e), headers=_CORS_HEADERS)
+
+
+def _parse_list(model: Any, data: Any) -> list:
+    if not isinstance(data, list):
+        raise web.HTTPBadRequest(text="Expected a JSON array", headers=_CORS_HEADERS)
+    return [_parse(model, item) for item in data]
+
+
+def _status_of(error: APIError) -> int:
+    if isinstance(error, BadRequestError):
+        return 400
+    if isinstance(error, NotFoundError):
+        return 404
+    if isinstance(error, InternalServerError):
+        return 500
+    return 502
+
+
+def _json_response(result: Any) -> web.Response:
+    if isinstance(result, list):
+        data = [item.model_dump(mode='json', by_alias=True) if isinstance(item, BaseModel) else item for item in result]
+    elif isinstance(result, BaseModel):
+        data = result.model_dump(mode='json', by_alias=True)
+    else:
+        data = result
+    return web.Response(body=json.dumps(data).encode(), content_type='application/json')
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Relay the api of a TXT controller to many clients.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--upstream", "-u", help="Base URL of the controller api.", type=str, required=True)
+    parser.add_argument("--api-key", help="API key of the controller.", type=str, default=None)
+    parser.add_argument("--host", help="Host to bind to.", type=str, default="127.0.0.1")
+    parser.add_argument("--port", "-p", help="Port to bind to.", type=int, default=8080)
+    parser.add_argument("--snapshot-ttl", help="Seconds a GET response is reused.", type=float, default=0.1)
+    parser.add_argument("--relay-api-key", help="Require this API key from clients of the relay.",
+                        type=str, default=None)
+    return parser.parse_args()
+
+
+async def main(cfg):
+    async with ControllerAPI(APIConfig(cfg.upstream, api_key=cfg.api_key), cache=snapshot_cache(cfg.snapshot_ttl),
+                             single_flight=True) as api:
+        async with ControllerRelay(api, host=cfg.host, port=cfg.port, api_key=cfg.relay_api_key) as relay:
+            print(f"Relaying {cfg.upstream} on {relay.base_url}")
+            await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(get_config()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""Simulated TXT controller implementing the REST API used by ControllerAPI.
+
+Meant for offline testing and benchmarking of clients. Run it with::
+
+    python -m cvtxtclient.server.simulator --port 8080 --latency 0.005 --jitter 0.002 --max-chunk-size 1400
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from cvtxtclient.models import CameraConfig, Controller as ControllerModel, Counter as CounterModel, Input as InputModel
+from cvtxtclient.models.input import InputDevice
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+MJPEG_BOUNDARY = "frame"
+
+
+class SimulatorConfig:
+    """Configuration of the controller simulator."""
+
+    def __init__(self,
+                 controllers: int = 1,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 max_chunk_size: Optional[int] = None,
+                 fps: Optional[int] = None,
+                 width: Optional[int] = None,
+                 height: Optional[int] = None,
+                 counter_interval: float = 0.1,
+                 api_key: Optional[str] = None,
+                 seed: Optional[int] = None):
+        if fps is not None and fps <= 0:
+            raise ValueError("fps must be positive")
+        self.controllers = controllers
+        """Number of controllers, the first is the main controller, the others are extensions."""
+        self.latency = latency
+        """Seconds added to every response."""
+        self.jitter = jitter
+        """Maximum seconds randomly added to the latency of every response."""
+        self.max_chunk_size = max_chunk_size
+        """If set, streamed responses are written in randomly sized chunks of at most this many bytes."""
+        self.fps = fps
+        """Frames per second of the image stream, overriding the camera configuration if set."""
+        self.width = width
+        """Width of the streamed images, overriding the camera configuration if set."""
+        self.height = height
+        """Height of the streamed images, overriding the camera configuration if set."""
+        self.counter_interval = counter_interval
+        """Seconds between two messages of the counters message stream."""
+        self.api_key = api_key
+        """If set, requests must carry this key as X-API-KEY header or query parameter."""
+        self.seed = seed
+        """Seed for the simulated sensor noise, latency jitter and fragmentation."""
+
+
+class SimulatedController:
+    """State of a single simulated controller."""
+
+    COUNTERS = 4
+    INPUTS = 8
+    COUNTS_PER_SECOND = 60.0
+    """Counter increments per second of a motor running at full speed."""
+
+    def __init__(self, controller_id: int, rng: random.Random):
+        self.controller_id = controller_id
+        self.rng = rng
+        self.initialized = False
+        self.info = ControllerModel(api_version="1.0.0",
+                                    controller_lib_version="1.0.0",
+                                    firmware="4.7.0",
+                                    name=f"TXT{controller_id}" if controller_id else "TXT",
+                                    serial_number=f"SIM{controller_id:06d}",
+                                    version="TXT4.0")
+        self.counters: List[CounterModel] = [
+            CounterModel(count=0, digital=True, enabled=True, name=f"C{i + 1}", state=0) for i in range(self.COUNTERS)]
+        devices = [InputDevice.MINI_SWITCH, InputDevice.PHOTO_RESISTOR, InputDevice.ULTRASONIC_DISTANCE_METER,
+                   InputDevice.NTC_RESISTOR, InputDevice.PHOTO_TRANSISTOR, InputDevice.COLOR_SENSOR,
+                   InputDevice.TRAIL_FOLLOWER, InputDevice.MINI_SWITCH]
+        self.inputs: List[InputModel] = [
+            InputModel(device=device, enabled=True, name=f"I{i + 1}", value=0) for i, device in enumerate(devices)]
+        self.motors: Dict[int, Motor] = {}
+        self.servomotors: Dict[int, Servomotor] = {}
+        self._fractions = [0.0] * self.COUNTERS
+        self._last_advance = time.monotonic()
+
+    def advance(self):
+        """Advances the counters by the motor speeds since the last call."""
+        now = time.monotonic()
+        dt = now - self._last_advance
+        self._last_advance = now
+        for i, counter in enumerate(self.counters):
+            motor = self.motors.get(i + 1)
+            if motor is None or motor.enabled is False or not motor.values:
+                continue
+            self._fractions[i] += abs(motor.values[0]) / 512.0 * self.COUNTS_PER_SECOND * dt
+            steps = int(self._fractions[i])
+            if steps:
+                self._fractions[i] -= steps
+                counter.count = (counter.count or 0) + steps
+                counter.state = (counter.state or 0) ^ (steps & 1)
+
+    def sample_inputs(self) -> List[InputModel]:
+        """Updates the input values with plausible sensor readings and returns them."""
+        t = time.monotonic()
+        for input in self.inputs:
+            if not input.enabled:
+                continue
+            if input.device == InputDevice.MINI_SWITCH:
+                input.value = int(t % 4.0 < 2.0)
+            elif input.device == InputDevice.PHOTO_RESISTOR:
+                input.value = int(1500 + 300 * math.sin(t / 3.0) + self.rng.gauss(0, 4))
+            elif input.device == InputDevice.ULTRASONIC_DISTANCE_METER:
+                input.value = max(2, int(40 + 25 * math.sin(t / 5.0) + self.rng.gauss(0, 1)))
+            elif input.device == InputDevice.NTC_RESISTOR:
+                input.value = int(1800 + self.rng.gauss(0, 2))
+            elif input.device == InputDevice.PHOTO_TRANSISTOR:
+                input.value = int(self.rng.random() < 0.05)
+            elif input.device == InputDevice.COLOR_SENSOR:
+                input.value = int(800 + 200 * math.sin(t) + self.rng.gauss(0, 3))
+            else:
+                input.value = self.rng.randint(0, 1)
+        return self.inputs
+
+
+class ControllerSimulator:
+    """aiohttp server simulating TXT controllers, their camera and message streams.
+
+    Use as async context manager, the api is then available under `base_url`::
+
+        async with ControllerSimulator(SimulatorConfig(latency=0.005)) as simulator:
+            async with ControllerAPI(APIConfig(simulator.base_url)) as api:
+                ...
+    """
+
+    def __init__(self, config: Optional[SimulatorConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """Creates a new simulator.
+
+        Parameters
+        ----------
+        config : Optional[SimulatorConfig], optional
+            Configuration of the simulator, by default SimulatorConfig()
+
+        host : str, optional
+            Host to bind to, by default "127.0.0.1"
+
+        port : int, optional
+            Port to bind to, 0 for a free port, by default 0
+        """
+        self.config = config if config is not None else SimulatorConfig()
+        """Configuration of the simulator."""
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.controllers = [SimulatedController(i, self.rng) for i in range(self.config.controllers)]
+        """The simulated controllers by their id."""
+        self.camera_config: Optional[CameraConfig] = None
+        """Configuration of the running camera, None if stopped."""
+        self.image_recognition_config: Optional[Dict[str, Any]] = None
+        """The last image recognition configuration set."""
+        self.requests = 0
+        """Number of handled requests."""
+        self.frames_sent = 0
+        """Number of images written to image streams."""
+        self._messages: List[asyncio.Queue] = []
+        self._streams: "weakref.WeakSet[asyncio.Transport]" = weakref.WeakSet()
+        self._frame_cache: Dict[tuple, List[bytes]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    def create_app(self) -> web.Application:
+        """Creates the aiohttp application serving the simulated api."""
+        app = web.Application(middlewares=[self._middleware])
+        prefix = "/api/v1/controller"
+        app.router.add_post(f"{prefix}/camera/image-recognition", self.add_image_recognition_config)
+        app.router.add_get(f"{prefix}/camera/message-stream", self.camera_message_stream)
+        app.router.add_post(f"{prefix}/camera/start", self.start_camera)
+        app.router.add_get(f"{prefix}/camera/image-stream", self.camera_image_stream)
+        app.router.add_delete(f"{prefix}/camera/stop", self.stop_camera)
+        app.router.add_get(f"{prefix}/discovery", self.get_controllers)
+        app.router.add_get(f"{prefix}/message-stream", self.controller_message_stream)
+        app.router.add_get(prefix + "/{controller_id:\\d+}", self.get_controller)
+        app.router.add_post(prefix + "/{controller_id:\\d+}", self.init_controller)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters", self.get_counters)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/counters", self.add_counters)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters/message-stream", self.counters_message_stream)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/counters/{counter_id:\\d+}", self.get_counter)
+        app.router.add_patch(prefix + "/{controller_id:\\d+}/counters/{counter_id:\\d+}", self.reset_counter)
+        app.router.add_get(prefix + "/{controller_id:\\d+}/inputs", self.get_inputs)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/inputs", self.add_inputs)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/motors/{motor_id:\\d+}", self.update_motor)
+        app.router.add_post(prefix + "/{controller_id:\\d+}/servomotors/{servomotor_id:\\d+}", self.update_servomotor)
+        return app
+
+    async def start(self):
+        """Starts serving."""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stops serving and closes open streams."""
+        if self._runner is not None:
+            self.drop_streams()
+            for queue in self._messages:
+                if not queue.full():
+                    # Wakes up the idle message streams, so they end.
+                    queue.put_nowait(None)
+            await self._runner.cleanup()
+            self._runner = None
+
+    def drop_streams(self) -> int:
+        """Drops the connections of all open streams, as a network failure would. The camera keeps running.
+
+        Returns
+        -------
+        int
+            Number of dropped connections.
+        """
+        dropped = 0
+        for transport in list(self._streams):
+            if not transport.is_closing():
+                transport.close()
+                dropped += 1
+        self._streams.clear()
+        return dropped
+
+    async def __aenter__(self) -> "ControllerSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # Infrastructure
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        delay = self.config.latency + (self.rng.uniform(0, self.config.jitter) if self.config.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.config.api_key is not None:
+            key = request.headers.get('X-API-KEY') or request.query.get('X-API-KEY')
+            if key != self.config.api_key:
+                raise web.HTTPBadRequest(text="Invalid API key")
+        return await handler(request)
+
+    def _controller(self, request: web.Request) -> SimulatedController:
+        controller_id = int(request.match_info['controller_id'])
+        if controller_id >= len(self.controllers):
+            raise web.HTTPNotFound(text=f"Controller {controller_id} not found")
+        return self.controllers[controller_id]
+
+    def _publish(self, message: str):
+        for queue in self._messages:
+            if not queue.full():
+                queue.put_nowait(message)
+
+    async def _write(self, response: web.StreamResponse, data: bytes):
+        """Writes data, fragmented into random chunks if configured."""
+        max_chunk = self.config.max_chunk_size
+        if not max_chunk or len(data) <= max_chunk:
+            await response.write(data)
+            return
+        pos = 0
+        while pos < len(data):
+            size = self.rng.randint(1, max_chunk)
+            await response.write(data[pos:pos + size])
+            pos += size
+
+    async def _event_stream(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        self._streams.add(request.transport)
+        return response
+
+    @staticmethod
+    def _json(models: Any) -> web.Response:
+        if isinstance(models, list):
+            return web.json_response([model.model_dump(mode='json') for model in models])
+        return web.json_response(models.model_dump(mode='json'))
+
+    # Camera
+
+    def _frames(self, width: int, height: int) -> List[bytes]:
+        key = (width, height)
+        if key not in self._frame_cache:
+            self._frame_cache[key] = _render_frames(width, height, self.rng)
+        return self._frame_cache[key]
+
+    async def add_image_recognition_config(self, request: web.Request) -> web.Response:
+        self.image_recognition_config = await request.json()
+        return web.Response()
+
+    async def start_camera(self, request: web.Request) -> web.Response:
+        try:
+            camera_config = CameraConfig(**await request.json())
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if camera_config.fps <= 0:
+            raise web.HTTPBadRequest(text="fps must be positive")
+        self.camera_config = camera_config
+        self._publish("Camera started")
+        return web.Response()
+
+    async def stop_camera(self, request: web.Request) -> web.Response:
+        if self.camera_config is None:
+            raise web.HTTPBadRequest(text="Camera is not running")
+        self.camera_config = None
+        self._publish("Camera stopped")
+        return web.Response()
+
+    async def camera_image_stream(self, request: web.Request) -> web.StreamResponse:
+        if self.camera_config is None:
+            raise web.HTTPBadRequest(text="Camera is not running")
+        camera = self.camera_config
+        fps = self.config.fps or camera.fps
+        frames = self._frames(self.config.width or camera.width, self.config.height or camera.height)
+        response = web.StreamResponse(headers={
+            'Content-Type': f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}',
+            'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        self._streams.add(request.transport)
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time()
+        index = 0
+        try:
+            while self.camera_config is camera:
+                frame = frames[index % len(frames)]
+                header = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n"
+                await self._write(response, header.encode() + frame + b"\r\n")
+                self.frames_sent += 1
+                index += 1
+                next_frame += 1.0 / fps
+                await asyncio.sleep(max(0.0, next_frame - loop.time()))
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def camera_message_stream(self, request: web.Request) -> web.StreamResponse:
+        response = await self._event_stream(request)
+        try:
+            while True:
+                if self.camera_config is not None and self.image_recognition_config:
+                    state = {name: [] for name, detectors in self.image_recognition_config.items() if detectors}
+                    await self._write(response, f"data: {json.dumps(state)}\n\n".encode())
+                await asyncio.sleep(1.0 / (self.camera_config.fps if self.camera_config else 10))
+        except ConnectionResetError:
+            return response
+
+    # Controllers
+
+    async def get_controllers(self, request: web.Request) -> web.Response:
+        return self._json([controller.info for controller in self.controllers])
+
+    async def controller_message_stream(self, request: web.Request) -> web.StreamResponse:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        self._messages.append(queue)
+        try:
+            response = await self._event_stream(request)
+            while True:
+                message = await queue.get()
+                if message is None:
+                    return response
+                await self._write(response, f"data: {message}\n\n".encode())
+        except ConnectionResetError:
+            return response
+        finally:
+            self._messages.remove(queue)
+
+    async def get_controller(self, request: web.Request) -> web.Response:
+        return self._json(self._controller(request).info)
+
+    async def init_controller(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        controller.initialized = True
+        self._publish(f"Controller {controller.controller_id} initialized")
+        return web.Response()
+
+    # Counters
+
+    async def get_counters(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        controller.advance()
+        return self._json(controller.counters)
+
+    async def add_counters(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        try:
+            counters = [CounterModel(**item) for item in await request.json()]
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        for i, counter in enumerate(counters[:len(controller.counters)]):
+            controller.counters[i] = counter.model_copy(update={'count': counter.count or 0, 'state': counter.state or 0})
+        return web.Response()
+
+    async def counters_message_stream(self, request: web.Request) -> web.StreamResponse:
+        controller = self._controller(request)
+        response = await self._event_stream(request)
+        try:
+            while True:
+                controller.advance()
+                payload = json.dumps([counter.model_dump(mode='json') for counter in controller.counters])
+                await self._write(response, f"data: {payload}\n\n".encode())
+                await asyncio.sleep(self.config.counter_interval)
+        except ConnectionResetError:
+            return response
+
+    def _counter(self, request: web.Request) -> CounterModel:
+        controller = self._controller(request)
+        counter_id = int(request.match_info['counter_id'])
+        if counter_id >= len(controller.counters):
+            raise web.HTTPNotFound(text=f"Counter {counter_id} not found")
+        controller.advance()
+        return controller.counters[counter_id]
+
+    async def get_counter(self, request: web.Request) -> web.Response:
+        return self._json(self._counter(request))
+
+    async def reset_counter(self, request: web.Request) -> web.Response:
+        counter = self._counter(request)
+        counter.count = 0
+        counter.state = 0
+        return web.Response()
+
+    # Inputs
+
+    async def get_inputs(self, request: web.Request) -> web.Response:
+        return self._json(self._controller(request).sample_inputs())
+
+    async def add_inputs(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        try:
+            inputs = [InputModel(**item) for item in await request.json()]
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        for i, input in enumerate(inputs[:len(controller.inputs)]):
+            controller.inputs[i] = input
+        return web.Response()
+
+    # Outputs
+
+    async def update_motor(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        try:
+            motor = Motor(**await request.json())
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        motor_id = int(request.match_info['motor_id'])
+        controller.advance()
+        controller.motors[motor_id] = motor
+        return web.Response()
+
+    async def update_servomotor(self, request: web.Request) -> web.Response:
+        controller = self._controller(request)
+        try:
+            servomotor = Servomotor(**await request.json())
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        controller.servomotors[int(request.match_info['servomotor_id'])] = servomotor
+        return web.Response()
+
+
+def _render_frames(width: int, height: int, rng: random.Random, count: int = 30) -> List[bytes]:
+    """Renders a short loop of camera frames.
+
+    Real JPEGs of a moving gradient are encoded if Pillow is installed. Otherwise the frames are
+    random payloads of a typical JPEG size between the JPEG start and end markers, which is enough
+    for clients that do not decode them.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        size = max(1024, width * height // 8)
+        return [b"\xff\xd8" + rng.randbytes(size) + b"\xff\xd9" for _ in range(count)]
+    frames = []
+    for i in range(count):
+        image = Image.linear_gradient("L").resize((width, height)).rotate(i * 360 / count)
+        image = Image.merge("RGB", (image, image.transpose(Image.Transpose.FLIP_LEFT_RIGHT), image))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Run a simulated TXT controller.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--host", help="Host to bind to.", type=str, default="127.0.0.1")
+    parser.add_argument("--port", "-p", help="Port to bind to.", type=int, default=8080)
+    parser.add_argument("--controllers", help="Number of simulated controllers.", type=int, default=1)
+    parser.add_argument("--latency", help="Seconds added to every response.", type=float, default=0.0)
+    parser.add_argument("--jitter", help="Maximum random seconds added to the latency.", type=float, default=0.0)
+    parser.add_argument("--max-chunk-size", help="Fragment streamed responses into chunks of at most this size.",
+                        type=int, default=None)
+    parser.add_argument("--fps", help="Override the frames per second of the image stream.", type=int, default=None)
+    parser.add_argument("--width", help="Override the width of the streamed images.", type=int, default=None)
+    parser.add_argument("--height", help="Override the height of the streamed images.", type=int, default=None)
+    parser.add_argument("--api-key", help="Require this API key.", type=str, default=None)
+    parser.add_argument("--seed", help="Random seed.", type=int, default=None)
+    return parser.parse_args()
+
+
+async def main(cfg):
+    config = SimulatorConfig(controllers=cfg.controllers,
+                             latency=cfg.latency,
+                             jitter=cfg.jitter,
+                             max_chunk_size=cfg.max_chunk_size,
+                             fps=cfg.fps,
+                             width=cfg.width,
+                             height=cfg.height,
+                             api_key=cfg.api_key,
+                             seed=cfg.seed)
+    async with ControllerSimulator(config, host=cfg.host, port=cfg.port) as simulator:
+        print(f"Simulated controller listening on {simulator.base_url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(get_config()))
+    except KeyboardInterrupt:
+        pass
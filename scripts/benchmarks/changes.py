@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compares the number of raw input and counter samples with the number of reported changes.
+
+Runs against the controller simulator, whose analog inputs are noisy like real sensors::
+
+    python scripts/benchmarks/changes.py --duration 10 --rate 20
+"""
+import argparse
+import asyncio
+from typing import Any, Dict
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.server.simulator import ControllerSimulator, SimulatedController, SimulatorConfig
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the event volume of change subscriptions against raw samples.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--duration", "-d", help="Seconds to sample.", type=float, default=10.0)
+    parser.add_argument("--rate", help="Input samples per second.", type=float, default=20.0)
+    parser.add_argument("--min-interval", help="Minimum seconds between two changes.", type=float, default=0.0)
+    return parser.parse_args()
+
+
+async def count(iterator, counts: Dict[Any, int], key: Any):
+    async for _ in iterator:
+        counts[key] += 1
+
+
+async def main(cfg):
+    async with ControllerSimulator(SimulatorConfig(seed=0)) as simulator:
+        async with ControllerAPI(APIConfig(simulator.base_url)) as api:
+            await api.update_controller_motor_by_id(0, 1, Motor(values=[64]))
+            inputs = range(SimulatedController.INPUTS)
+            samples = {i: 0 for i in inputs}
+            changes = {i: 0 for i in inputs}
+            poller = api.input_poller()
+            subscriptions = [poller.subscribe(0, i, rate=cfg.rate) for i in inputs]
+            tasks = [asyncio.ensure_future(count(subscription, samples, i))
+                     for i, subscription in zip(inputs, subscriptions)]
+            tasks += [asyncio.ensure_future(count(api.input_changes(0, i, rate=cfg.rate, min_interval=cfg.min_interval),
+                                                  changes, i)) for i in inputs]
+            counter_samples = {"samples": 0}
+            counter_events = {"changes": 0}
+            tasks.append(asyncio.ensure_future(count(api.get_controller_counters_stream(0), counter_samples, "samples")))
+            tasks.append(asyncio.ensure_future(count(api.counter_changes(0, min_interval=cfg.min_interval),
+                                                     counter_events, "changes")))
+            await asyncio.sleep(cfg.duration)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            devices = [sample.device.value for sample in await api.get_controller_inputs(0)]
+
+    print(f"{'input':<30} {'samples':>8} {'changes':>8} {'ratio':>7}")
+    for i in inputs:
+        ratio = samples[i] / changes[i] if changes[i] else float('inf')
+        print(f"I{i + 1} {devices[i]:<27} {samples[i]:>8} {changes[i]:>8} {ratio:>6.1f}x")
+    total_samples = sum(samples.values()) + counter_samples["samples"] * 4
+    total_changes = sum(changes.values()) + counter_events["changes"]
+    print(f"{'counters (4)':<30} {counter_samples['samples'] * 4:>8} {counter_events['changes']:>8}")
+    print(f"{'total':<30} {total_samples:>8} {total_changes:>8} {total_samples / max(1, total_changes):>6.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
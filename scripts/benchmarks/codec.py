@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compares the codec with decoding through json.loads plus per item models and encoding through model_dump plus json.dumps.
+
+    python scripts/benchmarks/codec.py --items 8 --number 20000
+"""
+import argparse
+import json
+import timeit
+from typing import Any, List
+
+from cvtxtclient.api.codec import get_codec
+from cvtxtclient.models import Counter as CounterModel, Input as InputModel
+from cvtxtclient.models.input import InputDevice
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the JSON codec against the previous decode and encode path.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--items", "-n", help="Number of items per list.", type=int, default=8)
+    parser.add_argument("--number", help="Number of runs per measurement.", type=int, default=20000)
+    return parser.parse_args()
+
+
+def measure(name: str, function, number: int):
+    seconds = min(timeit.repeat(function, number=number, repeat=5)) / number
+    print(f"{name:<40} {seconds * 1e6:8.2f} us")
+
+
+def main(cfg):
+    counters = [CounterModel(count=i, digital=True, enabled=True, name=f"C{i}", state=i % 2) for i in range(cfg.items)]
+    inputs = [InputModel(device=InputDevice.MINI_SWITCH, enabled=True, name=f"I{i}", value=i) for i in range(cfg.items)]
+    codecs = {"pydantic": get_codec("pydantic")}
+    try:
+        codecs["orjson"] = get_codec("orjson")
+    except ImportError:
+        print("orjson is not installed, skipping its codec")
+
+    for name, models, type_ in (("counters", counters, List[CounterModel]), ("inputs", inputs, List[InputModel])):
+        model = type(models[0])
+        body = json.dumps([item.model_dump(mode='json', by_alias=True) for item in models]).encode()
+        print(f"{name}, {cfg.items} items, {len(body)} bytes")
+        measure("decode json.loads + Model(**item)",
+                lambda: [model(**item) for item in json.loads(body)], cfg.number)
+        for codec_name, codec in codecs.items():
+            measure(f"decode {codec_name} codec", lambda: codec.decode(body, type_), cfg.number)
+        measure("encode model_dump + json.dumps",
+                lambda: json.dumps([item.model_dump(by_alias=True) for item in models]).encode(), cfg.number)
+        for codec_name, codec in codecs.items():
+            measure(f"encode {codec_name} codec", lambda: codec.encode(models, type_), cfg.number)
+
+
+if __name__ == "__main__":
+    main(get_config())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compares the per-request latency of the ControllerAPI with and without connection reuse.
+
+Starts a minimal local HTTP server which accepts motor updates and issues sequential
+`update_controller_motor_by_id` calls against it, once with keep-alive enabled and once
+with a fresh connection per request.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, List
+
+from aiohttp import web
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.models.motor import Motor, Direction
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark per-request latency with and without connection reuse.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        "--requests", "-n",
+        help="Number of sequential requests per run.",
+        type=int, default=1000)
+    parser.add_argument(
+        "--host",
+        help="Host the local benchmark server binds to.",
+        type=str, default="127.0.0.1")
+    return parser.parse_args()
+
+
+async def start_server(host: str) -> web.AppRunner:
+    async def update_motor(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(status=200)
+
+    app = web.Application()
+    app.router.add_post("/api/v1/controller/{controller_id}/motors/{motor_id}", update_motor)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    return runner
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(base_url: str, keep_alive: bool, n: int) -> List[float]:
+    motor = Motor(enabled=True, name="M1", values=[512], direction=Direction.CW)
+    latencies = []
+    async with ControllerAPI(APIConfig(base_url, keep_alive=keep_alive)) as api:
+        # Warm up, so the pooled run does not account the first handshake only.
+        await api.update_controller_motor_by_id(0, 1, motor)
+        for _ in range(n):
+            start = time.perf_counter()
+            await api.update_controller_motor_by_id(0, 1, motor)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(cfg):
+    runner = await start_server(cfg.host)
+    try:
+        port = runner.addresses[0][1]
+        base_url = f"http://{cfg.host}:{port}/api/v1"
+        for keep_alive in (False, True):
+            latencies = await run(base_url, keep_alive, cfg.requests)
+            label = "keep-alive" if keep_alive else "new connection per request"
+            print(f"{label:>28}: mean {statistics.mean(latencies) * 1e3:7.3f} ms"
+                  f" | p50 {percentile(latencies, 0.5) * 1e3:7.3f} ms"
+                  f" | p95 {percentile(latencies, 0.95) * 1e3:7.3f} ms"
+                  f" | p99 {percentile(latencies, 0.99) * 1e3:7.3f} ms")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
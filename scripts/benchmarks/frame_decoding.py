@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Decoded frames per second of the FrameDecoder against the number of decode workers.
+
+Requires numpy and Pillow (or opencv-python) to be installed.
+"""
+import argparse
+import asyncio
+import io
+import time
+from typing import Any, AsyncIterator, List
+
+import numpy as np
+from PIL import Image
+
+from cvtxtclient.api.decoding import ColorMode, FrameDecoder
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark thread pool JPEG decoding.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--frames", help="Number of frames decoded per run.", type=int, default=300)
+    parser.add_argument("--width", help="Frame width.", type=int, default=640)
+    parser.add_argument("--height", help="Frame height.", type=int, default=480)
+    parser.add_argument("--max-workers", help="Largest number of workers to measure.", type=int, default=8)
+    parser.add_argument("--mode", help="Color mode of the decoded frames.", type=str,
+                        choices=[m.value for m in ColorMode], default=ColorMode.RGB.value)
+    parser.add_argument("--backend", help="Decoder backend, opencv or pillow.", type=str, default=None)
+    return parser.parse_args()
+
+
+def make_jpegs(width: int, height: int, count: int = 8) -> List[bytes]:
+    rng = np.random.default_rng(0)
+    jpegs = []
+    for i in range(count):
+        # Smooth gradients with some noise compress like camera images.
+        x, y = np.meshgrid(np.linspace(0, 255, width, dtype=np.float32),
+                           np.linspace(0, 255, height, dtype=np.float32))
+        base = np.stack([(x + y * 0.5 + i * 10) % 256, (y + x * 0.3) % 256, (x * 0.7 + i * 30) % 256], axis=-1)
+        pixels = np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels, "RGB").save(buffer, format="JPEG", quality=85)
+        jpegs.append(buffer.getvalue())
+    return jpegs
+
+
+async def frames(jpegs: List[bytes], count: int) -> AsyncIterator[bytes]:
+    for i in range(count):
+        yield jpegs[i % len(jpegs)]
+
+
+async def run(jpegs: List[bytes], cfg, workers: int) -> float:
+    decoder = FrameDecoder(mode=ColorMode(cfg.mode), workers=workers, backend=cfg.backend)
+    try:
+        start = time.perf_counter()
+        index = 0
+        async for frame in decoder.decode(frames(jpegs, cfg.frames)):
+            if frame.index != index:
+                raise AssertionError(f"Frame {frame.index} delivered out of order, expected {index}")
+            index += 1
+        return cfg.frames / (time.perf_counter() - start)
+    finally:
+        decoder.close()
+
+
+async def main(cfg):
+    jpegs = make_jpegs(cfg.width, cfg.height)
+    print(f"{cfg.width}x{cfg.height} {cfg.mode}, mean JPEG size {sum(map(len, jpegs)) / len(jpegs) / 1e3:.1f} kB")
+    baseline = None
+    workers = 1
+    while workers <= cfg.max_workers:
+        fps = await run(jpegs, cfg, workers)
+        baseline = baseline or fps
+        print(f"  workers {workers:2d}: {fps:8.1f} frames/s ({fps / baseline:4.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compares recording frames into a segment with writing one JPEG file per frame.
+
+    python scripts/benchmarks/recording.py --frames 2000 --size 40000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Any
+
+from cvtxtclient.api.recording import SegmentReader, SegmentRecorder
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the segment recorder against one file per frame.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--frames", "-n", help="Number of recorded frames.", type=int, default=2000)
+    parser.add_argument("--size", "-s", help="Size of a frame in bytes.", type=int, default=40000)
+    parser.add_argument("--dir", help="Directory to record into, a temporary one if not given.", type=str, default=None)
+    return parser.parse_args()
+
+
+async def record_files(directory: str, frames: list) -> float:
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        with open(os.path.join(directory, f"frame_{i:06d}.jpg"), "wb") as f:
+            f.write(frame)
+        # Give other tasks a chance to run, as a stream consumer would.
+        await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+async def record_segment(path: str, frames: list) -> float:
+    start = time.perf_counter()
+    async with SegmentRecorder(path) as recorder:
+        for frame in frames:
+            await recorder.append(frame)
+            await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+def read_random(path: str, count: int) -> float:
+    with SegmentReader(path) as reader:
+        positions = [random.randrange(len(reader)) for _ in range(count)]
+        start = time.perf_counter()
+        total = 0
+        for i in positions:
+            frame = reader[i]
+            total += frame[0] + frame[-1]
+            frame.release()
+        return time.perf_counter() - start
+
+
+async def main(cfg):
+    frames = [os.urandom(cfg.size) for _ in range(min(cfg.frames, 64))]
+    frames = [frames[i % len(frames)] for i in range(cfg.frames)]
+    with tempfile.TemporaryDirectory(dir=cfg.dir) as directory:
+        files_dir = os.path.join(directory, "files")
+        os.mkdir(files_dir)
+        files = await record_files(files_dir, frames)
+        segment_path = os.path.join(directory, "segment.mjpeg")
+        segment = await record_segment(segment_path, frames)
+        reads = read_random(segment_path, cfg.frames)
+    megabytes = cfg.frames * cfg.size / 1e6
+    print(f"one file per frame: {files:.3f}s, {cfg.frames / files:.0f} frames/s, {megabytes / files:.1f} MB/s")
+    print(f"segment recorder:   {segment:.3f}s, {cfg.frames / segment:.0f} frames/s, {megabytes / segment:.1f} MB/s")
+    print(f"random reads:       {reads / cfg.frames * 1e6:.2f} us per frame")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
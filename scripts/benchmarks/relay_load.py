@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Load test of the relay with many simulated downstream viewers.
+
+Starts the controller simulator and a relay in front of it, then connects viewers which each
+watch the image stream, listen to the counters stream and poll the counters, like js-ui does::
+
+    python scripts/benchmarks/relay_load.py --viewers 50 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.api.multipart import MultipartStreamParser
+from cvtxtclient.server.relay import ControllerRelay, snapshot_cache
+from cvtxtclient.server.simulator import ControllerSimulator, SimulatorConfig
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Load test the relay with many downstream viewers.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--viewers", "-n", help="Number of downstream viewers.", type=int, default=50)
+    parser.add_argument("--duration", "-d", help="Seconds the viewers stay connected.", type=float, default=10.0)
+    parser.add_argument("--poll-interval", help="Seconds between the counter polls of a viewer.",
+                        type=float, default=0.1)
+    parser.add_argument("--fps", help="Frames per second of the simulated camera.", type=int, default=15)
+    parser.add_argument("--width", help="Width of the simulated camera images.", type=int, default=320)
+    parser.add_argument("--height", help="Height of the simulated camera images.", type=int, default=240)
+    parser.add_argument("--latency", help="Latency injected by the simulator in seconds.", type=float, default=0.005)
+    parser.add_argument("--output", "-o", help="Path of the JSON result file, stdout if not given.",
+                        type=str, default=None)
+    return parser.parse_args()
+
+
+async def watch_images(session: aiohttp.ClientSession, base_url: str, deadline: float) -> int:
+    frames = 0
+    async with session.get(f"{base_url}/controller/camera/image-stream") as response:
+        boundary = MultipartStreamParser.boundary_from_content_type(response.headers['Content-Type'])
+        parser = MultipartStreamParser(boundary)
+        async for chunk in response.content.iter_any():
+            frames += len(parser.feed(chunk))
+            if time.monotonic() >= deadline:
+                break
+    return frames
+
+
+async def listen_counters(session: aiohttp.ClientSession, base_url: str, deadline: float) -> int:
+    events = 0
+    async with session.get(f"{base_url}/controller/0/counters/message-stream") as response:
+        async for line in response.content:
+            if line.startswith(b"data:"):
+                events += 1
+            if time.monotonic() >= deadline:
+                break
+    return events
+
+
+async def poll_counters(session: aiohttp.ClientSession, base_url: str, deadline: float, interval: float) -> List[float]:
+    latencies = []
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with session.get(f"{base_url}/controller/0/counters") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def viewer(base_url: str, duration: float, interval: float) -> Dict[str, Any]:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{base_url}/controller/camera/start",
+                                json={"width": 320, "height": 240, "fps": 15, "rotate": False, "debug": False}):
+            pass
+        deadline = time.monotonic() + duration
+        frames, events, latencies = await asyncio.gather(watch_images(session, base_url, deadline),
+                                                         listen_counters(session, base_url, deadline),
+                                                         poll_counters(session, base_url, deadline, interval))
+    return {"frames": frames, "events": events, "latencies": latencies}
+
+
+async def main(cfg):
+    simulator_config = SimulatorConfig(fps=cfg.fps, width=cfg.width, height=cfg.height, latency=cfg.latency, seed=0)
+    async with ControllerSimulator(simulator_config) as simulator:
+        async with ControllerAPI(APIConfig(simulator.base_url), cache=snapshot_cache(), single_flight=True) as api:
+            async with ControllerRelay(api) as relay:
+                start = time.monotonic()
+                results = await asyncio.gather(*(viewer(relay.base_url, cfg.duration, cfg.poll_interval)
+                                                 for _ in range(cfg.viewers)))
+                elapsed = time.monotonic() - start
+                upstream_frames = simulator.frames_sent
+                upstream_requests = simulator.requests
+
+    fps = [result["frames"] / cfg.duration for result in results]
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    report = {
+        "parameters": vars(cfg),
+        "elapsed": elapsed,
+        "upstream": {"frames": upstream_frames, "requests": upstream_requests},
+        "downstream": {
+            "frames": sum(result["frames"] for result in results),
+            "counter_events": sum(result["events"] for result in results),
+            "counter_polls": len(latencies),
+            "viewer_fps_min": min(fps),
+            "viewer_fps_mean": statistics.mean(fps),
+            "poll_p50_ms": latencies[len(latencies) // 2] * 1e3,
+            "poll_p99_ms": latencies[int(len(latencies) * 0.99)] * 1e3,
+        },
+        "relay": {"requests": relay.requests, "upstream_gets": relay.upstream_requests},
+    }
+    output = json.dumps(report, indent=2)
+    if cfg.output is None:
+        print(output)
+    else:
+        with open(cfg.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
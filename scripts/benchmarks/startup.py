@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Measures the startup cost of a short-lived client and fails if it exceeds a budget.
+
+Every run starts a fresh interpreter, which imports the client and sends a first request
+to a simulated controller. The medians of the import time and of the time until the
+first response arrived are compared against the budgets::
+
+    python scripts/benchmarks/startup.py --runs 10 --import-budget 0.5 --request-budget 1.0
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from typing import Any, Dict
+
+from cvtxtclient.server.simulator import ControllerSimulator
+
+CHILD = """
+import time
+start = time.perf_counter()
+import asyncio
+import sys
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+imported = time.perf_counter()
+
+
+async def first_request():
+    async with ControllerAPI(APIConfig(sys.argv[1])) as api:
+        await api.get_controllers()
+
+asyncio.run(first_request())
+done = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first_request": done - start,
+    "models": sorted(name for name in sys.modules if name.startswith("cvtxtclient.models.")),
+}))
+"""
+
+DEFERRED_MODELS = ("ball_detector", "color_detector", "line_detector", "motion_detector",
+                   "image_recognition_config", "debugger_arguments", "debugger_response")
+"""Models the client must not import before they are used."""
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark import time and time to first request of the client.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--runs", "-n", help="Number of fresh interpreters to measure.", type=int, default=10)
+    parser.add_argument("--import-budget", help="Budget of the median import time in seconds.",
+                        type=float, default=0.5)
+    parser.add_argument("--request-budget", help="Budget of the median time to the first response in seconds.",
+                        type=float, default=1.0)
+    return parser.parse_args()
+
+
+async def run_child(base_url: str) -> Dict[str, Any]:
+    process = await asyncio.create_subprocess_exec(sys.executable, "-c", "import json\n" + CHILD, base_url,
+                                                   stdout=asyncio.subprocess.PIPE)
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"Client exited with {process.returncode}")
+    return json.loads(stdout)
+
+
+async def main(cfg) -> int:
+    async with ControllerSimulator() as simulator:
+        # The first run warms the bytecode cache, it is not measured.
+        await run_child(simulator.base_url)
+        runs = [await run_child(simulator.base_url) for _ in range(cfg.runs)]
+
+    import_time = statistics.median(run["import"] for run in runs)
+    request_time = statistics.median(run["first_request"] for run in runs)
+    loaded = {name.rsplit(".", 1)[-1] for name in runs[0]["models"]}
+    eager = sorted(loaded.intersection(DEFERRED_MODELS))
+    print(f"import:        {import_time * 1e3:7.1f} ms (budget {cfg.import_budget * 1e3:.0f} ms)")
+    print(f"first request: {request_time * 1e3:7.1f} ms (budget {cfg.request_budget * 1e3:.0f} ms)")
+    print(f"models loaded: {', '.join(sorted(loaded))}")
+
+    failures = []
+    if import_time > cfg.import_budget:
+        failures.append("import time exceeds its budget")
+    if request_time > cfg.request_budget:
+        failures.append("time to first request exceeds its budget")
+    if eager:
+        failures.append(f"models imported eagerly: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(get_config())))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the ControllerAPI against the local controller simulator.
+
+Measures per-endpoint latency percentiles, sustained requests per second under concurrency,
+MJPEG frames per second and throughput of camera_image_stream and the cost of decoding
+counter and input lists. Results are written as JSON, so runs can be compared over time::
+
+    python scripts/benchmarks/suite.py --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from importlib import metadata
+from typing import Any, Awaitable, Callable, Dict, List
+
+from cvtxtclient.api.codec import Codec
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.models import CameraConfig, Counter as CounterModel, Input as InputModel
+from cvtxtclient.models.motor import Direction, Motor
+from cvtxtclient.server.simulator import ControllerSimulator, SimulatorConfig
+
+
+def get_config() -> Any:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the ControllerAPI against the controller simulator.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--output", "-o", help="Path of the JSON result file, stdout if not given.",
+                        type=str, default=None)
+    parser.add_argument("--requests", "-n", help="Sequential requests per latency measurement.", type=int, default=500)
+    parser.add_argument("--concurrency", "-c", help="Concurrent tasks for the throughput measurement.",
+                        type=int, default=16)
+    parser.add_argument("--duration", "-d", help="Seconds per throughput and stream measurement.",
+                        type=float, default=3.0)
+    parser.add_argument("--latency", help="Latency injected by the simulator in seconds.", type=float, default=0.0)
+    parser.add_argument("--jitter", help="Jitter injected by the simulator in seconds.", type=float, default=0.0)
+    parser.add_argument("--max-chunk-size", help="Fragment streamed responses of the simulator.",
+                        type=int, default=None)
+    parser.add_argument("--fps", help="Frames per second of the simulated camera.", type=int, default=500)
+    parser.add_argument("--width", help="Width of the simulated camera images.", type=int, default=640)
+    parser.add_argument("--height", help="Height of the simulated camera images.", type=int, default=480)
+    parser.add_argument("--list-size", help="Number of items per validated list.", type=int, default=8)
+    parser.add_argument("--validations", help="Number of validated lists.", type=int, default=20000)
+    return parser.parse_args()
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics of latency samples in milliseconds."""
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1e3
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered) * 1e3,
+        "min_ms": ordered[0] * 1e3,
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+def endpoints(api: ControllerAPI) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    motor = Motor(enabled=True, name="M1", values=[256], direction=Direction.CW)
+    return {
+        "motor_post": lambda: api.update_controller_motor_by_id(0, 1, motor),
+        "counters_get": lambda: api.get_controller_counters(0),
+        "discovery_get": lambda: api.get_controllers(),
+    }
+
+
+async def bench_latency(api: ControllerAPI, n: int) -> Dict[str, Any]:
+    results = {}
+    for name, call in endpoints(api).items():
+        await call()
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            await call()
+            samples.append(time.perf_counter() - start)
+        results[name] = percentiles(samples)
+    return results
+
+
+async def bench_throughput(api: ControllerAPI, concurrency: int, duration: float) -> Dict[str, Any]:
+    results = {}
+    for name, call in endpoints(api).items():
+        deadline = time.perf_counter() + duration
+        samples: List[float] = []
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await call()
+                samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        results[name] = {"concurrency": concurrency,
+                         "requests_per_second": len(samples) / elapsed,
+                         "latency": percentiles(samples)}
+    return results
+
+
+async def bench_stream(api: ControllerAPI, duration: float) -> Dict[str, Any]:
+    await api.start_camera(CameraConfig())
+    try:
+        frames = 0
+        size = 0
+        start = None
+        async for frame in api.camera_image_stream():
+            if start is None:
+                # The first frame includes the connection setup.
+                start = time.perf_counter()
+                continue
+            frames += 1
+            size += len(frame)
+            if time.perf_counter() - start >= duration:
+                break
+        # Without frames, e.g. if the stream ended right away, there is nothing to measure.
+        elapsed = time.perf_counter() - start if start is not None else 0.0
+    finally:
+        await api.stop_camera()
+    return {"frames": frames,
+            "frames_per_second": frames / elapsed if elapsed > 0 else 0.0,
+            "megabytes_per_second": size / elapsed / 1e6 if elapsed > 0 else 0.0,
+            "mean_frame_bytes": size / max(frames, 1)}
+
+
+def bench_validation(codec: Codec, list_size: int, count: int) -> Dict[str, Any]:
+    counters = [{"count": i, "digital": True, "enabled": True, "name": f"C{i}", "state": i % 2}
+                for i in range(list_size)]
+    inputs = [{"device": "PHOTO_RESISTOR", "enabled": True, "name": f"I{i}", "value": 1500 + i}
+              for i in range(list_size)]
+    results = {}
+    for name, type_, data in (("counter_list", List[CounterModel], counters), ("input_list", List[InputModel], inputs)):
+        body = json.dumps(data).encode("utf-8")
+        start = time.perf_counter()
+        for _ in range(count):
+            codec.decode(body, type_)
+        elapsed = time.perf_counter() - start
+        results[name] = {"list_size": list_size,
+                         "lists": count,
+                         "us_per_list": elapsed / count * 1e6,
+                         "us_per_item": elapsed / count / list_size * 1e6}
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    versions = {}
+    for package in ("aiohttp", "pydantic", "pydantic-core"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {"python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "packages": versions}
+
+
+async def main(cfg):
+    simulator_config = SimulatorConfig(latency=cfg.latency,
+                                       jitter=cfg.jitter,
+                                       max_chunk_size=cfg.max_chunk_size,
+                                       fps=cfg.fps,
+                                       width=cfg.width,
+                                       height=cfg.height,
+                                       seed=0)
+    report: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "parameters": vars(cfg),
+    }
+    async with ControllerSimulator(simulator_config) as simulator:
+        # Every measured call has to be its own request, so concurrent GETs must not be shared.
+        async with ControllerAPI(APIConfig(simulator.base_url), single_flight=False) as api:
+            report["latency"] = await bench_latency(api, cfg.requests)
+            report["throughput"] = await bench_throughput(api, cfg.concurrency, cfg.duration)
+            report["stream"] = await bench_stream(api, cfg.duration)
+            report["validation"] = bench_validation(api.codec, cfg.list_size, cfg.validations)
+
+    output = json.dumps(report, indent=2)
+    if cfg.output is None:
+        print(output)
+    else:
+        with open(cfg.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(get_config()))
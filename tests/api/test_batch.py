@@ -0,0 +1,70 @@
+import asyncio
+
+from cvtxtclient.api.batch import Batch
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.models.motor import Motor
+from cvtxtclient.models.servomotor import Servomotor
+
+
+class FakeAPI:
+    """Records how many calls run at once, every call takes 10 ms."""
+
+    def __init__(self, config: APIConfig):
+        self.config = config
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def _call(self, *args):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if args[-1] == "fail":
+                raise ValueError("failed")
+            self.calls.append(args)
+        finally:
+            self.in_flight -= 1
+
+    async def update_controller_motor_by_id(self, controller_id, motor_id, motor):
+        await self._call("motor", motor_id)
+
+    async def update_controller_servomotor_by_id(self, controller_id, servomotor_id, servomotor):
+        await self._call("servomotor", servomotor_id)
+
+    async def update_controller_counter_by_id(self, controller_id, counter_id):
+        await self._call("counter", counter_id)
+
+
+def scenario(batch: Batch) -> Batch:
+    for motor_id in range(1, 5):
+        batch.set_motor(motor_id, Motor(values=[512]))
+    for servomotor_id in (1, 2):
+        batch.set_servomotor(servomotor_id, Servomotor(value=256))
+    return batch.reset_counter(0)
+
+
+def test_default_sends_typical_batch_in_one_round():
+    api = FakeAPI(APIConfig("http://controller"))
+    batch = scenario(Batch(api, 0))
+    assert batch.max_in_flight == api.config.limit_per_host
+    result = asyncio.run(batch.execute())
+    assert result.ok
+    assert api.max_in_flight == 7
+
+
+def test_max_in_flight_bounds_concurrency():
+    api = FakeAPI(APIConfig("http://controller"))
+    result = asyncio.run(scenario(Batch(api, 0, max_in_flight=2)).execute())
+    assert result.ok
+    assert api.max_in_flight == 2
+    assert len(api.calls) == 7
+
+
+def test_failing_operation_does_not_affect_others():
+    api = FakeAPI(APIConfig("http://controller"))
+    batch = Batch(api, 0).set_motor(1, Motor(values=[1])).reset_counter("fail").set_motor(2, Motor(values=[2]))
+    result = asyncio.run(batch.execute())
+    assert not result.ok
+    assert [error.operation.target_id for error in result.errors] == ["fail"]
+    assert api.calls == [("motor", 1), ("motor", 2)]
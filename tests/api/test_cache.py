@@ -0,0 +1,85 @@
+import asyncio
+
+from cvtxtclient.api.cache import ResponseCache
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.models import Counter as CounterModel
+from cvtxtclient.server.simulator import ControllerSimulator
+
+BASE = "http://txt/api/v1/controller/0"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    cache = ResponseCache({"counters": 1.0}, clock=clock)
+    cache.put("counters", f"{BASE}/counters", [1])
+    assert cache.get("counters", f"{BASE}/counters") == [1]
+    clock.now = 1.0
+    assert cache.get("counters", f"{BASE}/counters") is None
+    assert cache.snapshot()["hits"] == {"counters": 1}
+    assert cache.snapshot()["misses"] == {"counters": 1}
+
+
+def test_uncached_endpoints_are_not_stored():
+    cache = ResponseCache({"counters": 1.0})
+    cache.put("motor", f"{BASE}/motors/1", "value")
+    assert len(cache) == 0
+
+
+def test_invalidate_removes_the_url_and_the_urls_below_it():
+    cache = ResponseCache({"controller": 10.0, "counters": 10.0, "counter": 10.0})
+    cache.put("controller", BASE, "controller")
+    cache.put("counters", f"{BASE}/counters", "counters")
+    cache.put("counter", f"{BASE}/counters/1", "counter")
+    cache.put("controller", f"{BASE}0", "other controller")
+    cache.invalidate(f"{BASE}/counters")
+    assert cache.get("controller", BASE) == "controller"
+    assert cache.get("counters", f"{BASE}/counters") is None
+    assert cache.get("counter", f"{BASE}/counters/1") is None
+    cache.invalidate(BASE)
+    assert cache.get("controller", BASE) is None
+    # Urls sharing only a prefix string are not below the invalidated url.
+    assert cache.get("controller", f"{BASE}0") == "other controller"
+    assert cache.invalidations == 3
+
+
+def test_response_fetched_before_an_invalidation_is_not_cached():
+    cache = ResponseCache({"counters": 10.0})
+    generation = cache.generation
+    cache.invalidate(f"{BASE}/counters")
+    cache.put("counters", f"{BASE}/counters", "stale", generation)
+    assert cache.get("counters", f"{BASE}/counters") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache({"counter": 10.0}, maxsize=2)
+    cache.put("counter", f"{BASE}/counters/1", 1)
+    cache.put("counter", f"{BASE}/counters/2", 2)
+    cache.get("counter", f"{BASE}/counters/1")
+    cache.put("counter", f"{BASE}/counters/3", 3)
+    assert cache.get("counter", f"{BASE}/counters/2") is None
+    assert cache.get("counter", f"{BASE}/counters/1") == 1
+    assert cache.evictions == 1
+
+
+def test_writes_through_the_client_invalidate_its_cache():
+    async def main():
+        async with ControllerSimulator() as simulator:
+            async with ControllerAPI(APIConfig(simulator.base_url), cache=ResponseCache({"counters": 60.0})) as api:
+                assert (await api.get_controller_counters(0))[0].name == "C1"
+                requests = simulator.requests
+                assert (await api.get_controller_counters(0))[0].name == "C1"
+                assert simulator.requests == requests
+                await api.add_controller_counters(0, [CounterModel(count=0, digital=True, enabled=True,
+                                                                   name="renamed", state=0)])
+                assert (await api.get_controller_counters(0))[0].name == "renamed"
+
+    asyncio.run(main())
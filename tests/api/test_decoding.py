@@ -0,0 +1,45 @@
+import asyncio
+import io
+
+import pytest
+
+from cvtxtclient.api.decoding import ColorMode, FrameDecoder
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+
+def jpeg(value: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("L", (16, 8), value).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def frames(*items):
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def decode(decoder: FrameDecoder, source):
+    try:
+        return [frame async for frame in decoder.decode(source)]
+    finally:
+        decoder.close()
+
+
+def test_corrupt_frame_is_skipped():
+    decoder = FrameDecoder(mode=ColorMode.GRAY, backend="pillow")
+    good = jpeg(200)
+    decoded = asyncio.run(decode(decoder, frames(good, good[:len(good) // 3], b"not a jpeg", good)))
+    assert [frame.index for frame in decoded] == [0, 3]
+    assert decoded[0].image.shape == (8, 16)
+    assert decoder.errors == 2
+    assert decoder.last_error is not None
+
+
+def test_source_error_ends_stream():
+    decoder = FrameDecoder(mode=ColorMode.GRAY, backend="pillow")
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(decode(decoder, frames(jpeg(10), ConnectionResetError("dropped"))))
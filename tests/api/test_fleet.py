@@ -0,0 +1,26 @@
+import asyncio
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.fleet import Fleet
+
+
+def test_session_uses_connection_settings_of_the_configs():
+    async def main():
+        configs = [APIConfig(f"http://10.0.0.{i}/api/v1", keepalive_timeout=42.0, ttl_dns_cache=60) for i in range(3)]
+        async with Fleet(configs, max_in_flight=5, limit_per_host=2) as fleet:
+            connector = fleet.session.connector
+            assert connector.limit == 10
+            assert connector.limit_per_host == 2
+            assert not connector.force_close
+            assert connector._keepalive_timeout == 42.0
+            assert connector._cached_hosts._ttl == 60
+
+    asyncio.run(main())
+
+
+def test_session_closes_connections_without_keep_alive():
+    async def main():
+        async with Fleet([APIConfig("http://10.0.0.1/api/v1", keep_alive=False)]) as fleet:
+            assert fleet.session.connector.force_close
+
+    asyncio.run(main())
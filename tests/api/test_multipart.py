@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from cvtxtclient.api.multipart import MultipartStreamParser
+
+BOUNDARY = "frame"
+
+
+def make_frames(rng, count=20):
+    frames = []
+    while len(frames) < count:
+        frame = b"\xff\xd8" + rng.randbytes(rng.randint(0, 3000)) + b"\xff\xd9"
+        # Without Content-Length a body must not contain the delimiter.
+        if b"--" + BOUNDARY.encode() not in frame:
+            frames.append(frame)
+    return frames
+
+
+def make_stream(frames, content_length, closed=True):
+    parts = []
+    for frame in frames:
+        headers = b"Content-Type: image/jpeg\r\n"
+        if content_length:
+            headers += b"Content-Length: %d\r\n" % len(frame)
+        parts.append(b"--" + BOUNDARY.encode() + b"\r\n" + headers + b"\r\n" + frame + b"\r\n")
+    stream = b"".join(parts)
+    return stream + b"--" + BOUNDARY.encode() + b"--\r\n" if closed else stream
+
+
+def split(data, rng, pieces):
+    offsets = sorted(rng.sample(range(1, len(data)), pieces))
+    return [data[start:end] for start, end in zip([0] + offsets, offsets + [len(data)])]
+
+
+def parse(chunks, zero_copy):
+    parser = MultipartStreamParser(BOUNDARY, zero_copy=zero_copy)
+    frames = []
+    for chunk in chunks:
+        frames.extend(parser.feed(chunk))
+    # Views handed out earlier must still hold their frame after later feeds.
+    return parser, [bytes(frame) for frame in frames]
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+@pytest.mark.parametrize("content_length", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_random_splits(zero_copy, content_length, seed):
+    rng = random.Random(seed)
+    frames = make_frames(rng)
+    stream = make_stream(frames, content_length)
+    parser, parsed = parse(split(stream, rng, rng.randint(1, 200)), zero_copy)
+    assert parsed == frames
+    assert parser.closed
+    assert parser.content_type == "image/jpeg"
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+@pytest.mark.parametrize("content_length", [False, True])
+def test_byte_by_byte(zero_copy, content_length):
+    frames = make_frames(random.Random(0), 5)
+    stream = make_stream(frames, content_length)
+    _, parsed = parse([stream[i:i + 1] for i in range(len(stream))], zero_copy)
+    assert parsed == frames
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+def test_body_without_content_length_ends_at_next_delimiter(zero_copy):
+    frames = make_frames(random.Random(1), 3)
+    parser = MultipartStreamParser(BOUNDARY, zero_copy=zero_copy)
+    # The last part is only complete once the next delimiter arrived.
+    assert [bytes(frame) for frame in parser.feed(make_stream(frames, False, closed=False))] == frames[:2]
+    assert [bytes(frame) for frame in parser.feed(b"--" + BOUNDARY.encode())] == frames[2:]
+    assert not parser.closed
+
+
+def test_skips_preamble_and_reads_boundary_from_content_type():
+    boundary = MultipartStreamParser.boundary_from_content_type('multipart/x-mixed-replace; boundary="--frame"')
+    assert boundary == BOUNDARY
+    frames = make_frames(random.Random(2), 2)
+    parser = MultipartStreamParser(boundary)
+    assert parser.feed(b"preamble\r\n" + make_stream(frames, True)) == frames
+    assert parser.feed(b"--frame\r\n\r\ntrailing") == []
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+import pytest
+
+from cvtxtclient.api.recording import SegmentRecorder
+from cvtxtclient.api.replay import CAMERA_IMAGES, ReplaySession, counter_messages
+
+COUNTERS = counter_messages(0)
+
+
+async def record(directory: str):
+    """Records frames every 0.03 s and counter messages every 0.1 s."""
+    async with SegmentRecorder(os.path.join(directory, CAMERA_IMAGES)) as recorder:
+        for i in range(10):
+            await recorder.append(b"frame%d" % i, timestamp=100.0 + 0.03 * i)
+    async with SegmentRecorder(os.path.join(directory, COUNTERS)) as recorder:
+        for i in range(3):
+            await recorder.append(b'[{"count": %d}]' % i, timestamp=100.0 + 0.1 * i)
+
+
+@pytest.fixture
+def session(tmp_path) -> str:
+    asyncio.run(record(str(tmp_path)))
+    return str(tmp_path)
+
+
+def test_merged_interleaves_by_recorded_time(session):
+    async def replay():
+        async with ReplaySession(session, speed=None) as replay:
+            return [(name, bytes(item)) async for name, _, item in replay.merged()]
+
+    items = asyncio.run(replay())
+    # Frames at 0.03 s steps, counters at 0.1 s steps; at equal times the camera sorts first by name.
+    assert "".join("f" if name == CAMERA_IMAGES else "c" for name, _ in items) == "fcfffcfffcfff"
+    assert items == asyncio.run(replay())
+
+
+def test_streams_interleaved_in_one_task(session):
+    async def replay():
+        async with ReplaySession(session, speed=None) as replay:
+            frames = replay.camera_image_stream()
+            counters = replay.get_controller_counters_stream(0)
+            items = []
+            for _ in range(3):
+                items.append(await asyncio.wait_for(anext(frames), 1.0))
+                items.append((await asyncio.wait_for(anext(counters), 1.0))[0].count)
+            await frames.aclose()
+            await counters.aclose()
+            return items
+
+    assert asyncio.run(replay()) == [b"frame0", 0, b"frame1", 1, b"frame2", 2]
+
+
+def test_abandoned_stream_does_not_block_others(session):
+    async def replay():
+        async with ReplaySession(session, speed=None) as replay:
+            async def first_frame():
+                async for frame in replay.camera_image_stream():
+                    return frame
+
+            frame = await first_frame()
+            counters = [counters async for counters in replay.get_controller_counters_stream(0)]
+            return frame, len(counters)
+
+    assert asyncio.run(asyncio.wait_for(replay(), 5.0)) == (b"frame0", 3)
+
+
+def test_paced_replay_follows_recorded_time(session):
+    async def replay():
+        async with ReplaySession(session, speed=10.0) as replay:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            count = len([frame async for frame in replay.camera_image_stream()])
+            return count, loop.time() - start
+
+    count, elapsed = asyncio.run(replay())
+    assert count == 10
+    assert 0.02 <= elapsed < 0.5
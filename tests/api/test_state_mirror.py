@@ -0,0 +1,58 @@
+import asyncio
+
+from cvtxtclient.api.state_mirror import ControllerStateMirror
+from cvtxtclient.models import Counter
+
+
+class FakeAPI:
+    """Serves the counter messages put into its queue."""
+
+    def __init__(self):
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def get_controller_counter_updates_stream(self, controller_id):
+        while True:
+            yield await self.messages.get()
+
+
+def counters(*counts):
+    return [Counter(name=f"C{i + 1}", count=count) for i, count in enumerate(counts)]
+
+
+async def receive(mirror: ControllerStateMirror, api: FakeAPI, message):
+    waiter = asyncio.ensure_future(mirror.wait_for_update(ControllerStateMirror.COUNTERS, timeout=1.0))
+    await asyncio.sleep(0)
+    api.messages.put_nowait(message)
+    await waiter
+
+
+def counts(mirror: ControllerStateMirror):
+    return {i: value.value.count for i, value in mirror.get_counters().items()}
+
+
+def test_single_counter_is_merged_by_name():
+    async def run():
+        api = FakeAPI()
+        async with ControllerStateMirror(api, 0, input_poll_interval=None) as mirror:
+            await receive(mirror, api, counters(1, 2, 3, 4))
+            await receive(mirror, api, Counter(name="C3", count=30))
+            assert counts(mirror) == {0: 1, 1: 2, 2: 30, 3: 4}
+            api.messages.put_nowait(Counter(name="C9", count=90))
+            await receive(mirror, api, counters(5, 6, 7, 8))
+            assert counts(mirror) == {0: 5, 1: 6, 2: 7, 3: 8}
+
+    asyncio.run(run())
+
+
+def test_full_list_replaces_removed_counters():
+    async def run():
+        api = FakeAPI()
+        async with ControllerStateMirror(api, 0, input_poll_interval=None) as mirror:
+            await receive(mirror, api, counters(1, 2, 3, 4))
+            await receive(mirror, api, counters(10, 20))
+            assert counts(mirror) == {0: 10, 1: 20}
+            api.messages.put_nowait(Counter(name="C4", count=40))
+            await receive(mirror, api, Counter(name="C2", count=21))
+            assert counts(mirror) == {0: 10, 1: 21}
+
+    asyncio.run(run())
@@ -6,11 +6,13 @@ import asyncio
 import aiohttp
 from cvtxtclient.api.controller import ControllerAPI 
 from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.delivery import DeliveryPolicy
 from cvtxtclient.models.camera_config import CameraConfig
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QByteArray
 from PyQt5.QtGui import QPixmap, QImage
 
 # --- Configuration ---
+# Without a controller, start a simulated one with: python -m cvtxtclient.server.simulator --port 8080
 API_BASE_URL = "http://localhost:8080/api/v1"
 API_KEY = "TEST"
 
@@ -102,14 +104,16 @@ class ImageStreamReceiver(QThread):
             return
         self._running = True
         try:
-            async for frame_bytes in self._controller_api.camera_image_stream():
-                if not self._running:
-                    break
-                image = QImage.fromData(QByteArray(frame_bytes), "JPEG")
-                if not image.isNull():
-                    self.new_frame.emit(image)
-                else:
-                    print("Received invalid JPEG frame")
+            # Only the latest frame is displayed, so a slow UI does not lag behind the camera.
+            async with self._controller_api.buffered_camera_image_stream(DeliveryPolicy.LATEST) as frames:
+                async for frame_bytes in frames:
+                    if not self._running:
+                        break
+                    image = QImage.fromData(QByteArray(frame_bytes), "JPEG")
+                    if not image.isNull():
+                        self.new_frame.emit(image)
+                    else:
+                        print("Received invalid JPEG frame")
         except Exception as e:
             if self._running:
                 self._event_loop.call_soon_threadsafe(self.stream_error.emit, f"Error receiving image stream: {e}")
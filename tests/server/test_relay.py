@@ -0,0 +1,85 @@
+import asyncio
+
+import aiohttp
+
+from cvtxtclient.api.config import APIConfig
+from cvtxtclient.api.controller import ControllerAPI
+from cvtxtclient.models import Counter as CounterModel
+from cvtxtclient.server.relay import ControllerRelay, snapshot_cache
+from cvtxtclient.server.simulator import ControllerSimulator, SimulatorConfig
+
+
+def run_relay(test, ttl=0.1, latency=0.02, heartbeat_interval=1.0):
+    async def main():
+        async with ControllerSimulator(SimulatorConfig(latency=latency)) as simulator:
+            async with ControllerAPI(APIConfig(simulator.base_url), cache=snapshot_cache(ttl), single_flight=True) as api:
+                async with ControllerRelay(api, heartbeat_interval=heartbeat_interval) as relay, aiohttp.ClientSession() as session:
+                    return await test(simulator, relay, session)
+
+    return asyncio.run(main())
+
+
+async def get_json(session, url):
+    async with session.get(url) as response:
+        assert response.status == 200
+        return await response.json()
+
+
+def test_concurrent_gets_share_one_upstream_request():
+    async def test(simulator, relay, session):
+        url = f"{relay.base_url}/controller/0/inputs"
+        before = simulator.requests
+        results = await asyncio.gather(*(get_json(session, url) for _ in range(10)))
+        assert all(result == results[0] for result in results)
+        assert simulator.requests - before == 1
+        assert relay.upstream_requests == 1
+        # Answered from the snapshot until it expires.
+        await get_json(session, url)
+        assert simulator.requests - before == 1
+
+    run_relay(test, ttl=1.0)
+
+
+def test_cancelled_client_does_not_fail_the_others():
+    async def test(simulator, relay, session):
+        url = f"{relay.base_url}/controller/0/counters"
+        first = asyncio.ensure_future(get_json(session, url))
+        await asyncio.sleep(0.005)
+        others = asyncio.ensure_future(asyncio.gather(*(get_json(session, url) for _ in range(5))))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        results = await others
+        assert len(results) == 5
+        assert relay.upstream_requests == 1
+
+    run_relay(test, latency=0.05)
+
+
+def test_write_invalidates_snapshot():
+    async def test(simulator, relay, session):
+        url = f"{relay.base_url}/controller/0/counters"
+        assert [counter["name"] for counter in await get_json(session, url)][0] == "C1"
+        counter = CounterModel(count=0, digital=True, enabled=True, name="renamed", state=0)
+        async with session.post(url, json=[counter.model_dump(mode="json")]) as response:
+            assert response.status == 200
+        assert [counter["name"] for counter in await get_json(session, url)][0] == "renamed"
+
+    run_relay(test, ttl=60.0)
+
+
+def test_idle_event_stream_ends_when_client_leaves():
+    async def test(simulator, relay, session):
+        response = await session.get(f"{relay.base_url}/controller/0/counters/message-stream")
+        # The counters only change while motors run, the stream is idle after the first event.
+        assert (await response.content.readuntil(b"\n\n")).startswith(b"data: ")
+        assert await response.content.readuntil(b"\n\n") == b": heartbeat\n\n"
+        hub = relay._event_hubs[("counters", 0)]
+        assert hub.subscribers == 1
+        response.close()
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if hub.subscribers == 0:
+                break
+        assert hub.subscribers == 0
+
+    run_relay(test, heartbeat_interval=0.05)
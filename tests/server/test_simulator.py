@@ -0,0 +1,28 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from cvtxtclient.server.simulator import ControllerSimulator, SimulatorConfig
+
+
+@pytest.mark.parametrize("fps", [0, -5])
+def test_start_camera_rejects_non_positive_fps(fps):
+    async def main():
+        async with ControllerSimulator() as simulator, aiohttp.ClientSession() as session:
+            url = f"{simulator.base_url}/controller/camera"
+            async with session.post(f"{url}/start", json={"fps": fps}) as response:
+                assert response.status == 400
+            assert simulator.camera_config is None
+            async with session.post(f"{url}/start", json={"fps": 5, "width": 32, "height": 24}) as response:
+                assert response.status == 200
+            async with session.get(f"{url}/image-stream") as response:
+                assert response.status == 200
+                assert (await response.content.readuntil(b"\r\n\r\n")).startswith(b"--")
+
+    asyncio.run(main())
+
+
+def test_config_rejects_non_positive_fps():
+    with pytest.raises(ValueError):
+        SimulatorConfig(fps=0)